@@ -0,0 +1,237 @@
+# api_server.py
+# Optional local HTTP API so the shop intranet can ask for layouts and serial dates
+# without the desktop app. Standard library only.
+#
+#   GET  /health
+#   GET  /makers
+#   GET  /serial?maker=Selmer%20Paris&serial=123456
+#   GET  /serial/all?serial=123456    (every maker whose charts cover the serial)
+#   GET  /serial/year?year=1927[&maker=Conn]   (serial ranges made in a year)
+#   POST /nest    {"pads": "42 x 3\n30 x 5" (or [[42, 3], [30, 5]]), "sheet": "13.5x10in",
+#                  "materials": ["felt", "leather"], "hole": 3.5, "svg": true}
+#
+# Requests are handled on threads. Nesting is CPU-bound, so it runs in a process
+# pool and one big layout doesn't hold up the other requests. Nest results are
+# cached by a fingerprint of the request, and identical requests that arrive while
+# one is still running share its result.
+
+import hashlib
+import json
+import math
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import pad_engine
+from maker_names import resolve_maker
+from serial_lookup import (
+    SERIAL_DATA, lookup_serial_year, lookup_serial_candidates, search_all_makers, serial_ranges_for_year,
+)
+
+MAX_BODY_BYTES = 1024 * 1024
+NEST_TIMEOUT_S = 60
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# --- Worker (runs in the process pool) ---
+def nest_request(pads, materials, width_mm, height_mm, hole_dia, settings, want_svg):
+    """Nests every material and, if they all fit and want_svg is set, returns the SVG text too."""
+    total = pad_engine.count_discs(pads)
+    result = {"pads": total, "sheet_mm": [width_mm, height_mm], "materials": {}}
+    for material in materials:
+        placed = pad_engine.nest_discs(pads, material, width_mm, height_mm, settings)
+        disc_area = sum(math.pi * r * r for _, _, _, r in placed)
+        info = {
+            "placed": len(placed),
+            "fits": len(placed) == total,
+            "utilisation": disc_area / (width_mm * height_mm),
+            "layout": [[pad_size, cx, cy, r] for pad_size, cx, cy, r in placed],
+            "estimate": pad_engine.estimate_job(placed, material, hole_dia, settings),
+        }
+        if want_svg and info["fits"]:
+            dwg, _ = pad_engine.build_svg(pads, material, width_mm, height_mm, hole_dia, settings, placed=placed)
+            info["svg"] = dwg.tostring()
+        result["materials"][material] = info
+    result["fits"] = all(info["fits"] for info in result["materials"].values())
+    return result
+
+
+# --- Result cache ---
+class ResultCache:
+    """Bounded LRU of futures keyed by request fingerprint."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_submit(self, key, submit):
+        """Returns (future, was_cached). submit() is only called on a miss."""
+        with self._lock:
+            future = self._entries.get(key)
+            if future is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return future, True
+            future = submit()
+            self._entries[key] = future
+            self.misses += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        future.add_done_callback(lambda f: self._drop_if_failed(key, f))
+        return future, False
+
+    def _drop_if_failed(self, key, future):
+        """Drops a failed result so the next identical request tries again."""
+        if future.cancelled() or future.exception() is not None:
+            with self._lock:
+                if self._entries.get(key) is future:
+                    del self._entries[key]
+
+
+def fingerprint(*parts):
+    data = json.dumps(parts, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+# --- HTTP handling ---
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "SaxShopCompanionAPI/1.0"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_json(self, status, data, headers=None):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        try:
+            if url.path == "/health":
+                self.send_json(200, {"status": "ok", "cache_hits": self.server.cache.hits, "cache_misses": self.server.cache.misses})
+            elif url.path == "/makers":
+                self.send_json(200, {"makers": sorted(SERIAL_DATA)})
+            elif url.path == "/serial":
+                maker, serial = query.get("maker", ""), query.get("serial", "")
+                if not maker or not serial:
+                    raise ApiError(400, "Both 'maker' and 'serial' are required.")
+                matched, score = (maker, 1.0) if maker in SERIAL_DATA else resolve_maker(maker)
+                matched = matched or maker
+                candidates, _ = lookup_serial_candidates(matched, serial)
+                self.send_json(200, {"maker": maker, "matched_maker": matched, "match_score": score, "serial": serial,
+                                     "year": lookup_serial_year(matched, serial),
+                                     "candidates": [c._asdict() for c in candidates]})
+            elif url.path == "/serial/all":
+                serial = query.get("serial", "")
+                if not serial:
+                    raise ApiError(400, "'serial' is required.")
+                results, message = search_all_makers(serial)
+                self.send_json(200, {"serial": serial, "message": message,
+                                     "results": [dict(candidate._asdict(), maker=maker) for maker, candidate in results]})
+            elif url.path == "/serial/year":
+                try:
+                    year = int(query.get("year", ""))
+                except ValueError:
+                    raise ApiError(400, "'year' must be a whole number.")
+                by_maker = serial_ranges_for_year(year, query.get("maker"))
+                self.send_json(200, {"year": year, "makers": {
+                    maker: [r._asdict() for r in ranges] for maker, ranges in sorted(by_maker.items())}})
+            else:
+                raise ApiError(404, f"No such endpoint: {url.path}")
+        except ApiError as e:
+            self.send_json(e.status, {"status": "error", "error": str(e)})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        try:
+            if url.path != "/nest":
+                raise ApiError(404, f"No such endpoint: {url.path}")
+            result, cached = self.handle_nest(self.read_json())
+            self.send_json(200 if result["fits"] else 422, dict(result, status="ok" if result["fits"] else "error"),
+                           headers={"X-Cache": "hit" if cached else "miss"})
+        except ApiError as e:
+            self.send_json(e.status, {"status": "error", "error": str(e)})
+
+    def read_json(self):
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            raise ApiError(400, "Bad Content-Length.")
+        if length > MAX_BODY_BYTES:
+            raise ApiError(413, "Request body too large.")
+        try:
+            return json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            raise ApiError(400, "Request body must be JSON.")
+
+    def handle_nest(self, request):
+        server = self.server
+        settings = server.settings
+        if not isinstance(request, dict):
+            raise ApiError(400, "Request body must be a JSON object.")
+        try:
+            pads = request.get("pads", "")
+            if isinstance(pads, list):
+                pads = [{'size': float(p['size']), 'qty': int(p['qty'])} if isinstance(p, dict)
+                        else {'size': float(p[0]), 'qty': int(p[1])} for p in pads]
+            else:
+                pads = pad_engine.parse_pad_list(str(pads))
+            sheet = request.get("sheet") or f"{settings.sheet_width}x{settings.sheet_height}"
+            width_mm, height_mm = pad_engine.parse_sheet_size(sheet, settings.units)
+            materials = request.get("materials", ["felt", "card", "leather"])
+            if isinstance(materials, str):
+                materials = [m.strip() for m in materials.split(',') if m.strip()]
+            unknown = [m for m in materials if m not in pad_engine.MATERIALS]
+            if unknown:
+                raise ValueError(f"Unknown material(s): {', '.join(unknown)}.")
+            hole = request.get("hole", 0)
+            hole_dia = 0.0 if hole in (None, "none") else float(hole)
+            want_svg = bool(request.get("svg", False))
+        except (ValueError, TypeError, KeyError, IndexError) as e:
+            raise ApiError(400, f"Bad request: {e}")
+        if not pads:
+            raise ApiError(400, "No valid pad sizes entered.")
+
+        key = fingerprint(server.settings_key, pads, materials, width_mm, height_mm, hole_dia, want_svg)
+        future, cached = server.cache.get_or_submit(key, lambda: server.pool.submit(
+            nest_request, pads, materials, width_mm, height_mm, hole_dia, settings, want_svg))
+        try:
+            return future.result(timeout=NEST_TIMEOUT_S), cached
+        except FutureTimeoutError:
+            raise ApiError(504, "Nesting took too long.")
+        except Exception as e:
+            raise ApiError(500, f"{type(e).__name__}: {e}")
+
+
+class ApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, settings, workers=None, cache_size=256, verbose=False):
+        super().__init__(address, ApiHandler)
+        self.settings = pad_engine.SettingsSnapshot.coerce(settings)
+        self.settings_key = fingerprint(self.settings.to_dict())
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self.cache = ResultCache(cache_size)
+        self.verbose = verbose
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(cancel_futures=True)
@@ -0,0 +1,214 @@
+# batch_jobs.py
+# Runs a folder (or manifest) of pad list jobs over a process pool.
+#
+# A job is a pad list text file. Its sheet size, materials and hole can be set with
+# '#' lines at the top of the file, which the pad list parser skips:
+#   # sheet: 13.5x10in
+#   # materials: felt,leather
+#   # hole: 3.5
+#
+# A manifest is a CSV with a 'file' column and optional 'sheet', 'materials', 'hole'
+# and 'name' columns. Relative file paths are read from the manifest's folder.
+#
+# Each job writes into <out_root>/<name>. Names are made safe as a single folder
+# name, and run_batch gives jobs that share a name their own folders (-2, -3, ...).
+
+import csv
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pad_engine
+
+JOB_EXTENSIONS = (".txt",)
+
+SUMMARY_FIELDS = ["job", "status", "sheets", "pads", "utilisation", "laser_time_s", "elapsed_s", "output_dir", "error"]
+
+_DIRECTIVE = re.compile(r"^\s*#\s*(sheet|materials|hole|name)\s*:\s*(.+?)\s*$", re.IGNORECASE)
+
+
+def read_job_directives(text):
+    """Returns the '# key: value' directives from the top of a pad list."""
+    directives = {}
+    for line in text.splitlines():
+        match = _DIRECTIVE.match(line)
+        if match:
+            directives[match.group(1).lower()] = match.group(2)
+    return directives
+
+
+def find_jobs(jobs_dir):
+    """One job per pad list file in jobs_dir, in name order."""
+    jobs = []
+    for entry in sorted(os.listdir(jobs_dir)):
+        path = os.path.join(jobs_dir, entry)
+        if os.path.isfile(path) and entry.lower().endswith(JOB_EXTENSIONS):
+            jobs.append({"file": path})
+    return jobs
+
+
+def read_manifest(manifest_path):
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    jobs = []
+    with open(manifest_path, 'r', newline='') as f:
+        for row in csv.DictReader(f):
+            row = {k.strip().lower(): (v or "").strip() for k, v in row.items() if k}
+            if not row.get("file"):
+                continue
+            path = row["file"]
+            if not os.path.isabs(path):
+                path = os.path.join(base_dir, path)
+            job = {"file": path}
+            for key in ("sheet", "materials", "hole", "name"):
+                if row.get(key):
+                    job[key] = row[key]
+            jobs.append(job)
+    return jobs
+
+
+def parse_materials(text):
+    """'felt, leather' -> ['felt', 'leather']; raises ValueError for a material pad_engine doesn't know."""
+    materials = [m.strip().lower().replace(' ', '_') for m in text.split(',') if m.strip()]
+    unknown = [m for m in materials if m not in pad_engine.MATERIALS]
+    if unknown:
+        raise ValueError(f"Unknown material(s): {', '.join(unknown)} (choose from {', '.join(pad_engine.MATERIALS)}).")
+    return materials
+
+
+def parse_hole(text):
+    """'none', '0' or blank for no hole, otherwise a size in mm ('3.5' or '3.5mm')."""
+    text = str(text).strip().lower()
+    if text in ("none", "0", ""):
+        return 0
+    return float(text[:-2] if text.endswith("mm") else text)
+
+
+# --- Job names ---
+_UNSAFE_NAME = re.compile(r'[\\/:*?"<>|\x00-\x1f]+')
+
+
+def safe_job_name(name):
+    """A job name as one folder/file name: no path separators, no '..', never empty."""
+    name = _UNSAFE_NAME.sub("_", str(name)).strip().strip(".")
+    return name or "job"
+
+
+def job_name(job, text=None):
+    """
+    The job's output name: the manifest 'name', then a '# name:' directive in text,
+    then the file name. Always a single path component (see safe_job_name).
+    """
+    name = job.get("name")
+    if not name and text is not None:
+        name = read_job_directives(text).get("name")
+    return safe_job_name(name or os.path.splitext(os.path.basename(job["file"]))[0])
+
+
+def read_job_name(job):
+    """job_name, reading the job file for a '# name:' directive when it can."""
+    try:
+        with open(job["file"], 'r') as f:
+            text = f.read()
+    except (OSError, UnicodeDecodeError):
+        text = None # run_batch_job reports the problem
+    return job_name(job, text)
+
+
+def unique_job_names(jobs):
+    """
+    Copies of jobs, each with a 'name' no other job has ('order', 'order-2', 'order-3', ...),
+    so jobs that would share a name (or only differ in case) never write into the same folder.
+    """
+    taken = set()
+    named = []
+    for job in jobs:
+        base = read_job_name(job)
+        name, n = base, 2
+        while name.casefold() in taken:
+            name = f"{base}-{n}"
+            n += 1
+        taken.add(name.casefold())
+        named.append(dict(job, name=name))
+    return named
+
+
+def run_batch_job(job, settings, out_root, defaults):
+    """
+    Runs one job; never raises, so one bad job can't stop the batch.
+    Precedence for sheet/materials/hole: manifest row, then file directives, then defaults.
+    """
+    t_start = time.perf_counter()
+    name = job_name(job)
+    row = {field: "" for field in SUMMARY_FIELDS}
+    row["job"] = name
+    try:
+        with open(job["file"], 'r') as f:
+            text = f.read()
+        options = dict(defaults)
+        options.update(read_job_directives(text))
+        options.update({k: v for k, v in job.items() if k in ("sheet", "materials", "hole")})
+        name = row["job"] = job_name(job, text)
+
+        width_mm, height_mm = pad_engine.parse_sheet_size(options["sheet"], settings.units)
+        materials = options["materials"]
+        if isinstance(materials, str):
+            materials = parse_materials(materials)
+        hole_dia = parse_hole(options["hole"])
+        pads = pad_engine.parse_pad_list(text)
+
+        out_dir = os.path.join(out_root, name)
+        result = pad_engine.run_job(pads, materials, width_mm, height_mm, hole_dia, settings, out_dir, name)
+
+        row["status"] = result["status"]
+        row["pads"] = result["pads"]
+        row["error"] = result.get("error", "")
+        infos = list(result["materials"].values())
+        if infos:
+            row["utilisation"] = f"{sum(i['utilisation'] for i in infos) / len(infos):.3f}"
+        if result["status"] == "ok":
+            row["sheets"] = len(infos)
+            row["laser_time_s"] = f"{sum(i['estimate']['seconds'] for i in infos):.1f}"
+            row["output_dir"] = out_dir
+        else:
+            row["sheets"] = 0
+    except Exception as e:
+        row["status"] = "error"
+        row["error"] = f"{type(e).__name__}: {e}"
+    row["elapsed_s"] = f"{time.perf_counter() - t_start:.3f}"
+    return row
+
+
+def run_batch(jobs, out_root, settings, defaults, workers=None, summary_path=None, progress=None):
+    """
+    Fans the jobs out over a process pool and writes one summary CSV.
+    progress(row, done, total) is called in this process as each job finishes.
+    Returns the summary rows in job order.
+    """
+    settings = pad_engine.SettingsSnapshot.coerce(settings)
+    os.makedirs(out_root, exist_ok=True)
+    jobs = unique_job_names(jobs) # Named here, before any worker starts writing
+    rows = [None] * len(jobs)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_batch_job, job, settings, out_root, defaults): i for i, job in enumerate(jobs)}
+        done = 0
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                rows[i] = future.result()
+            except Exception as e:
+                # The worker itself died (e.g. killed); record it and keep going
+                rows[i] = {field: "" for field in SUMMARY_FIELDS}
+                rows[i].update(job=job_name(jobs[i]), status="error", error=f"{type(e).__name__}: {e}")
+            done += 1
+            if progress:
+                progress(rows[i], done, len(jobs))
+
+    if summary_path is None:
+        summary_path = os.path.join(out_root, "summary.csv")
+    with open(summary_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    return rows
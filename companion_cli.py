@@ -0,0 +1,326 @@
+# companion_cli.py
+# Headless command line for the Stohrer Sax Shop Companion.
+# Uses pad_engine only, so tkinter is never imported.
+#
+# Example:
+#   python -m companion_cli generate --pads jobs.txt --sheet 13.5x10in --materials felt,leather
+#   python -m companion_cli batch --jobs orders/ --out batch_out --workers 4
+#   python -m companion_cli watch --dir incoming/ --out generated
+#   python -m companion_cli serve --port 8765
+#   python -m companion_cli serials --in inventory.csv --out dated.csv
+#   python -m companion_cli export --kind keys --out key_heights.json
+#   python -m companion_cli tolerance --in measured.csv --reference "Factory Specs" --out report.csv
+
+import argparse
+import json
+import os
+import sys
+import time
+
+t_import = time.perf_counter()
+import pad_engine
+import batch_jobs
+import watch_folder
+IMPORT_MS = (time.perf_counter() - t_import) * 1000
+
+
+def materials_arg(text):
+    """--materials: batch_jobs.parse_materials, with its errors reported by argparse."""
+    try:
+        return batch_jobs.parse_materials(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def parse_hole(text, settings):
+    """--hole accepts 'none', a size in mm ('3.5' or '3.5mm'), or 'settings' for the saved option."""
+    if text.strip().lower() == "settings":
+        return pad_engine.get_hole_dia(settings["hole_option"], settings.get("custom_hole_size", "4.0"))
+    return batch_jobs.parse_hole(text)
+
+
+def read_pads(path):
+    if path == "-":
+        return sys.stdin.read()
+    with open(path, 'r') as f:
+        return f.read()
+
+
+def print_json(data):
+    json.dump(data, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+def cmd_generate(args):
+    t_start = time.perf_counter()
+    settings = pad_engine.load_settings(args.settings)
+
+    try:
+        if args.sheet:
+            width_mm, height_mm = pad_engine.parse_sheet_size(args.sheet, settings["units"])
+        else:
+            width_mm, height_mm = pad_engine.parse_sheet_size(f"{settings['sheet_width']}x{settings['sheet_height']}", settings["units"])
+        hole_dia = parse_hole(args.hole, settings)
+        snapshot = pad_engine.SettingsSnapshot.from_settings(settings)
+        pads = pad_engine.parse_pad_list(read_pads(args.pads))
+    except (ValueError, OSError) as e:
+        print_json({"status": "error", "error": str(e)})
+        return 2
+
+    base = args.name or os.path.splitext(os.path.basename(args.pads))[0]
+    if args.pads == "-" and not args.name:
+        base = "pad_job"
+
+    t_ready = time.perf_counter()
+    result = pad_engine.run_job(pads, args.materials, width_mm, height_mm, hole_dia, snapshot, args.out, base)
+    result["timing_ms"]["import"] = IMPORT_MS
+    result["timing_ms"]["setup"] = (t_ready - t_start) * 1000
+    result["timing_ms"]["command"] = (time.perf_counter() - t_start) * 1000
+
+    print_json(result)
+    return 0 if result["status"] == "ok" else 1
+
+
+def cmd_batch(args):
+    settings = pad_engine.load_settings(args.settings)
+    try:
+        if args.manifest:
+            jobs = batch_jobs.read_manifest(args.manifest)
+        else:
+            jobs = batch_jobs.find_jobs(args.jobs)
+        sheet = args.sheet or f"{settings['sheet_width']}x{settings['sheet_height']}"
+        pad_engine.parse_sheet_size(sheet, settings["units"])
+        hole_dia = parse_hole(args.hole, settings)
+        snapshot = pad_engine.SettingsSnapshot.from_settings(settings)
+    except (ValueError, OSError) as e:
+        print_json({"status": "error", "error": str(e)})
+        return 2
+
+    defaults = {"sheet": sheet, "materials": args.materials, "hole": str(hole_dia)}
+
+    def progress(row, done, total):
+        print(f"[{done}/{total}] {row['job']}: {row['status']}", file=sys.stderr)
+
+    t_start = time.perf_counter()
+    rows = batch_jobs.run_batch(jobs, args.out, snapshot, defaults, workers=args.workers,
+                                summary_path=args.summary, progress=progress)
+    failed = sum(1 for row in rows if row["status"] != "ok")
+    print_json({
+        "status": "ok" if not failed else "error",
+        "jobs": len(rows),
+        "failed": failed,
+        "summary": args.summary or os.path.join(args.out, "summary.csv"),
+        "seconds": round(time.perf_counter() - t_start, 3),
+    })
+    return 0 if not failed else 1
+
+
+def cmd_watch(args):
+    settings = pad_engine.load_settings(args.settings)
+    try:
+        sheet = args.sheet or f"{settings['sheet_width']}x{settings['sheet_height']}"
+        pad_engine.parse_sheet_size(sheet, settings["units"])
+        hole_dia = parse_hole(args.hole, settings)
+        snapshot = pad_engine.SettingsSnapshot.from_settings(settings)
+    except ValueError as e:
+        print_json({"status": "error", "error": str(e)})
+        return 2
+    if not os.path.isdir(args.dir):
+        print_json({"status": "error", "error": f"Folder not found: {args.dir}"})
+        return 2
+
+    defaults = {"sheet": sheet, "materials": args.materials, "hole": str(hole_dia)}
+    watcher = watch_folder.FolderWatcher(
+        args.dir, args.out, snapshot, defaults, done_dir=args.done, failed_dir=args.failed,
+        poll_interval=args.interval, settle_time=args.settle, max_queued=args.queue, workers=args.workers,
+        log=lambda message: print(f"{time.strftime('%H:%M:%S')} {message}", file=sys.stderr, flush=True))
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def cmd_serve(args):
+    import api_server  # Only needed for this command
+    settings = pad_engine.load_settings(args.settings)
+    server = api_server.ApiServer((args.host, args.port), settings, workers=args.workers,
+                                  cache_size=args.cache, verbose=args.verbose)
+    print(f"Serving on http://{args.host}:{server.server_address[1]} (Ctrl+C to stop)", file=sys.stderr, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+def cmd_serials(args):
+    import serial_batch  # Only needed for this command
+    from serial_lookup import SERIAL_WARNINGS
+
+    for warning in SERIAL_WARNINGS:
+        print(f"serial charts: {warning}", file=sys.stderr)
+
+    def progress(rows, chars, total):
+        percent = f" ({chars / total:.0%})" if total else ""
+        print(f"\r{rows} rows{percent}", end="", file=sys.stderr, flush=True)
+
+    t_start = time.perf_counter()
+    try:
+        counts = serial_batch.date_inventory_file(
+            args.input, args.out, maker_column=args.maker_column, serial_column=args.serial_column,
+            default_maker=args.maker, progress=None if args.quiet else progress)
+    except (ValueError, OSError) as e:
+        print_json({"status": "error", "error": str(e)})
+        return 2
+    if not args.quiet:
+        print(file=sys.stderr)
+    if args.out != "-":
+        print_json({"status": "ok", "rows": sum(counts.values()), "results": counts,
+                    "seconds": round(time.perf_counter() - t_start, 3)})
+    return 0
+
+
+def cmd_export(args):
+    import library_store  # Only needed for this command
+    settings = pad_engine.load_settings(args.settings)
+    try:
+        store = library_store.open_library_store(settings.get("storage_backend", "json"))
+        try:
+            store.export_json(args.kind, args.out)
+        finally:
+            store.close()
+    except Exception as e:
+        print_json({"status": "error", "error": str(e)})
+        return 2
+    print_json({"status": "ok", "kind": args.kind, "backend": store.backend, "file": args.out})
+    return 0
+
+
+def cmd_tolerance(args):
+    import library_store  # Only needed for this command
+    import tolerance_check
+    settings = pad_engine.load_settings(args.settings)
+    t_start = time.perf_counter()
+    try:
+        tolerance_mm = tolerance_check.parse_length(args.tolerance, args.units)
+        store = library_store.open_library_store(settings.get("storage_backend", "json"))
+        try:
+            key_data = store.load("keys")
+            for library in (args.reference, args.library):
+                if library is not None and library not in key_data:
+                    raise ValueError(f"No key height library named '{library}'.")
+            references = tolerance_check.reference_stats(key_data, args.reference, exclude=args.library)
+            checker = tolerance_check.ToleranceChecker(references, tolerance_mm, args.units)
+            if args.library is not None:
+                measured = ((args.library, name, preset) for name, preset in key_data[args.library].items())
+                counts = tolerance_check.check_sets_file(measured, args.out, checker, args.flagged_only)
+            else:
+                counts = tolerance_check.check_file(args.input, args.out, checker, args.units, args.flagged_only)
+        finally:
+            store.close()
+    except (ValueError, OSError) as e:
+        print_json({"status": "error", "error": str(e)})
+        return 2
+    if args.out != "-":
+        print_json({"status": "ok", "sets": sum(counts.values()), "results": counts,
+                    "tolerance_mm": round(tolerance_mm, 4), "seconds": round(time.perf_counter() - t_start, 3)})
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="companion_cli", description="Stohrer Sax Shop Companion (headless)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    gen = subparsers.add_parser("generate", help="Nest a pad list and write the SVGs")
+    gen.add_argument("--pads", required=True, help="Pad list file, one 'size x qty' per line ('-' for stdin)")
+    gen.add_argument("--sheet", help="Sheet size, e.g. 13.5x10in or 340x250mm (default: saved setting)")
+    gen.add_argument("--materials", type=materials_arg, default=["felt", "card", "leather"],
+                     help="Comma separated materials (default: felt,card,leather)")
+    gen.add_argument("--hole", default="settings", help="Center hole: none, a size in mm, or 'settings' (default)")
+    gen.add_argument("--out", default=".", help="Output folder (default: current folder)")
+    gen.add_argument("--name", help="Output filename base (default: pad list file name)")
+    gen.add_argument("--settings", default=pad_engine.SETTINGS_FILE, help="Settings file (default: app_settings.json)")
+    gen.set_defaults(func=cmd_generate)
+
+    batch = subparsers.add_parser("batch", help="Run a folder or manifest of pad lists over a worker pool")
+    source = batch.add_mutually_exclusive_group(required=True)
+    source.add_argument("--jobs", help="Folder of pad list .txt files (one job per file)")
+    source.add_argument("--manifest", help="CSV with file[,sheet,materials,hole,name] columns")
+    batch.add_argument("--sheet", help="Default sheet size for jobs that don't set one (default: saved setting)")
+    batch.add_argument("--materials", type=materials_arg, default=["felt", "card", "leather"],
+                       help="Default materials for jobs that don't set them (default: felt,card,leather)")
+    batch.add_argument("--hole", default="settings", help="Default center hole: none, a size in mm, or 'settings' (default)")
+    batch.add_argument("--out", default="batch_output", help="Output folder; each job gets a subfolder (default: batch_output)")
+    batch.add_argument("--summary", help="Summary CSV path (default: <out>/summary.csv)")
+    batch.add_argument("--workers", type=int, help="Worker processes (default: one per CPU)")
+    batch.add_argument("--settings", default=pad_engine.SETTINGS_FILE, help="Settings file (default: app_settings.json)")
+    batch.set_defaults(func=cmd_batch)
+
+    watch = subparsers.add_parser("watch", help="Watch a folder and generate SVGs for pad lists as they arrive")
+    watch.add_argument("--dir", required=True, help="Folder to watch for pad list .txt files")
+    watch.add_argument("--out", default="generated", help="Output folder; each job gets a subfolder (default: generated)")
+    watch.add_argument("--done", help="Where finished job files are moved (default: <dir>/done)")
+    watch.add_argument("--failed", help="Where failed job files are moved (default: <dir>/failed)")
+    watch.add_argument("--sheet", help="Default sheet size for jobs that don't set one (default: saved setting)")
+    watch.add_argument("--materials", type=materials_arg, default=["felt", "card", "leather"],
+                       help="Default materials for jobs that don't set them (default: felt,card,leather)")
+    watch.add_argument("--hole", default="settings", help="Default center hole: none, a size in mm, or 'settings' (default)")
+    watch.add_argument("--interval", type=float, default=1.0, help="Seconds between folder scans (default: 1)")
+    watch.add_argument("--settle", type=float, default=2.0, help="Seconds a file must stay unchanged before it is read (default: 2)")
+    watch.add_argument("--queue", type=int, default=8, help="Most jobs queued or running at once (default: 8)")
+    watch.add_argument("--workers", type=int, help="Worker processes (default: one per CPU)")
+    watch.add_argument("--settings", default=pad_engine.SETTINGS_FILE, help="Settings file (default: app_settings.json)")
+    watch.set_defaults(func=cmd_watch)
+
+    serve = subparsers.add_parser("serve", help="Run the local HTTP API for nesting and serial lookup")
+    serve.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    serve.add_argument("--port", type=int, default=8765, help="Port (default: 8765)")
+    serve.add_argument("--workers", type=int, help="Nesting worker processes (default: one per CPU)")
+    serve.add_argument("--cache", type=int, default=256, help="Nest results to keep cached (default: 256)")
+    serve.add_argument("--verbose", action="store_true", help="Log every request")
+    serve.add_argument("--settings", default=pad_engine.SETTINGS_FILE, help="Settings file (default: app_settings.json)")
+    serve.set_defaults(func=cmd_serve)
+
+    dating = subparsers.add_parser("serials", help="Date every (maker, serial) row of an inventory CSV")
+    dating.add_argument("--in", dest="input", required=True, help="Inventory CSV with a header row ('-' for stdin)")
+    dating.add_argument("--out", required=True, help="Output CSV: the input columns plus year, candidates, status ('-' for stdout)")
+    dating.add_argument("--maker-column", help="Maker column name (default: maker/manufacturer/make/brand)")
+    dating.add_argument("--serial-column", help="Serial column name (default: serial/serial number/sn)")
+    dating.add_argument("--maker", help="Maker for rows without one (or files with no maker column)")
+    dating.add_argument("--quiet", action="store_true", help="No progress readout")
+    dating.set_defaults(func=cmd_serials)
+
+    export = subparsers.add_parser("export", help="Write a whole preset library out as a JSON file for sharing")
+    export.add_argument("--kind", required=True, choices=["pads", "keys", "screws"],
+                        help="pads (pad presets), keys (key height sets) or screws (screw specs)")
+    export.add_argument("--out", required=True, help="JSON file to write")
+    export.add_argument("--settings", default=pad_engine.SETTINGS_FILE, help="Settings file (default: app_settings.json)")
+    export.set_defaults(func=cmd_export)
+
+    tolerance = subparsers.add_parser("tolerance", help="Check measured key heights against the reference set for each make/model/size")
+    measured = tolerance.add_mutually_exclusive_group(required=True)
+    measured.add_argument("--in", dest="input", help="CSV with make, model, size and one column per key (or a JSON key height library)")
+    measured.add_argument("--library", help="Key height library in the app holding the measured sets")
+    tolerance.add_argument("--reference", help="Key height library holding the reference sets (default: every other library)")
+    tolerance.add_argument("--tolerance", default="0.3mm",
+                           help="Largest allowed deviation, e.g. 0.3mm or 0.012in (default: 0.3mm)")
+    tolerance.add_argument("--units", choices=["mm", "in"], default="mm",
+                           help="Units of the report, and of CSV heights without a units column (default: mm)")
+    tolerance.add_argument("--out", required=True, help="Report CSV ('-' for stdout)")
+    tolerance.add_argument("--flagged-only", action="store_true", help="Only list sets with a key out of tolerance or no reference")
+    tolerance.add_argument("--settings", default=pad_engine.SETTINGS_FILE, help="Settings file (default: app_settings.json)")
+    tolerance.set_defaults(func=cmd_tolerance)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
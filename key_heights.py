@@ -0,0 +1,258 @@
+# key_heights.py
+# Key height values as numbers: mm/inch conversion and a column store of every set's
+# heights in mm for "closest sets" queries. No tkinter here.
+#
+# Heights are stored as text in each set, in the set's own 'units' ("mm" or "in").
+# HeightMatrix keeps one array('d') column per key in ALL_KEY_HEIGHT_FIELDS order, in
+# mm, with NaN for a blank or unreadable value, so a query works a column at a time.
+# HeightStats keeps count/mean/std/min/max per key for every (make, model, size).
+
+import heapq
+import math
+from array import array
+from collections import namedtuple
+
+MM_PER_INCH = 25.4
+
+KEY_HEIGHT_FIELDS = [
+    "B", "F", "Palm F", "Palm E", "Palm Eb", "Palm D",
+    "G", "D", "Low C", "Low B", "Low Bb"
+]
+
+NEAREST_COUNT = 10
+
+_NAN = float("nan")
+
+
+# --- Units ---
+def convert_height(value, old_unit, new_unit):
+    """A height converted between "mm" and "in"."""
+    if old_unit == new_unit:
+        return value
+    return value / MM_PER_INCH if new_unit == "in" else value * MM_PER_INCH
+
+def format_height(value, unit):
+    """Inches to 4 places, mm to 2 (what the Key Height tab shows)."""
+    return f"{value:.4f}" if unit == "in" else f"{value:.2f}"
+
+def convert_height_text(text, old_unit, new_unit):
+    """A height field's text in new_unit; raises ValueError if it isn't a number."""
+    return format_height(convert_height(float(text), old_unit, new_unit), new_unit)
+
+def height_mm(text, unit):
+    """A stored height in mm, or None for a blank or unreadable value."""
+    try:
+        value = float(text)
+    except (TypeError, ValueError):
+        return None
+    if math.isnan(value) or math.isinf(value):
+        return None
+    return convert_height(value, "in" if unit == "in" else "mm", "mm")
+
+def preset_heights_mm(preset):
+    """{key: mm} for the readable heights of one key height set."""
+    if not isinstance(preset, dict):
+        return {}
+    unit = preset.get("units", "mm")
+    heights = preset.get("heights") if isinstance(preset.get("heights"), dict) else {}
+    found = {}
+    for key in KEY_HEIGHT_FIELDS:
+        value = height_mm(heights.get(key, ""), unit)
+        if value is not None:
+            found[key] = value
+    return found
+
+
+# --- Nearest Sets ---
+class HeightMatrix:
+    """
+    Every set's heights in mm, one column per key. Rows of deleted sets are blanked
+    and reused, so updates never rebuild the columns.
+    """
+
+    def __init__(self, presets=()):
+        self.columns = {key: array('d') for key in KEY_HEIGHT_FIELDS}
+        self.keys = [] # row -> (library, name), or None for a free row
+        self.rows = {} # (library, name) -> row
+        self.free = []
+        for library, name, preset in presets:
+            self.update(library, name, preset)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def update(self, library, name, preset):
+        key = (library, name)
+        row = self.rows.get(key)
+        if row is None:
+            if self.free:
+                row = self.free.pop()
+            else:
+                row = len(self.keys)
+                self.keys.append(None)
+                for column in self.columns.values():
+                    column.append(_NAN)
+            self.rows[key] = row
+            self.keys[row] = key
+        heights = preset_heights_mm(preset)
+        for field, column in self.columns.items():
+            column[row] = heights.get(field, _NAN)
+
+    def remove(self, library, name):
+        row = self.rows.pop((library, name), None)
+        if row is None:
+            return
+        self.keys[row] = None
+        for column in self.columns.values():
+            column[row] = _NAN
+        self.free.append(row)
+
+    def remove_library(self, library):
+        for key in [key for key in self.rows if key[0] == library]:
+            self.remove(*key)
+
+    def nearest(self, measured, k=NEAREST_COUNT, min_shared=None):
+        """
+        The k sets closest to measured ({key: mm}), as [(rms_mm, shared, library, name), ...].
+        Distance is the RMS difference over the keys both have. A set needs at least
+        min_shared of the measured keys (default: half of them, at least one).
+        """
+        measured = {key: value for key, value in measured.items() if key in self.columns}
+        if not measured or not self.rows:
+            return []
+        if min_shared is None:
+            min_shared = max(1, (len(measured) + 1) // 2)
+
+        n = len(self.keys)
+        sums = [0.0] * n
+        counts = [0] * n
+        for key, target in measured.items():
+            column = self.columns[key]
+            # NaN (a key the set doesn't have) fails c == c and adds nothing
+            sums = [s + (c - target) * (c - target) if c == c else s for s, c in zip(sums, column)]
+            counts = [m + 1 if c == c else m for m, c in zip(counts, column)]
+
+        found = ((math.sqrt(s / m), m, row) for row, (s, m) in enumerate(zip(sums, counts)) if m >= min_shared)
+        best = heapq.nsmallest(k, found, key=lambda item: (item[0], -item[1]))
+        return [(round(rms, 3), shared, *self.keys[row]) for rms, shared, row in best]
+
+
+# --- Statistics per Horn ---
+KeyStats = namedtuple('KeyStats', ['count', 'mean', 'std', 'min', 'max'])
+
+def horn_key(preset):
+    """(make, model, size) folded for grouping, so 'Selmer ' and 'selmer' land together."""
+    if not isinstance(preset, dict):
+        return ("", "", "")
+    return tuple(" ".join(str(preset.get(field, "")).split()).casefold() for field in ("make", "model", "size"))
+
+
+class RunningStats:
+    """Welford's running mean and variance, with remove() so a deleted value can be taken back out."""
+    __slots__ = ('count', 'mean', 'm2')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def remove(self, value):
+        if self.count <= 1:
+            self.count, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        delta = value - self.mean
+        self.mean -= delta / (self.count - 1)
+        self.m2 = max(0.0, self.m2 - delta * (value - self.mean))
+        self.count -= 1
+
+    def std(self):
+        """Sample standard deviation (0 for fewer than two values)."""
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+
+class HornStats:
+    """Running stats for every key of one (make, model, size)."""
+    __slots__ = ('label', 'members', 'running', 'low', 'high')
+
+    def __init__(self, label):
+        self.label = label # (make, model, size) as first spelled
+        self.members = {} # (library, name) -> {key: mm}
+        self.running = {key: RunningStats() for key in KEY_HEIGHT_FIELDS}
+        self.low = {}
+        self.high = {}
+
+    def add(self, member, heights):
+        self.members[member] = heights
+        for key, value in heights.items():
+            self.running[key].add(value)
+            if key not in self.low or value < self.low[key]:
+                self.low[key] = value
+            if key not in self.high or value > self.high[key]:
+                self.high[key] = value
+
+    def remove(self, member):
+        heights = self.members.pop(member)
+        for key, value in heights.items():
+            self.running[key].remove(value)
+            # Min and max can't be run backwards: look at this horn's sets again only if the extreme left
+            if value <= self.low[key] or value >= self.high[key]:
+                values = [h[key] for h in self.members.values() if key in h]
+                if values:
+                    self.low[key], self.high[key] = min(values), max(values)
+                else:
+                    del self.low[key], self.high[key]
+
+    def stats(self):
+        """{key: KeyStats} in mm for the keys with at least one value."""
+        return {key: KeyStats(r.count, r.mean, r.std(), self.low[key], self.high[key])
+                for key, r in self.running.items() if r.count}
+
+
+class HeightStats:
+    """Key height statistics for every (make, model, size), kept up to date set by set."""
+
+    def __init__(self, presets=()):
+        self.horns = {} # horn_key -> HornStats
+        self.member_horn = {} # (library, name) -> horn_key
+        for library, name, preset in presets:
+            self.update(library, name, preset)
+
+    def update(self, library, name, preset):
+        self.remove(library, name)
+        key = horn_key(preset)
+        horn = self.horns.get(key)
+        if horn is None:
+            label = tuple(" ".join(str(preset.get(field, "")).split()) for field in ("make", "model", "size")) if isinstance(preset, dict) else key
+            horn = self.horns[key] = HornStats(label)
+        horn.add((library, name), preset_heights_mm(preset))
+        self.member_horn[(library, name)] = key
+
+    def remove(self, library, name):
+        key = self.member_horn.pop((library, name), None)
+        if key is None:
+            return
+        horn = self.horns[key]
+        horn.remove((library, name))
+        if not horn.members:
+            del self.horns[key]
+
+    def remove_library(self, library):
+        for member in [member for member in self.member_horn if member[0] == library]:
+            self.remove(*member)
+
+    def horn_labels(self):
+        """[(horn_key, (make, model, size), set count), ...] sorted by label."""
+        return sorted(((key, horn.label, len(horn.members)) for key, horn in self.horns.items()),
+                      key=lambda item: tuple(part.casefold() for part in item[1]))
+
+    def stats_for(self, preset_or_key):
+        """{key: KeyStats} for a horn, given its horn_key or any set of that horn."""
+        key = preset_or_key if isinstance(preset_or_key, tuple) else horn_key(preset_or_key)
+        horn = self.horns.get(key)
+        return horn.stats() if horn else {}
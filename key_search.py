@@ -0,0 +1,122 @@
+# key_search.py
+# Full-text search over the key height library (make, model, size, serial and notes).
+# No tkinter here; the Key Height Library tab calls it as you type.
+#
+# KeySetIndex is an inverted index: word -> {(library, name): weight}. It is built once
+# from the whole library and then kept up to date from the same (library, name) change
+# lists the library store is given (library_store.apply_change_list), so it never
+# rescans the library after that.
+
+import bisect
+import heapq
+import math
+import re
+
+# A word in make or model counts for more than one buried in the notes
+FIELD_WEIGHTS = {"make": 3.0, "model": 3.0, "size": 2.0, "serial": 2.0, "notes": 1.0}
+
+# A word only matched as the start of a longer word (still being typed) scores this much
+PREFIX_FACTOR = 0.5
+
+MAX_RESULTS = 50
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return _WORD.findall(str(text).casefold())
+
+
+def key_set_words(preset):
+    """{word: weight} for one key height set."""
+    words = {}
+    if not isinstance(preset, dict):
+        return words
+    for field, weight in FIELD_WEIGHTS.items():
+        for word in tokenize(preset.get(field, "")):
+            words[word] = words.get(word, 0.0) + weight
+    return words
+
+
+class KeySetIndex:
+    """Inverted index over key height sets, keyed by (library, name)."""
+
+    def __init__(self, presets=()):
+        self.postings = {} # word -> {(library, name): weight}
+        self.doc_words = {} # (library, name) -> {word: weight}, for removing a set
+        self.vocabulary = [] # every indexed word, sorted, for prefix matches
+        for library, name, preset in presets:
+            self.update(library, name, preset)
+
+    def __len__(self):
+        return len(self.doc_words)
+
+    # --- Updates ---
+    def update(self, library, name, preset):
+        key = (library, name)
+        self.remove(library, name)
+        words = key_set_words(preset)
+        self.doc_words[key] = words
+        for word, weight in words.items():
+            posting = self.postings.get(word)
+            if posting is None:
+                posting = self.postings[word] = {}
+                bisect.insort(self.vocabulary, word)
+            posting[key] = weight
+
+    def remove(self, library, name):
+        words = self.doc_words.pop((library, name), None)
+        for word in words or ():
+            posting = self.postings[word]
+            del posting[(library, name)]
+            if not posting:
+                del self.postings[word]
+                del self.vocabulary[bisect.bisect_left(self.vocabulary, word)]
+
+    def remove_library(self, library):
+        for key in [key for key in self.doc_words if key[0] == library]:
+            self.remove(*key)
+
+    # --- Search ---
+    def _prefix_words(self, prefix):
+        i = bisect.bisect_left(self.vocabulary, prefix)
+        while i < len(self.vocabulary) and self.vocabulary[i].startswith(prefix):
+            yield self.vocabulary[i]
+            i += 1
+
+    def _word_scores(self, word, prefix):
+        """{key: score} for one query word; the last word also matches longer words it starts."""
+        total = len(self.doc_words)
+        scores = {}
+        matches = list(self._prefix_words(word)) if prefix else ([word] if word in self.postings else [])
+        for match in matches:
+            posting = self.postings[match]
+            scale = math.log(1 + total / len(posting)) * (1.0 if match == word else PREFIX_FACTOR)
+            if not scores:
+                scores = {key: weight * scale for key, weight in posting.items()}
+                continue
+            for key, weight in posting.items():
+                score = weight * scale
+                if score > scores.get(key, 0.0):
+                    scores[key] = score
+        return scores
+
+    def search(self, query, limit=MAX_RESULTS):
+        """[(score, library, name), ...] for sets matching every word of query, best first."""
+        words = tokenize(query)
+        if not words:
+            return []
+        # Rarest words first, so the candidate set shrinks as fast as possible
+        last = words[-1]
+        per_word = [self._word_scores(word, prefix=(word == last)) for word in dict.fromkeys(words)]
+        per_word.sort(key=len)
+        if not per_word[0]:
+            return []
+
+        totals = per_word[0]
+        for scores in per_word[1:]:
+            totals = {key: totals[key] + scores[key] for key in totals.keys() & scores.keys()}
+            if not totals:
+                return []
+        best = heapq.nsmallest(limit, totals.items(), key=lambda item: (-item[1], item[0]))
+        return [(round(score, 3), library, name) for (library, name), score in best]
@@ -0,0 +1,607 @@
+# library_store.py
+# Storage for the pad preset, key height and screw spec libraries.
+# No tkinter here; main.py shows any errors.
+#
+# Every library kind is two levels deep: {library: {name: preset}}. For screw specs
+# the library is the maker and the name is the model.
+#
+# JsonLibraryStore keeps the original one JSON file per kind, with saves appended to
+# a journal beside it (see below) and folded back into the file in the background.
+# SqliteLibraryStore keeps all three in one database with a row per preset, so a save
+# only writes the presets that changed. Each JSON file is copied in the first time its
+# kind is opened, and export_json writes the JSON format back out for sharing.
+# Its load() returns a LazyLibrary, so startup only reads library and preset names.
+#
+# Pick the backend with the "storage_backend" setting ("json" or "sqlite").
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from collections.abc import Mapping, MutableMapping
+
+LIBRARY_FILES = {
+    "pads": "pad_presets.json",
+    "keys": "key_height_library.json",
+    "screws": "screw_specs.json",
+}
+LIBRARY_DB_FILE = "companion_library.db"
+STORAGE_BACKENDS = ("json", "sqlite")
+
+# A JSON library's journal is folded into a new snapshot once it grows past this
+JOURNAL_COMPACT_BYTES = 256 * 1024
+
+# Old flat files ({name: preset}) are moved into this library on load
+LEGACY_LIBRARY_NAME = "My Presets"
+
+# Preset bodies kept in memory per kind by LazyLibrary
+BODY_CACHE_SIZE = 256
+
+
+# --- JSON Files ---
+def read_json_library(path):
+    """
+    ({library: {name: preset}}, upgraded) from a JSON library file. A missing or
+    unreadable file gives {}. upgraded is True when an old flat file was wrapped
+    into LEGACY_LIBRARY_NAME.
+    """
+    data = {}
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                data = {}
+        except (json.JSONDecodeError, TypeError, UnicodeDecodeError):
+            data = {}
+
+    if data and not any(isinstance(v, dict) for v in data.values()):
+        return {LEGACY_LIBRARY_NAME: data}, True
+    return data, False
+
+def write_json_library(data, path):
+    """Writes to a temp file and renames it over path, so path is always either the old or the new file."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+# --- Journal ---
+# Each save appends one line: {"ops": [[library, name, preset], ...]}. A name of None
+# is a whole library; a preset of None (no third item) is a delete. A save is applied
+# in full or not at all: a line cut short by a crash is dropped on the next load, and a
+# save that fails part-way is cut back off the file (or, failing that, skipped on load).
+
+def journal_record(data, changed):
+    ops = []
+    for library, name in changed:
+        presets = data.get(library)
+        if name is None:
+            ops.append([library, None] if presets is None else [library, None, {}])
+        elif presets is not None and name in presets:
+            ops.append([library, name, presets[name]])
+        else:
+            ops.append([library, name])
+    return json.dumps({"ops": ops}) + "\n"
+
+def apply_ops(data, ops):
+    for op in ops:
+        library, name = op[0], op[1]
+        if name is None:
+            if len(op) > 2:
+                data.setdefault(library, {})
+            else:
+                data.pop(library, None)
+        elif len(op) > 2:
+            data.setdefault(library, {})[name] = op[2]
+        elif library in data:
+            data[library].pop(name, None)
+
+def replay_journal(data, path, repair=False):
+    """
+    Applies a journal file to data. A whole line that doesn't parse is a failed save
+    and is skipped; a last line cut short stops the replay, and with repair=True the
+    file is cut back to the end of the last whole line so later appends start clean.
+    """
+    try:
+        f = open(path, 'rb+' if repair else 'rb')
+    except FileNotFoundError:
+        return
+    with f:
+        good_end = 0
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                apply_ops(data, json.loads(line)["ops"])
+            except (ValueError, KeyError, TypeError, IndexError):
+                pass
+            good_end += len(line)
+        else:
+            return
+        if repair:
+            f.truncate(good_end)
+
+
+class JsonLibraryStore:
+    """
+    One JSON snapshot file per kind plus an append-only journal next to it.
+    A save appends one journal record instead of rewriting the file. Once a journal
+    passes compact_bytes, it is set aside and a background thread folds it into a new
+    snapshot. A crash at any point loses at most the save that was being written.
+    """
+    backend = "json"
+
+    def __init__(self, files=LIBRARY_FILES, compact_bytes=JOURNAL_COMPACT_BYTES):
+        self.files = dict(files)
+        self.compact_bytes = compact_bytes
+        self.upgraded = set() # kinds whose old flat file was moved into LEGACY_LIBRARY_NAME
+        self._locks = {kind: threading.Lock() for kind in self.files}
+        self._compactions = {}
+        self._torn = set() # kinds whose journal ends in a failed record that couldn't be cut off
+
+    def journal_path(self, kind):
+        return self.files[kind] + ".journal"
+
+    def compacting_path(self, kind):
+        """The journal set aside while it is folded into the snapshot."""
+        return self.files[kind] + ".journal.1"
+
+    def load(self, kind):
+        with self._locks[kind]:
+            data, upgraded = read_json_library(self.files[kind])
+            if upgraded:
+                self.upgraded.add(kind)
+                try:
+                    write_json_library(data, self.files[kind])
+                except OSError:
+                    pass # Kept in memory; the next snapshot writes the new layout
+            replay_journal(data, self.compacting_path(kind))
+            replay_journal(data, self.journal_path(kind), repair=True)
+        self._maybe_compact(kind)
+        return data
+
+    def save(self, kind, data, changed=None):
+        """Appends the changed (library, name) keys to the journal; changed=None writes a new snapshot."""
+        if changed is None:
+            self._wait(kind)
+            with self._locks[kind]:
+                write_json_library(data, self.files[kind])
+                for path in (self.compacting_path(kind), self.journal_path(kind)):
+                    if os.path.exists(path):
+                        os.remove(path)
+            return
+
+        record = journal_record(data, changed).encode('utf-8')
+        if kind in self._torn:
+            record = b"\n" + record # Ends the failed record's line, so replay skips just that line
+        # Unbuffered, so nothing of a failed write is left waiting to be flushed after the truncate
+        with open(self.journal_path(kind), 'ab', buffering=0) as f:
+            start = f.tell()
+            try:
+                view = memoryview(record)
+                while view:
+                    view = view[f.write(view):]
+                os.fsync(f.fileno())
+            except BaseException:
+                try:
+                    f.truncate(start)
+                except OSError:
+                    self._torn.add(kind)
+                raise
+        self._torn.discard(kind)
+        self._maybe_compact(kind)
+
+    def export_json(self, kind, path):
+        write_json_library(self.load(kind), path)
+
+    def close(self):
+        for kind in self.files:
+            self._wait(kind)
+
+    # --- Compaction ---
+    def _maybe_compact(self, kind):
+        thread = self._compactions.get(kind)
+        if thread is not None and thread.is_alive():
+            return
+        if not os.path.exists(self.compacting_path(kind)):
+            try:
+                if os.path.getsize(self.journal_path(kind)) < self.compact_bytes:
+                    return
+            except OSError:
+                return
+            os.replace(self.journal_path(kind), self.compacting_path(kind))
+        thread = threading.Thread(target=self._compact, args=(kind,), daemon=True)
+        self._compactions[kind] = thread
+        thread.start()
+
+    def _compact(self, kind):
+        """Snapshot + set-aside journal -> new snapshot. Replaying the same journal twice is harmless."""
+        try:
+            data, _ = read_json_library(self.files[kind])
+            replay_journal(data, self.compacting_path(kind))
+            tmp_path = self.files[kind] + ".compact.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            with self._locks[kind]:
+                os.replace(tmp_path, self.files[kind])
+                os.remove(self.compacting_path(kind))
+        except OSError:
+            pass # The set-aside journal stays and is replayed on load and compacted next time
+
+    def _wait(self, kind):
+        thread = self._compactions.get(kind)
+        if thread is not None:
+            thread.join()
+
+
+# --- Lazy Loading ---
+# What the index knows about a preset without loading it: for key height sets, the
+# horn it is for (blank for the other kinds).
+PresetInfo = namedtuple('PresetInfo', ['make', 'model', 'size'])
+NO_INFO = PresetInfo("", "", "")
+
+def preset_info(kind, preset):
+    if kind != "keys" or not isinstance(preset, dict):
+        return NO_INFO
+    return PresetInfo(*(str(preset.get(field, "")) for field in PresetInfo._fields))
+
+
+class LazyLibrary(MutableMapping):
+    """
+    {library: {name: preset}} for one kind where only the index (library names, preset
+    names and each key set's make/model/size) is in memory. A preset body is read from the store the first
+    time it is asked for and kept in an LRU cache of cache_size bodies. Bodies set by
+    the app stay in memory until the store has saved them.
+    """
+
+    def __init__(self, store, kind, index, cache_size=BODY_CACHE_SIZE):
+        self.store = store
+        self.kind = kind
+        self.index = index # {library: {name: PresetInfo}}
+        self.cache_size = cache_size
+        self.cache = OrderedDict() # (library, name) -> body
+        self.unsaved = {}
+
+    def __getitem__(self, library):
+        if library not in self.index:
+            raise KeyError(library)
+        return LazyPresets(self, library)
+
+    def __setitem__(self, library, presets):
+        self._forget(library)
+        self.index[library] = {}
+        for name, preset in presets.items():
+            self.put(library, name, preset)
+
+    def __delitem__(self, library):
+        del self.index[library]
+        self._forget(library)
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, library):
+        return library in self.index
+
+    # --- Presets ---
+    def body(self, library, name):
+        key = (library, name)
+        if key in self.unsaved:
+            return self.unsaved[key]
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        preset = self.store.load_preset(self.kind, library, name)
+        self._cache(key, preset)
+        return preset
+
+    def put(self, library, name, preset):
+        self.index[library][name] = preset_info(self.kind, preset)
+        self.cache.pop((library, name), None)
+        self.unsaved[(library, name)] = preset
+
+    def remove(self, library, name):
+        del self.index[library][name]
+        self.cache.pop((library, name), None)
+        self.unsaved.pop((library, name), None)
+
+    def iter_presets(self):
+        """(library, name, preset) for every preset, streamed from the store without filling the cache."""
+        seen = set()
+        for library, name, preset in self.store.iter_presets(self.kind):
+            if name in self.index.get(library, ()):
+                seen.add((library, name))
+                yield library, name, self.unsaved.get((library, name), preset)
+        for (library, name), preset in list(self.unsaved.items()):
+            if (library, name) not in seen:
+                yield library, name, preset
+
+    def mark_saved(self, changed=None):
+        """Moves saved bodies from 'unsaved' into the cache, where they can be evicted."""
+        keys = list(self.unsaved) if changed is None else changed
+        for key in keys:
+            preset = self.unsaved.pop(key, None)
+            if preset is not None:
+                self._cache(key, preset)
+
+    def _cache(self, key, preset):
+        self.cache[key] = preset
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def _forget(self, library):
+        for bodies in (self.cache, self.unsaved):
+            for key in [key for key in bodies if key[0] == library]:
+                del bodies[key]
+
+
+class LazyPresets(MutableMapping):
+    """One library of a LazyLibrary: names come from the index, bodies load on access."""
+    __slots__ = ('parent', 'library')
+
+    def __init__(self, parent, library):
+        self.parent = parent
+        self.library = library
+
+    def __getitem__(self, name):
+        if name not in self.parent.index[self.library]:
+            raise KeyError(name)
+        return self.parent.body(self.library, name)
+
+    def __setitem__(self, name, preset):
+        self.parent.put(self.library, name, preset)
+
+    def __delitem__(self, name):
+        if name not in self.parent.index[self.library]:
+            raise KeyError(name)
+        self.parent.remove(self.library, name)
+
+    def __iter__(self):
+        return iter(self.parent.index[self.library])
+
+    def __len__(self):
+        return len(self.parent.index[self.library])
+
+    def __contains__(self, name):
+        return name in self.parent.index[self.library]
+
+
+# --- SQLite ---
+# kind -> (table, library column, name column)
+SQL_TABLES = {
+    "pads": ("pad_presets", "library", "name"),
+    "keys": ("key_sets", "library", "name"),
+    "screws": ("screw_specs", "maker", "model"),
+}
+
+# Key set fields copied into their own indexed columns; the full set is kept in 'body'
+KEY_SET_COLUMNS = ("make", "model", "size", "serial", "units")
+
+SQL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS libraries (
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (kind, name)
+);
+CREATE TABLE IF NOT EXISTS pad_presets (
+    library TEXT NOT NULL,
+    name TEXT NOT NULL,
+    body TEXT NOT NULL,
+    PRIMARY KEY (library, name)
+);
+CREATE TABLE IF NOT EXISTS key_sets (
+    library TEXT NOT NULL,
+    name TEXT NOT NULL,
+    make TEXT,
+    model TEXT,
+    size TEXT,
+    serial TEXT,
+    units TEXT,
+    body TEXT NOT NULL,
+    PRIMARY KEY (library, name)
+);
+CREATE INDEX IF NOT EXISTS key_sets_horn ON key_sets (make, model, size);
+CREATE INDEX IF NOT EXISTS key_sets_names ON key_sets (library, name, make, model, size);
+CREATE TABLE IF NOT EXISTS screw_specs (
+    maker TEXT NOT NULL,
+    model TEXT NOT NULL,
+    body TEXT NOT NULL,
+    PRIMARY KEY (maker, model)
+);
+CREATE TABLE IF NOT EXISTS migrations (
+    kind TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    presets INTEGER NOT NULL,
+    migrated_at TEXT NOT NULL
+);
+"""
+
+
+class SqliteLibraryStore:
+    """
+    All libraries in one SQLite database. save() upserts or deletes only the
+    (library, name) rows it is told about.
+    """
+    backend = "sqlite"
+
+    def __init__(self, db_path=LIBRARY_DB_FILE, files=LIBRARY_FILES):
+        self.db_path = db_path
+        self.files = dict(files)
+        self.upgraded = set()
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SQL_SCHEMA)
+
+    def migrate(self, kind):
+        """Copies the kind's JSON file in, once. The JSON file is left in place as a backup."""
+        if self.conn.execute("SELECT 1 FROM migrations WHERE kind = ?", (kind,)).fetchone():
+            return
+        json_store = JsonLibraryStore(self.files)
+        data = json_store.load(kind) # Snapshot plus any journal records not folded in yet
+        json_store.close()
+        self.upgraded.update(json_store.upgraded)
+        with self.conn:
+            self._replace_all(kind, data)
+            self.conn.execute(
+                "INSERT INTO migrations (kind, source, presets, migrated_at) VALUES (?, ?, ?, ?)",
+                (kind, self.files[kind], sum(len(v) for v in data.values() if isinstance(v, dict)),
+                 time.strftime("%Y-%m-%d %H:%M:%S")))
+
+    def load(self, kind):
+        """A LazyLibrary: only names and PresetInfo are read now, bodies on first access."""
+        self.migrate(kind)
+        table, library_col, name_col = SQL_TABLES[kind]
+        index = {name: {} for (name,) in self.conn.execute(
+            "SELECT name FROM libraries WHERE kind = ? ORDER BY rowid", (kind,))}
+        # Both queries are answered from an index, without touching the preset bodies
+        if kind == "keys":
+            shared = {} # Most sets repeat a few horns, so equal PresetInfos are shared
+            for library, name, *horn in self.conn.execute(
+                    "SELECT library, name, make, model, size FROM key_sets"):
+                horn = tuple(horn)
+                info = shared.get(horn)
+                if info is None:
+                    info = shared[horn] = PresetInfo(*horn)
+                index.setdefault(library, {})[name] = info
+        else:
+            for library, name in self.conn.execute(f"SELECT {library_col}, {name_col} FROM {table}"):
+                index.setdefault(library, {})[name] = NO_INFO
+        return LazyLibrary(self, kind, index)
+
+    def load_all(self, kind):
+        """Every preset body as plain dicts."""
+        self.migrate(kind)
+        table, library_col, name_col = SQL_TABLES[kind]
+        data = {name: {} for (name,) in self.conn.execute(
+            "SELECT name FROM libraries WHERE kind = ? ORDER BY rowid", (kind,))}
+        for library, name, body in self.conn.execute(
+                f"SELECT {library_col}, {name_col}, body FROM {table} ORDER BY rowid"):
+            data.setdefault(library, {})[name] = json.loads(body)
+        return data
+
+    def iter_presets(self, kind):
+        table, library_col, name_col = SQL_TABLES[kind]
+        for library, name, body in self.conn.execute(f"SELECT {library_col}, {name_col}, body FROM {table}"):
+            yield library, name, json.loads(body)
+
+    def load_preset(self, kind, library, name):
+        table, library_col, name_col = SQL_TABLES[kind]
+        row = self.conn.execute(
+            f"SELECT body FROM {table} WHERE {library_col} = ? AND {name_col} = ?", (library, name)).fetchone()
+        if row is None:
+            raise KeyError((library, name))
+        return json.loads(row[0])
+
+    def save(self, kind, data, changed=None):
+        """
+        Writes what changed in data to the database in one transaction.
+        changed lists (library, name) keys: a key still in data is inserted or updated,
+        a key no longer in data is deleted. (library, None) adds or removes a whole
+        library. changed=None replaces the whole kind.
+        """
+        self.migrate(kind)
+        with self.conn:
+            if changed is None:
+                self._replace_all(kind, data)
+            for library, name in changed or ():
+                presets = data.get(library)
+                if name is None:
+                    if presets is None:
+                        self._delete_library(kind, library)
+                    else:
+                        self._add_library(kind, library)
+                elif presets is not None and name in presets:
+                    self._add_library(kind, library)
+                    self._upsert(kind, library, name, presets[name])
+                else:
+                    self._delete(kind, library, name)
+        if isinstance(data, LazyLibrary):
+            data.mark_saved(changed)
+
+    def export_json(self, kind, path):
+        write_json_library(self.load_all(kind), path)
+
+    def close(self):
+        self.conn.close()
+
+    # --- Rows ---
+    def _replace_all(self, kind, data):
+        table = SQL_TABLES[kind][0]
+        # Read every body first: a LazyLibrary loads them from the rows deleted below
+        data = {library: dict(presets) for library, presets in data.items() if isinstance(presets, Mapping)}
+        self.conn.execute("DELETE FROM libraries WHERE kind = ?", (kind,))
+        self.conn.execute(f"DELETE FROM {table}")
+        for library, presets in data.items():
+            self._add_library(kind, library)
+            for name, preset in presets.items():
+                self._upsert(kind, library, name, preset)
+
+    def _add_library(self, kind, library):
+        self.conn.execute("INSERT OR IGNORE INTO libraries (kind, name) VALUES (?, ?)", (kind, library))
+
+    def _delete_library(self, kind, library):
+        table, library_col, _ = SQL_TABLES[kind]
+        self.conn.execute("DELETE FROM libraries WHERE kind = ? AND name = ?", (kind, library))
+        self.conn.execute(f"DELETE FROM {table} WHERE {library_col} = ?", (library,))
+
+    def _upsert(self, kind, library, name, preset):
+        table, library_col, name_col = SQL_TABLES[kind]
+        columns = [library_col, name_col, "body"]
+        values = [library, name, json.dumps(preset)]
+        if kind == "keys":
+            fields = preset if isinstance(preset, dict) else {}
+            columns.extend(KEY_SET_COLUMNS)
+            values.extend(str(fields.get(column, "")) for column in KEY_SET_COLUMNS)
+        self.conn.execute(
+            f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            values)
+
+    def _delete(self, kind, library, name):
+        table, library_col, name_col = SQL_TABLES[kind]
+        self.conn.execute(f"DELETE FROM {table} WHERE {library_col} = ? AND {name_col} = ?", (library, name))
+
+
+def iter_presets(data):
+    """(library, name, preset) for every preset in a loaded library, lazy or not."""
+    if isinstance(data, LazyLibrary):
+        yield from data.iter_presets()
+        return
+    for library, presets in data.items():
+        for name, preset in presets.items():
+            yield library, name, preset
+
+
+def open_library_store(backend="json"):
+    """The store for the "storage_backend" setting."""
+    if backend == "sqlite":
+        return SqliteLibraryStore()
+    return JsonLibraryStore()
+
+
+def apply_change_list(index, data, changed):
+    """
+    Replays a save's (library, name) change list on an index built from data (the
+    key search index, height matrix and stats, the screw index). The index needs
+    update(library, name, preset), remove(library, name) and remove_library(library).
+    """
+    for library, name in changed:
+        presets = data.get(library)
+        if name is None:
+            if presets is None:
+                index.remove_library(library)
+        elif presets is not None and name in presets:
+            index.update(library, name, presets[name])
+        else:
+            index.remove(library, name)
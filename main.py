@@ -3,16 +3,30 @@ from tkinter import filedialog, messagebox, ttk, simpledialog
 import os
 import json
 import random
-import math
-import svgwrite
 import re 
-
-# --- Import Serial Data ---
-try:
-    import serials
-    SERIAL_DATA = serials.SERIAL_DATA
-except ImportError:
-    SERIAL_DATA = {} # Fallback if file is missing
+import threading
+import queue
+from collections.abc import Mapping
+import stroke_font
+from pad_engine import (
+    DEFAULT_SETTINGS, SETTINGS_FILE, MATERIALS, SettingsError, SettingsSnapshot,
+    load_settings, check_for_oversized_engravings,
+    is_dart_pad, get_star_radii, star_points, should_have_center_hole, get_pad_engraving,
+    nest_discs, count_discs, build_svg, sheet_size_to_mm, get_hole_dia, parse_pad_list,
+    estimate_job, format_duration, format_job_estimate, write_job_report, GenerationCancelled,
+)
+
+from serial_lookup import (
+    SERIAL_DATA, SERIAL_WARNINGS, lookup_serial_candidates, search_all_makers, format_candidate,
+    serial_ranges_for_year, format_serial_range,
+)
+from maker_names import resolve_maker
+from library_store import open_library_store, iter_presets, apply_change_list
+from key_search import KeySetIndex
+from screw_index import DEFAULT_TOLERANCE_MM, PART_LABELS, PART_TYPES, SCREW_PARTS, ScrewIndex
+from key_heights import (
+    KEY_HEIGHT_FIELDS, HeightMatrix, HeightStats, convert_height, convert_height_text, format_height, height_mm, horn_key,
+)
 
 # ==========================================
 # SECTION 1: CONFIGURATION & DATA
@@ -33,91 +47,11 @@ LIGHTBURN_COLORS = [
 ]
 
 # --- Default Key Height Fields ---
-ALL_KEY_HEIGHT_FIELDS = [
-    "B", "F", "Palm F", "Palm E", "Palm Eb", "Palm D", 
-    "G", "D", "Low C", "Low B", "Low Bb"
-]
+ALL_KEY_HEIGHT_FIELDS = KEY_HEIGHT_FIELDS # Defined in key_heights.py for the headless code
 
-# --- Default Configuration ---
-DEFAULT_SETTINGS = {
-    "units": "in",
-    "felt_offset": 0.75,
-    "card_to_felt_offset": 2.0,
-    "leather_wrap_multiplier": 1.00,
-    "sheet_width": "13.5",
-    "sheet_height": "10",
-    "hole_option": "3.5mm",
-    "custom_hole_size": "4.0",
-    "min_hole_size": 16.5,
-    "felt_thickness": 3.175,
-    "felt_thickness_unit": "mm",
-    "engraving_on": True,
-    "show_engraving_warning": True,
-    "last_output_dir": "",
-    "resonance_clicks": 0, 
-    "compatibility_mode": False,
-    
-    # NEW SETTINGS FOR v2.1 (now v1.0 of Companion)
-    "darts_enabled": True,    
-    "dart_threshold": 18.0,   
-    "dart_overwrap": 0.5,     
-    "dart_wrap_bonus": 0.75, 
-    "dart_frequency_multiplier": 1.0,
-    "dart_shape_factor": 0.0,
-    
-    # DART SPECIFIC ENGRAVING DEFAULTS
-    "dart_engraving_on": True,
-    "dart_engraving_loc": {"mode": "from_outside", "value": 2.5},
-    
-    "key_layout": {
-        "show_serial": False,
-        "large_notes": False,
-        "show_B": True,
-        "show_F": True,
-        "show_Palm F": False,
-        "show_Palm E": False,
-        "show_Palm Eb": False,
-        "show_Palm D": False,
-        "show_G": False,
-        "show_D": False,
-        "show_Low C": True,
-        "show_Low B": False,
-        "show_Low Bb": False
-    },
-
-    "engraving_font_size": {
-        "felt": 2.0,
-        "card": 2.0,
-        "leather": 2.0,
-        "exact_size": 2.0
-    },
-    "engraving_location": {
-        "felt": {"mode": "centered", "value": 0.0},
-        "card": {"mode": "centered", "value": 0.0},
-        "leather": {"mode": "from_outside", "value": 1.0},
-        "exact_size": {"mode": "centered", "value": 0.0}
-    },
-    "layer_colors": {
-        'felt_outline': '#000000',
-        'felt_center_hole': '#0000A0',
-        'felt_engraving': '#A00000',
-        'card_outline': '#0000FF',
-        'card_center_hole': '#00A0FF',
-        'card_engraving': '#A000A0',
-        'leather_outline': '#FF0000',
-        'leather_center_hole': '#00E000',
-        'leather_engraving': '#FF8000',
-        'exact_size_outline': '#D0D000',
-        'exact_size_center_hole': '#A0A000',
-        'exact_size_engraving': '#BB7784'
-    }
-}
-
-# --- Filenames ---
-PAD_PRESET_FILE = "pad_presets.json"
-KEY_PRESET_FILE = "key_height_library.json"
-SETTINGS_FILE = "app_settings.json"
-SCREW_SPECS_FILE = "screw_specs.json"
+# --- Libraries ---
+# Kind (see library_store.py) -> the app attribute holding that library in memory
+LIBRARY_ATTRS = {"pads": "pad_presets", "keys": "key_presets", "screws": "screw_data"}
 
 # --- Constants & Themes ---
 RESONANCE_MESSAGES = [
@@ -133,29 +67,6 @@ COOL_GREEN = "#E8F5E9"
 
 # --- IO Functions ---
 
-def load_settings():
-    if os.path.exists(SETTINGS_FILE):
-        try:
-            with open(SETTINGS_FILE, 'r') as f:
-                loaded_settings = json.load(f)
-                settings = DEFAULT_SETTINGS.copy()
-                
-                if "key_layout" not in loaded_settings:
-                    loaded_settings["key_layout"] = settings["key_layout"].copy()
-
-                for key, default_value in DEFAULT_SETTINGS.items():
-                    if key in loaded_settings:
-                        if isinstance(default_value, dict):
-                            settings[key] = default_value.copy()
-                            settings[key].update(loaded_settings[key])
-                        else:
-                            settings[key] = loaded_settings[key]
-                
-                return settings
-        except (json.JSONDecodeError, TypeError):
-            return DEFAULT_SETTINGS.copy()
-    return DEFAULT_SETTINGS.copy()
-
 def save_settings(settings):
     try:
         with open(SETTINGS_FILE, 'w') as f:
@@ -163,356 +74,32 @@ def save_settings(settings):
     except Exception as e:
         messagebox.showerror("Error Saving Settings", f"Could not save settings:\n{e}")
 
-def load_presets(file_path, preset_type_name="Preset"):
-    data = {}
-    if os.path.exists(file_path):
-        try:
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-            if not isinstance(data, dict):
-                data = {}
-        except (json.JSONDecodeError, TypeError):
-            data = {}
-    
-    if data and not any(isinstance(v, dict) for v in data.values()):
+def load_presets(store, kind, preset_type_name="Preset"):
+    try:
+        data = store.load(kind)
+    except Exception as e:
+        messagebox.showerror("Error Loading Presets", f"Could not load {preset_type_name} sets:\n{e}")
+        return {}
+
+    if kind in store.upgraded:
         print(f"Migrating old {preset_type_name} file...")
-        new_data = {"My Presets": data}
-        if save_presets(new_data, file_path):
-            messagebox.showinfo("Library Updated", f"Your existing {preset_type_name} sets have been moved into a new library called 'My Presets'.")
-            return new_data
-        else:
-            return {}
-    
-    return data if data else {}
+        messagebox.showinfo("Library Updated", f"Your existing {preset_type_name} sets have been moved into a new library called 'My Presets'.")
+    return data
 
-def save_presets(presets, file_path):
+def save_presets(store, kind, presets, changed=None):
+    """Saves a library through the store; changed lists the (library, name) keys that were edited."""
     try:
-        with open(file_path, 'w') as f:
-            json.dump(presets, f, indent=2)
+        store.save(kind, presets, changed)
         return True
     except Exception as e:
         messagebox.showerror("Error Saving Preset", str(e))
         return False
 
-
 # ==========================================
 # SECTION 2: LOGIC & MATH
 # ==========================================
-
-def calculate_star_path(cx, cy, outer_r, inner_r, num_points=12, shape_factor=0.0):
-    """
-    Generates an SVG path string for a smooth Sine Wave (Flower) shape.
-    shape_factor: 0.0 = Sine, 1.0 = Flattened (Square-ish)
-    """
-    path_data = []
-    
-    avg_r = (outer_r + inner_r) / 2.0
-    amplitude = (outer_r - inner_r) / 2.0
-    
-    steps = int(num_points * 8) 
-    if steps < 64: steps = 64
-    
-    angle_step = (2 * math.pi) / steps
-
-    # Calculate power for shaping. 
-    power = 1.0 - (0.9 * shape_factor)
-
-    for i in range(steps + 1):
-        theta = i * angle_step
-        
-        # Raw Sine Wave (-1 to 1)
-        raw_wave = math.cos(num_points * theta)
-        
-        # Apply Shaping: sign * |raw|^power
-        shaped_wave = (1 if raw_wave >= 0 else -1) * (abs(raw_wave) ** power)
-        
-        r = avg_r + amplitude * shaped_wave
-        
-        x = cx + r * math.cos(theta)
-        y = cy + r * math.sin(theta)
-        
-        command = "M" if i == 0 else "L"
-        path_data.append(f"{command} {x:.3f} {y:.3f}")
-        
-    path_data.append("Z") 
-    return " ".join(path_data)
-
-def get_disc_diameter(pad_size, material, settings):
-    if material == 'felt': return pad_size - settings["felt_offset"]
-    if material == 'card': return pad_size - (settings["felt_offset"] + settings["card_to_felt_offset"])
-    if material == 'exact_size': return pad_size
-    
-    if material == 'leather':
-        threshold = settings.get("dart_threshold", 18.0)
-        darts_enabled = settings.get("darts_enabled", True)
-        
-        if darts_enabled and pad_size < threshold:
-            # DART BOOST: Add extra wrap for stars
-            bonus = settings.get("dart_wrap_bonus", 0.75)
-            wrap = leather_back_wrap(pad_size, settings["leather_wrap_multiplier"], extra_base=bonus)
-        else:
-            # Standard Wrap
-            wrap = leather_back_wrap(pad_size, settings["leather_wrap_multiplier"])
-            
-        felt_thickness_mm = get_felt_thickness_mm(settings)
-        diameter = pad_size + 2 * (felt_thickness_mm + wrap)
-        return round(diameter * 2) / 2
-        
-    return 0
-
-def check_for_oversized_engravings(pads, material_vars, settings):
-    oversized = {}
-    for material, var in material_vars.items():
-        if not var.get(): continue
-        
-        font_size = settings["engraving_font_size"].get(material, 2.0)
-        oversized_sizes = set()
-
-        for pad in pads:
-            pad_size = pad['size']
-            diameter = get_disc_diameter(pad_size, material, settings)
-            radius = diameter / 2
-            if font_size >= radius * 0.8:
-                oversized_sizes.add(pad_size)
-        
-        if oversized_sizes:
-            oversized[material] = oversized_sizes
-    return oversized
-
-def leather_back_wrap(pad_size, multiplier, extra_base=0.0):
-    base_wrap = 0
-    if pad_size >= 45:
-        base_wrap = 3.2
-    elif pad_size >= 12:
-        base_wrap = 1.2 + (pad_size - 12) * (2.0 / 33.0)
-    elif pad_size >= 6:
-        base_wrap = 1.0 + (pad_size - 6) * (0.2 / 6.0)
-    else:
-        base_wrap = 1.0
-        
-    # Apply the Dart Bonus (if any) before multiplier
-    total_base = base_wrap + extra_base
-    return total_base * multiplier
-
-def should_have_center_hole(pad_size, hole_dia, settings):
-    min_size = settings.get("min_hole_size", 16.5)
-    return hole_dia > 0 and pad_size >= min_size
-
-def get_felt_thickness_mm(settings):
-    thickness = settings.get("felt_thickness", 3.175)
-    if settings.get("felt_thickness_unit") == "in":
-        return thickness * 25.4
-    return thickness
-
-def can_all_pads_fit(pads, material, width_mm, height_mm, settings):
-    spacing_mm = 1.0
-    discs = []
-    
-    for pad in pads:
-        pad_size, qty = pad['size'], pad['qty']
-        diameter = get_disc_diameter(pad_size, material, settings)
-        for _ in range(qty): discs.append((pad_size, diameter))
-
-    discs.sort(key=lambda x: -x[1])
-    placed = []
-    for _, dia in discs:
-        r = dia / 2
-        placed_successfully = False
-        y = spacing_mm
-        while y + dia + spacing_mm <= height_mm and not placed_successfully:
-            x = spacing_mm
-            while x + dia + spacing_mm <= width_mm:
-                cx, cy = x + r, y + r
-                is_collision = any((cx - px)**2 + (cy - py)**2 < (r + pr + spacing_mm)**2 for _, px, py, pr in placed)
-                if not is_collision:
-                    placed.append((None, cx, cy, r))
-                    placed_successfully = True
-                    break
-                x += 1
-            y += 1
-    
-    return len(placed) == len(discs)
-
-def generate_svg(pads, material, width_mm, height_mm, filename, hole_dia_preset, settings):
-    spacing_mm = 1.0
-    discs = []
-
-    for pad in pads:
-        pad_size, qty = pad['size'], pad['qty']
-        diameter = get_disc_diameter(pad_size, material, settings)
-        for _ in range(qty): discs.append((pad_size, diameter))
-
-    discs.sort(key=lambda x: -x[1])
-    placed = []
-    for pad_size, dia in discs:
-        r = dia / 2
-        placed_successfully = False
-        y = spacing_mm
-        while y + dia + spacing_mm <= height_mm and not placed_successfully:
-            x = spacing_mm
-            while x + dia + spacing_mm <= width_mm:
-                cx, cy = x + r, y + r
-                # Check collision using standard circle r
-                is_collision = any((cx - px)**2 + (cy - py)**2 < (r + pr + spacing_mm)**2 for _, px, py, pr in placed)
-                if not is_collision:
-                    placed.append((pad_size, cx, cy, r))
-                    placed_successfully = True
-                    break
-                x += 1
-            y += 1
-
-    compatibility_mode = settings.get("compatibility_mode", False)
-    
-    if compatibility_mode:
-        dwg = svgwrite.Drawing(filename, size=(f"{width_mm}mm", f"{height_mm}mm"), viewBox=f"0 0 {width_mm} {height_mm}")
-        stroke_w = 0.1
-    else:
-        dwg = svgwrite.Drawing(filename, size=(f"{width_mm}mm", f"{height_mm}mm"), profile='tiny')
-        stroke_w = '0.1mm'
-
-    layer_colors = settings.get("layer_colors", DEFAULT_SETTINGS["layer_colors"])
-
-    for pad_size, cx, cy, r in placed:
-        
-        threshold = settings.get("dart_threshold", 18.0)
-        darts_enabled = settings.get("darts_enabled", True)
-        
-        is_dart_pad = (material == 'leather' and darts_enabled and pad_size < threshold)
-        
-        if is_dart_pad:
-            # --- STAR LOGIC ---
-            felt_thick = get_felt_thickness_mm(settings)
-            overwrap = settings.get("dart_overwrap", 0.5)
-            
-            # 1. Inner Radius (Valley) - Safe Zone
-            felt_r = (pad_size - settings["felt_offset"]) / 2
-            inner_r = felt_r + felt_thick + overwrap
-            
-            # 2. Outer Radius (Tip) - The Boosted Wrap
-            # 'r' is the full Boosted radius from get_disc_diameter
-            outer_r = r
-            
-            # Safety Check
-            if inner_r >= outer_r:
-                 inner_r = outer_r - 0.2 
-            
-            # 3. Dynamic Points & Shape
-            circumference = 2 * math.pi * inner_r
-            freq_mult = settings.get("dart_frequency_multiplier", 1.0)
-            num_points = int((circumference / 3.5) * freq_mult)
-            if num_points < 12: num_points = 12 
-            if num_points % 2 != 0: num_points += 1 
-            
-            shape_factor = settings.get("dart_shape_factor", 0.0)
-            
-            path_d = calculate_star_path(cx, cy, outer_r, inner_r, num_points=num_points, shape_factor=shape_factor)
-            
-            dwg.add(dwg.path(d=path_d, stroke=layer_colors[f'{material}_outline'], fill='none', stroke_width=stroke_w))
-        else:
-            # --- STANDARD CIRCLE LOGIC ---
-            if compatibility_mode:
-                dwg.add(dwg.circle(center=(cx, cy), r=r, stroke=layer_colors[f'{material}_outline'], fill='none', stroke_width=stroke_w))
-            else:
-                dwg.add(dwg.circle(center=(f"{cx}mm", f"{cy}mm"), r=f"{r}mm", stroke=layer_colors[f'{material}_outline'], fill='none', stroke_width=stroke_w))
-
-        hole_dia = 0
-        if should_have_center_hole(pad_size, hole_dia_preset, settings):
-            hole_dia = hole_dia_preset
-
-        if hole_dia > 0:
-            if compatibility_mode:
-                dwg.add(dwg.circle(center=(cx, cy), r=hole_dia / 2, stroke=layer_colors[f'{material}_center_hole'], fill='none', stroke_width=stroke_w))
-            else:
-                dwg.add(dwg.circle(center=(f"{cx}mm", f"{cy}mm"), r=f"{hole_dia / 2}mm", stroke=layer_colors[f'{material}_center_hole'], fill='none', stroke_width=stroke_w))
-
-        font_size = settings.get("engraving_font_size", {}).get(material, 2.0)
-        
-        # --- Determine Engraving Settings (Standard vs Star) ---
-        should_engrave = False
-        
-        if is_dart_pad:
-            # Use Star Specific Settings
-            if settings.get("dart_engraving_on", True):
-                engraving_settings = settings.get("dart_engraving_loc", {"mode": "from_outside", "value": 2.5})
-                should_engrave = True
-        else:
-            # Use Standard Settings
-            if settings.get("engraving_on", True):
-                engraving_settings = settings["engraving_location"][material]
-                should_engrave = True
-
-        # Safety Check: Don't engrave if text is wider than the pad radius
-        if should_engrave and (font_size >= r * 0.8):
-            should_engrave = False
-        
-        if should_engrave:
-            mode = engraving_settings['mode']
-            value = engraving_settings['value']
-            
-            engraving_y = 0
-            if mode == 'from_outside':
-                engraving_y = cy - (r - value)
-            elif mode == 'from_inside':
-                hole_r = hole_dia / 2 if hole_dia > 0 else 0
-                engraving_y = cy - (hole_r + value)
-            else: # centered
-                hole_r = hole_dia / 2 if hole_dia > 0 else 1.75
-                offset_from_center = (r + hole_r) / 2
-                engraving_y = cy - offset_from_center
-
-            vertical_adjust = font_size * 0.35
-            text_content = f"{pad_size:.1f}".rstrip('0').rstrip('.')
-            
-            if compatibility_mode:
-                dwg.add(dwg.text(text_content,
-                                 insert=(cx, engraving_y + vertical_adjust),
-                                 text_anchor="middle",
-                                 font_size=font_size,
-                                 fill=layer_colors[f'{material}_engraving']))
-            else:
-                dwg.add(dwg.text(text_content,
-                                 insert=(f"{cx}mm", f"{engraving_y + vertical_adjust}mm"),
-                                 text_anchor="middle",
-                                 font_size=f"{font_size}mm",
-                                 fill=layer_colors[f'{material}_engraving']))
-        
-    dwg.save()
-
-# --- New Serial Logic ---
-def lookup_serial_year(maker, serial_str):
-    if not maker or not serial_str:
-        return ""
-    
-    if maker not in SERIAL_DATA:
-        return "Manufacturer data not found."
-
-    # Extract numbers only for comparison
-    clean_serial = "".join(filter(str.isdigit, serial_str))
-    if not clean_serial:
-        return "Invalid Serial Number"
-    
-    try:
-        serial_num = int(clean_serial)
-    except ValueError:
-        return "Invalid Serial Number"
-
-    data = SERIAL_DATA[maker]
-    # Data is list of tuples: (Start_Serial, Year)
-    # We want to find the largest Start_Serial <= serial_num
-    
-    found_year = None
-    
-    # Iterate to find the range (Since lists are small, linear scan is fine)
-    for start_serial, year in data:
-        if serial_num >= start_serial:
-            found_year = year
-        else:
-            break # We passed the range
-            
-    if found_year:
-        return str(found_year)
-    else:
-        return "Too old / Unknown"
+# Pad sizing, nesting and SVG generation live in pad_engine.py.
+# Serial number lookup lives in serial_lookup.py.
 
 # --- Helper for Unique Names ---
 def get_unique_name(name, existing_keys):
@@ -888,6 +475,66 @@ class LayerColorWindow:
         self.save_callback()
         self.top.destroy()
 
+class LaserSpeedWindow:
+    def __init__(self, parent, settings, save_callback):
+        self.settings = settings
+        self.save_callback = save_callback
+        
+        self.top = tk.Toplevel(parent)
+        self.top.title("Laser Speeds (Time Estimate)")
+        self.top.geometry("420x480")
+        self.top.configure(bg="#F0EAD6")
+        self.top.transient(parent)
+        self.top.grab_set()
+
+        self.speed_vars = {}
+
+        main_frame = tk.Frame(self.top, bg="#F0EAD6", padx=10, pady=10)
+        main_frame.pack(fill="both", expand=True)
+        main_frame.columnconfigure(1, weight=1)
+
+        speeds = DEFAULT_SETTINGS["layer_speeds"].copy()
+        speeds.update(self.settings.get("layer_speeds", {}))
+        
+        row = 0
+        for key in DEFAULT_SETTINGS["layer_speeds"]:
+            label_text = key.replace('_', ' ').capitalize() + " (mm/s):"
+            tk.Label(main_frame, text=label_text, bg="#F0EAD6").grid(row=row, column=0, sticky='w', pady=2)
+            var = tk.DoubleVar(value=speeds[key])
+            tk.Entry(main_frame, textvariable=var, width=10).grid(row=row, column=1, sticky='w', padx=5)
+            self.speed_vars[key] = var
+            row += 1
+
+        tk.Label(main_frame, text="Travel speed (mm/s):", bg="#F0EAD6").grid(row=row, column=0, sticky='w', pady=(10, 2))
+        self.travel_var = tk.DoubleVar(value=self.settings.get("travel_speed", DEFAULT_SETTINGS["travel_speed"]))
+        tk.Entry(main_frame, textvariable=self.travel_var, width=10).grid(row=row, column=1, sticky='w', padx=5, pady=(10, 2))
+        row += 1
+
+        tk.Label(main_frame, text="Time per pierce (s):", bg="#F0EAD6").grid(row=row, column=0, sticky='w', pady=2)
+        self.pierce_var = tk.DoubleVar(value=self.settings.get("pierce_time", DEFAULT_SETTINGS["pierce_time"]))
+        tk.Entry(main_frame, textvariable=self.pierce_var, width=10).grid(row=row, column=1, sticky='w', padx=5)
+
+        button_frame = tk.Frame(self.top, bg="#F0EAD6")
+        button_frame.pack(pady=10)
+        tk.Button(button_frame, text="Save", command=self.save_speeds).pack(side="left", padx=10)
+        tk.Button(button_frame, text="Cancel", command=self.top.destroy).pack(side="left", padx=10)
+
+    def save_speeds(self):
+        try:
+            speeds = {key: var.get() for key, var in self.speed_vars.items()}
+            travel_speed = self.travel_var.get()
+            pierce_time = self.pierce_var.get()
+        except tk.TclError:
+            messagebox.showerror("Invalid Input", "All speeds must be valid numbers.", parent=self.top)
+            return
+        
+        self.settings["layer_speeds"] = speeds
+        self.settings["travel_speed"] = travel_speed
+        self.settings["pierce_time"] = pierce_time
+        
+        self.save_callback()
+        self.top.destroy()
+
 class KeyLayoutWindow:
     def __init__(self, parent, settings, update_callback, save_callback):
         self.settings = settings
@@ -971,6 +618,72 @@ class KeyLayoutWindow:
         self.update_callback() # This will rebuild the key tab
         self.top.destroy()
         
+class KeyStatsWindow:
+    """Count, mean, spread and range of each key height for one make/model/size."""
+    def __init__(self, parent, app):
+        self.app = app
+
+        self.top = tk.Toplevel(parent)
+        self.top.title("Key Height Statistics")
+        self.top.configure(bg="#F0EAD6")
+        self.top.transient(parent)
+        self.top.geometry("620x380")
+
+        select_frame = tk.Frame(self.top, bg="#F0EAD6")
+        select_frame.pack(fill="x", padx=10, pady=10)
+        tk.Label(select_frame, text="Horn:", bg="#F0EAD6").pack(side="left")
+        self.horn_var = tk.StringVar()
+        self.horn_menu = ttk.Combobox(select_frame, textvariable=self.horn_var, state="readonly", width=50)
+        self.horn_menu.pack(side="left", padx=5)
+        self.horn_menu.bind("<<ComboboxSelected>>", lambda e: self.show_stats())
+        self.count_label = tk.Label(select_frame, text="", bg="#F0EAD6")
+        self.count_label.pack(side="left", padx=5)
+
+        tree_frame = tk.Frame(self.top, bg="#F0EAD6")
+        tree_frame.pack(fill="both", expand=True, padx=10)
+        columns = ("key", "count", "mean", "std", "min", "max")
+        self.tree = ttk.Treeview(tree_frame, columns=columns, show='headings', height=11)
+        for column, heading, width in zip(columns, ("Key", "Sets", "Mean", "Std Dev", "Min", "Max"), (90, 50, 90, 90, 90, 90)):
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width, anchor='w')
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='right', fill='y')
+
+        tk.Button(self.top, text="Close", command=self.top.destroy).pack(pady=10)
+
+        self.horn_keys = {} # combobox label -> horn_key
+        self.refresh(select=app.current_key_horn())
+
+    def refresh(self, select=None):
+        """Reloads the horn list (after a save) and shows the selected horn's stats."""
+        stats = self.app.get_key_height_stats()
+        current = self.horn_keys.get(self.horn_var.get()) if select is None else select
+        self.horn_keys = {}
+        for key, label, count in stats.horn_labels():
+            self.horn_keys[" / ".join(part or "-" for part in label) + f" ({count})"] = key
+        labels = list(self.horn_keys)
+        self.horn_menu['values'] = labels
+        chosen = next((label for label, key in self.horn_keys.items() if key == current), labels[0] if labels else "")
+        self.horn_var.set(chosen)
+        self.show_stats()
+
+    def show_stats(self):
+        self.tree.delete(*self.tree.get_children())
+        key = self.horn_keys.get(self.horn_var.get())
+        if key is None:
+            self.count_label.config(text="No key height sets saved yet")
+            return
+        unit = self.app.key_unit_var.get()
+        stats = self.app.get_key_height_stats().stats_for(key)
+        for field in ALL_KEY_HEIGHT_FIELDS:
+            if field not in stats:
+                continue
+            s = stats[field]
+            self.tree.insert("", "end", values=(field, s.count, *(format_height(convert_height(v, "mm", unit), unit) for v in (s.mean, s.std, s.min, s.max))))
+        self.count_label.config(text=f"Heights in {unit}")
+
 class ResonanceWindow(tk.Toplevel):
     def __init__(self, parent, settings, save_callback, theme_callback):
         super().__init__(parent)
@@ -1106,7 +819,7 @@ class ExportPresetsWindow(tk.Toplevel):
              tk.Label(self.scrollable_frame, text="No local sets found.", bg="#F0EAD6").pack(pady=10)
         else:
             # Check if this is a nested dictionary (Key Libraries)
-            if any(isinstance(v, dict) for v in presets.values()):
+            if any(isinstance(v, Mapping) for v in presets.values()):
                 for lib_name in sorted(self.presets.keys()):
                     tk.Label(self.scrollable_frame, text=f"[{lib_name}]", bg="#F0EAD6", font=("Helvetica", 10, "bold")).pack(anchor='w', pady=(5,0))
                     for preset_name in sorted(self.presets[lib_name].keys()):
@@ -1202,16 +915,15 @@ class ExportPresetsWindow(tk.Toplevel):
             messagebox.showerror("Export Error", f"Could not export presets:\n{e}")
 
 class ImportPresetsWindow(tk.Toplevel):
-    def __init__(self, parent, local_presets_lib, imported_presets, file_path, menu_widget, app_instance, preset_type_name="Preset", save_data=None):
+    def __init__(self, parent, local_presets_lib, imported_presets, kind, library_name, menu_widget, app_instance, preset_type_name="Preset"):
         super().__init__(parent)
         self.parent_app = app_instance
-        self.local_presets_lib = local_presets_lib # This is the specific library dict for key heights, or all presets for pads
+        self.local_presets_lib = local_presets_lib # The target library's dict of presets
         self.imported_presets = imported_presets # This is the dict of presets from the file
-        self.file_path = file_path
+        self.kind = kind # Library kind for saving (see LIBRARY_ATTRS)
+        self.library_name = library_name
         self.menu_widget = menu_widget
         self.preset_type_name = preset_type_name
-        # This is the *entire* preset object (e.g., self.key_presets, which is a dict of dicts) for saving
-        self.save_data = save_data if save_data is not None else local_presets_lib
         
         self.title(f"Import {preset_type_name}s")
         self.geometry("450x500")
@@ -1269,6 +981,7 @@ class ImportPresetsWindow(tk.Toplevel):
     def import_selected(self):
         added_count = 0
         renamed_count = 0
+        changed = [(self.library_name, None)]
         
         for name, var in self.vars.items():
             if var.get():
@@ -1289,11 +1002,11 @@ class ImportPresetsWindow(tk.Toplevel):
                     renamed_count += 1
                 
                 self.local_presets_lib[new_name] = preset_data
+                changed.append((self.library_name, new_name))
                 added_count += 1
         
         if added_count > 0:
-            # --- FIX IS HERE: Changed self.parent_app.save_presets to just save_presets ---
-            if save_presets(self.save_data, self.file_path):
+            if self.parent_app.save_library(self.kind, changed):
                 # Special refresh for key height library
                 if self.preset_type_name == "Key Height Set":
                     self.parent_app.update_key_library_dropdown()
@@ -1380,6 +1093,160 @@ class ImportTargetWindow(tk.Toplevel):
         return self.target_library
 
 
+class NestingPreview:
+    """
+    Draws a nested layout on a tk.Canvas. Items are keyed by what they look like,
+    so a refresh only deletes and creates the discs that actually changed.
+    Star pads drop detail as they get smaller on screen.
+    """
+    # On-screen star radius (px) below which we draw less detail
+    STAR_LOD_PLAIN = 12
+    STAR_LOD_COARSE = 40
+    # Labels smaller than this on screen (px) are not drawn
+    LABEL_MIN_PX = 5
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.settings = None # SettingsSnapshot of the layout being shown
+        self.items = {} # key -> list of canvas item ids
+        self.scale = 1.0 # px per mm
+        self.zoom = 1.0
+        self.sheet_mm = None
+        self.layout = None
+
+        self.canvas.bind("<MouseWheel>", self._on_mousewheel)
+        self.canvas.bind("<Button-4>", lambda e: self.set_zoom(self.zoom * 1.25))
+        self.canvas.bind("<Button-5>", lambda e: self.set_zoom(self.zoom / 1.25))
+        self.canvas.bind("<ButtonPress-1>", lambda e: self.canvas.scan_mark(e.x, e.y))
+        self.canvas.bind("<B1-Motion>", lambda e: self.canvas.scan_dragto(e.x, e.y, gain=1))
+        self.canvas.bind("<Configure>", lambda e: self.redraw())
+
+    def _on_mousewheel(self, event):
+        if event.delta > 0:
+            self.set_zoom(self.zoom * 1.25)
+        else:
+            self.set_zoom(self.zoom / 1.25)
+
+    def set_zoom(self, zoom):
+        self.zoom = min(max(zoom, 1.0), 20.0)
+        self.redraw()
+
+    def show(self, placed, material, hole_dia_preset, width_mm, height_mm, settings):
+        self.settings = settings
+        self.layout = (placed, material, hole_dia_preset)
+        self.sheet_mm = (width_mm, height_mm)
+        self.redraw()
+
+    def clear(self):
+        self.canvas.delete("all")
+        self.items = {}
+        self.layout = None
+
+    def redraw(self):
+        if self.layout is None or self.sheet_mm is None:
+            return
+        width_mm, height_mm = self.sheet_mm
+        canvas_w = max(self.canvas.winfo_width(), 50)
+        canvas_h = max(self.canvas.winfo_height(), 50)
+        
+        new_scale = min((canvas_w - 10) / width_mm, (canvas_h - 10) / height_mm) * self.zoom
+        if new_scale <= 0:
+            return
+        if abs(new_scale - self.scale) > 1e-9:
+            # Rescale what is already drawn instead of recreating it
+            factor = new_scale / self.scale
+            self.canvas.scale("all", 0, 0, factor, factor)
+            self.scale = new_scale
+
+        wanted = self._wanted_items()
+        for key in [k for k in self.items if k not in wanted]:
+            for item_id in self.items.pop(key):
+                self.canvas.delete(item_id)
+        for key, draw in wanted.items():
+            if key not in self.items:
+                self.items[key] = draw()
+
+        self.canvas.configure(scrollregion=(-5, -5, width_mm * self.scale + 5, height_mm * self.scale + 5))
+
+    def _wanted_items(self):
+        placed, material, hole_dia_preset = self.layout
+        width_mm, height_mm = self.sheet_mm
+        layer_colors = self.settings.layer_colors
+        outline_color = layer_colors[f'{material}_outline']
+        hole_color = layer_colors[f'{material}_center_hole']
+        engraving_color = layer_colors[f'{material}_engraving']
+        
+        wanted = {('sheet', width_mm, height_mm): lambda: [self._rect(0, 0, width_mm, height_mm)]}
+        
+        for pad_size, cx, cy, r in placed:
+            if is_dart_pad(pad_size, material, self.settings):
+                inner_r, num_points = get_star_radii(pad_size, r, self.settings)
+                lod = self._star_lod(r)
+                key = ('star', pad_size, cx, cy, r, inner_r, num_points, lod, outline_color)
+                wanted[key] = (lambda cx=cx, cy=cy, r=r, inner_r=inner_r, num_points=num_points, lod=lod:
+                               [self._star(cx, cy, r, inner_r, num_points, lod, outline_color)])
+            else:
+                key = ('circle', cx, cy, r, outline_color)
+                wanted[key] = lambda cx=cx, cy=cy, r=r: [self._oval(cx, cy, r, outline_color)]
+            
+            hole_dia = hole_dia_preset if should_have_center_hole(pad_size, hole_dia_preset, self.settings) else 0
+            if hole_dia > 0:
+                key = ('hole', cx, cy, hole_dia, hole_color)
+                wanted[key] = lambda cx=cx, cy=cy, hole_dia=hole_dia: [self._oval(cx, cy, hole_dia / 2, hole_color)]
+            
+            engraving = get_pad_engraving(pad_size, material, r, hole_dia, self.settings)
+            if engraving is not None and engraving[1] * self.scale >= self.LABEL_MIN_PX:
+                key = ('label', cx, cy, engraving, engraving_color)
+                wanted[key] = lambda cx=cx, cy=cy, engraving=engraving: self._label(cx, cy, engraving, engraving_color)
+        
+        return wanted
+
+    def _star_lod(self, r):
+        r_px = r * self.scale
+        if r_px < self.STAR_LOD_PLAIN:
+            return 0
+        if r_px < self.STAR_LOD_COARSE:
+            return 1
+        return 2
+
+    def _rect(self, x1, y1, x2, y2):
+        s = self.scale
+        rect = self.canvas.create_rectangle(x1 * s, y1 * s, x2 * s, y2 * s, outline="#808080", fill="white")
+        self.canvas.tag_lower(rect) # A new sheet size must not cover the discs that were kept
+        return rect
+
+    def _oval(self, cx, cy, r, color):
+        s = self.scale
+        return self.canvas.create_oval((cx - r) * s, (cy - r) * s, (cx + r) * s, (cy + r) * s, outline=color)
+
+    def _star(self, cx, cy, r, inner_r, num_points, lod, color):
+        if lod == 0:
+            return self._oval(cx, cy, (r + inner_r) / 2, color)
+        
+        shape_factor = self.settings.dart_shape_factor
+        points = list(star_points(cx, cy, r, inner_r, num_points, shape_factor))
+        if lod == 1:
+            # Keep the tips and valleys only
+            points = points[::4]
+        
+        s = self.scale
+        coords = [c * s for point in points for c in point]
+        return self.canvas.create_polygon(coords, outline=color, fill="")
+
+    def _label(self, cx, cy, engraving, color):
+        text_content, font_size, offset = engraving
+        s = self.scale
+        strokes = stroke_font.layout_text(text_content, font_size)[0]
+        ey = cy - offset
+        
+        ids = []
+        for stroke in strokes:
+            coords = [c for x, y in stroke for c in ((cx + x) * s, (ey + y) * s)]
+            if len(coords) >= 4:
+                ids.append(self.canvas.create_line(coords, fill=color))
+        return ids
+
+
 # ==========================================
 # SECTION 4: MAIN APP CLASS (main)
 # ==========================================
@@ -1388,18 +1255,29 @@ class PadSVGGeneratorApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Stohrer Sax Shop Companion")
-        self.root.geometry("640x720")
+        self.root.geometry("1100x720")
         self.default_bg = "#FFFDD0"
         self.root.configure(bg=self.default_bg)
 
         self.settings = load_settings()
-        self.pad_presets = load_presets(PAD_PRESET_FILE, preset_type_name="Pad Preset")
-        self.key_presets = load_presets(KEY_PRESET_FILE, preset_type_name="Key Height")
-        
-        # --- NEW: Screw Specs Init ---
-        if not os.path.exists(SCREW_SPECS_FILE):
-            save_presets({}, SCREW_SPECS_FILE)
-        self.screw_data = load_presets(SCREW_SPECS_FILE, preset_type_name="Screw Specs")
+        self.library_store = self.open_store(self.settings.get("storage_backend", "json"))
+        self.pad_presets = load_presets(self.library_store, "pads", preset_type_name="Pad Preset")
+        self.key_presets = load_presets(self.library_store, "keys", preset_type_name="Key Height")
+        self.screw_data = load_presets(self.library_store, "screws", preset_type_name="Screw Specs")
+
+        # Full-text index over the key height sets, built on the first search
+        self.key_search_index = None
+        self.key_search_after_id = None
+        self.key_search_hits = {} # Treeview item -> (library, name)
+        self.key_height_matrix = None # Every set's heights in mm, built on the first "closest sets" query
+        self.key_height_stats = None # Per make/model/size stats, built when the stats window first opens
+        self.key_stats_window = None
+        self.screw_index = None # Thread and diameter index over every screw spec, built on the first search
+        self.screw_search_hits = {} # Treeview item -> (maker, model)
+
+        # --- Background generation state (one run at a time) ---
+        self.generation_running = False
+        self.generation_cancel = threading.Event()
         
         self.create_menus()
         self.create_widgets() 
@@ -1411,6 +1289,8 @@ class PadSVGGeneratorApp:
         self.root.protocol("WM_DELETE_WINDOW", self.on_exit)
 
     def on_exit(self):
+        self.generation_cancel.set() # Let a running generation stop at its next disc
+
         # Save settings from pad generator tab
         self.settings["sheet_width"] = self.width_entry.get()
         self.settings["sheet_height"] = self.height_entry.get()
@@ -1419,8 +1299,45 @@ class PadSVGGeneratorApp:
             self.settings["custom_hole_size"] = self.custom_hole_entry.get()
         
         save_settings(self.settings)
+        self.library_store.close()
         self.root.destroy()
 
+    # --- Library Storage ---
+    def open_store(self, backend):
+        try:
+            return open_library_store(backend)
+        except Exception as e:
+            messagebox.showerror("Library Storage", f"Could not open the {backend} library database, using the JSON files instead:\n{e}")
+            return open_library_store("json")
+
+    def save_library(self, kind, changed=None):
+        """Saves one library kind ('pads', 'keys' or 'screws'). Returns True on success."""
+        data = getattr(self, LIBRARY_ATTRS[kind])
+        if not save_presets(self.library_store, kind, data, changed):
+            return False
+        if kind == "keys":
+            if changed is None:
+                # Rebuilt on next use
+                self.key_search_index = None
+                self.key_height_matrix = None
+                self.key_height_stats = None
+            else:
+                for index in (self.key_search_index, self.key_height_matrix, self.key_height_stats):
+                    if index is not None:
+                        apply_change_list(index, data, changed)
+            if self.key_search_var.get().strip():
+                self.run_key_search()
+            if self.key_stats_window is not None and self.key_stats_window.top.winfo_exists():
+                self.key_stats_window.refresh()
+        elif kind == "screws":
+            if changed is None:
+                self.screw_index = None
+            elif self.screw_index is not None:
+                apply_change_list(self.screw_index, data, changed)
+            if self.screw_search_var.get().strip():
+                self.run_screw_search()
+        return True
+
     def apply_resonance_theme(self):
         clicks = self.settings.get("resonance_clicks", 0)
         color = self.default_bg
@@ -1478,6 +1395,7 @@ class PadSVGGeneratorApp:
         self.pad_menu.add_cascade(label="Options", menu=pad_options_menu)
         pad_options_menu.add_command(label="Sizing Rules...", command=self.open_options_window)
         pad_options_menu.add_command(label="Layer Colors...", command=self.open_color_window)
+        pad_options_menu.add_command(label="Laser Speeds...", command=self.open_speed_window)
 
         # --- Key Height Library Menu ---
         self.key_menu = tk.Menu(self.root)
@@ -1555,6 +1473,15 @@ class PadSVGGeneratorApp:
         
         # Title
         tk.Label(frame, text="Saxophone Serial Number Lookup", font=("Helvetica", 16, "bold"), bg=self.root.cget('bg')).pack(pady=(0, 20))
+
+        # Chart rows that were skipped or look wrong (bad user table rows, unsorted entries)
+        if SERIAL_WARNINGS:
+            warning_frame = tk.Frame(frame, bg=self.root.cget('bg'))
+            warning_frame.pack(fill='x')
+            count = len(SERIAL_WARNINGS)
+            tk.Label(warning_frame, text=f"{count} problem{'s' if count != 1 else ''} in the serial charts: {SERIAL_WARNINGS[0]}",
+                     font=("Helvetica", 9), fg="red", bg=self.root.cget('bg'), wraplength=500, justify='left').pack(side='left')
+            tk.Button(warning_frame, text="Details", command=self.show_serial_warnings).pack(side='left', padx=10)
         
         # Controls Frame
         controls_frame = tk.Frame(frame, bg=self.root.cget('bg'))
@@ -1565,10 +1492,15 @@ class PadSVGGeneratorApp:
         
         self.serial_maker_var = tk.StringVar()
         makers = sorted(list(SERIAL_DATA.keys())) if SERIAL_DATA else ["No Data Found"]
-        self.serial_maker_dropdown = ttk.Combobox(controls_frame, textvariable=self.serial_maker_var, values=makers, state="readonly", width=25, font=("Helvetica", 12))
+        # Editable, so a maker can be typed the way it is engraved ("H. Selmer", "Vito")
+        self.serial_maker_dropdown = ttk.Combobox(controls_frame, textvariable=self.serial_maker_var, values=makers, width=25, font=("Helvetica", 12))
         if makers:
             self.serial_maker_dropdown.current(0)
         self.serial_maker_dropdown.grid(row=0, column=1, sticky='w', padx=10, pady=10)
+        self.serial_maker_dropdown.bind("<<ComboboxSelected>>", self.on_serial_change)
+        self.serial_maker_dropdown.bind("<KeyRelease>", self.on_serial_change)
+        self.serial_maker_match_label = tk.Label(controls_frame, text="", font=("Helvetica", 9, "italic"), bg=self.root.cget('bg'))
+        self.serial_maker_match_label.grid(row=0, column=2, sticky='w')
         
         # Serial Entry
         tk.Label(controls_frame, text="Serial Number:", font=("Helvetica", 12), bg=self.root.cget('bg')).grid(row=1, column=0, sticky='e', padx=10, pady=10)
@@ -1577,25 +1509,132 @@ class PadSVGGeneratorApp:
         self.serial_entry_var.trace("w", self.on_serial_change) # Auto-update on type
         entry = tk.Entry(controls_frame, textvariable=self.serial_entry_var, width=25, font=("Helvetica", 12))
         entry.grid(row=1, column=1, sticky='w', padx=10, pady=10)
+
+        # Unknown maker: check the serial against every chart at once
+        self.serial_all_makers_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(controls_frame, text="Search all manufacturers", variable=self.serial_all_makers_var,
+                       command=self.on_serial_mode_change, bg=self.root.cget('bg')).grid(row=2, column=1, sticky='w', padx=10)
         
         # Result Display
         self.serial_result_label = tk.Label(frame, text="Enter a serial number...", font=("Helvetica", 24, "bold"), bg=self.root.cget('bg'), fg="#0000A0")
         self.serial_result_label.pack(pady=40)
+
+        # All-manufacturers results (shown only in that mode)
+        self.serial_results_frame = tk.Frame(frame, bg=self.root.cget('bg'))
+        columns = ("maker", "year", "series")
+        self.serial_results_tree = ttk.Treeview(self.serial_results_frame, columns=columns, show='headings', height=10)
+        for column, heading, width in zip(columns, ("Manufacturer", "Year", "Series"), (220, 100, 200)):
+            self.serial_results_tree.heading(column, text=heading)
+            self.serial_results_tree.column(column, width=width, anchor='w')
+        scrollbar = ttk.Scrollbar(self.serial_results_frame, orient="vertical", command=self.serial_results_tree.yview)
+        self.serial_results_tree.configure(yscrollcommand=scrollbar.set)
+        self.serial_results_tree.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='right', fill='y')
         
         # Disclaimer
-        disclaimer = "Note: Dates are approximate based on available charts. Ranges represent the start of that production year."
+        disclaimer = ("Note: Dates are approximate based on available charts. Ranges represent the start of that production year. "
+                      "Where a maker restarted its numbering, every matching series is listed; '+' means the serial is past the end of that series.")
         tk.Label(frame, text=disclaimer, font=("Helvetica", 9, "italic"), bg=self.root.cget('bg'), wraplength=400).pack(side='bottom', pady=20)
 
+        # Reverse lookup: which serials were made in a given year
+        year_frame = tk.LabelFrame(frame, text="Serials Made in a Year", bg=self.root.cget('bg'), padx=5, pady=5)
+        year_frame.pack(side='bottom', fill='x')
+        year_controls = tk.Frame(year_frame, bg=self.root.cget('bg'))
+        year_controls.pack(fill='x')
+        tk.Label(year_controls, text="Year:", bg=self.root.cget('bg')).pack(side='left')
+        self.serial_year_var = tk.StringVar()
+        self.serial_year_var.trace("w", self.on_serial_year_change)
+        tk.Entry(year_controls, textvariable=self.serial_year_var, width=8).pack(side='left', padx=5)
+        self.serial_year_status = tk.Label(year_controls, text="", bg=self.root.cget('bg'))
+        self.serial_year_status.pack(side='left', padx=10)
+
+        columns = ("maker", "serials", "series", "note")
+        self.serial_year_tree = ttk.Treeview(year_frame, columns=columns, show='headings', height=6)
+        for column, heading, width in zip(columns, ("Manufacturer", "Serials", "Series", "Note"), (200, 180, 160, 180)):
+            self.serial_year_tree.heading(column, text=heading)
+            self.serial_year_tree.column(column, width=width, anchor='w')
+        self.serial_year_tree.pack(fill='x', pady=(5, 0))
+
+    def show_serial_warnings(self):
+        messagebox.showwarning("Serial Chart Problems", "\n".join(SERIAL_WARNINGS))
+
+    def on_serial_mode_change(self):
+        if self.serial_all_makers_var.get():
+            self.serial_maker_dropdown.config(state='disabled')
+            self.serial_result_label.config(font=("Helvetica", 16, "bold"))
+            self.serial_result_label.pack_configure(pady=10)
+            self.serial_results_frame.pack(fill='both', expand=True)
+        else:
+            self.serial_results_frame.pack_forget()
+            self.serial_maker_dropdown.config(state='normal')
+            self.serial_result_label.config(font=("Helvetica", 24, "bold"))
+            self.serial_result_label.pack_configure(pady=40)
+        self.on_serial_change()
+
     def on_serial_change(self, *args):
-        maker = self.serial_maker_var.get()
         serial = self.serial_entry_var.get()
+        maker = self.resolve_serial_maker()
+
+        if self.serial_all_makers_var.get():
+            self.show_all_maker_results(serial)
+            return
         
         if not serial:
             self.serial_result_label.config(text="...")
             return
             
-        year = lookup_serial_year(maker, serial)
-        self.serial_result_label.config(text=year)
+        # Makers that restarted their numbering can have several readings; show them all
+        candidates, message = lookup_serial_candidates(maker, serial)
+        if candidates:
+            self.serial_result_label.config(text="\n".join(format_candidate(c) for c in candidates))
+        else:
+            self.serial_result_label.config(text=message)
+
+    def resolve_serial_maker(self):
+        """Maps the typed maker to a chart name and shows which one was used."""
+        typed = self.serial_maker_var.get()
+        if typed in SERIAL_DATA or not typed.strip():
+            self.serial_maker_match_label.config(text="")
+            return typed
+        maker, score = resolve_maker(typed)
+        if maker is None:
+            self.serial_maker_match_label.config(text="No matching chart", fg="red")
+            return typed
+        self.serial_maker_match_label.config(text=f"Using {maker} ({score:.0%} match)", fg="black")
+        return maker
+
+    def show_all_maker_results(self, serial):
+        self.serial_results_tree.delete(*self.serial_results_tree.get_children())
+        if not serial:
+            self.serial_result_label.config(text="...")
+            return
+
+        results, message = search_all_makers(serial)
+        for maker, candidate in results:
+            year = f"{candidate.year}+" if candidate.past_era_end else str(candidate.year)
+            self.serial_results_tree.insert('', 'end', values=(maker, year, candidate.era))
+        if results:
+            makers = len({maker for maker, _ in results})
+            self.serial_result_label.config(text=f"Matches charts from {makers} manufacturer{'s' if makers != 1 else ''}")
+        else:
+            self.serial_result_label.config(text=message)
+
+    def on_serial_year_change(self, *args):
+        self.serial_year_tree.delete(*self.serial_year_tree.get_children())
+        text = self.serial_year_var.get().strip()
+        if not text:
+            self.serial_year_status.config(text="")
+            return
+        if not text.isdigit() or len(text) != 4:
+            self.serial_year_status.config(text="Enter a 4-digit year")
+            return
+
+        by_maker = serial_ranges_for_year(int(text))
+        for maker in sorted(by_maker):
+            for serial_range in by_maker[maker]:
+                note = "Estimated (year not listed)" if serial_range.estimated else ""
+                self.serial_year_tree.insert('', 'end', values=(maker, format_serial_range(serial_range), serial_range.era, note))
+        self.serial_year_status.config(text=f"{len(by_maker)} manufacturer{'s' if len(by_maker) != 1 else ''}" if by_maker else "No charts cover that year")
 
     def create_screw_specs_tab(self, parent):
         # Note: self.screw_data is already loaded in __init__
@@ -1639,19 +1678,9 @@ class PadSVGGeneratorApp:
         # We will store all the Entry variables in a dictionary for easy saving/loading
         self.screw_vars = {}
 
-        # Define the rows. Structure: (Label Text, Key_Prefix)
-        rows = [
-            ("Neck Receiver Screw", "neck_screw"), # <--- NEW ITEM ADDED HERE
-            ("Hinge Rod Tiny",   "hinge_tiny"),
-            ("Hinge Rod Small",  "hinge_small"),
-            ("Hinge Rod Medium", "hinge_med"),
-            ("Hinge Rod Large",  "hinge_lrg"),
-            ("Pivot Screw Small","pivot_small"),
-            ("Pivot Screw Large","pivot_lrg"),
-        ]
-
+        # The rows are (Label Text, Key_Prefix), shared with the screw index
         row_idx = 1
-        for label_text, prefix in rows:
+        for label_text, prefix in SCREW_PARTS:
             # Label
             tk.Label(specs_frame, text=f"{label_text}:", font=("Helvetica", 10), bg=self.root.cget('bg')).grid(row=row_idx, column=0, sticky='e', padx=5, pady=2)
             
@@ -1691,6 +1720,42 @@ class PadSVGGeneratorApp:
         tk.Button(btn_frame, text="Save / Update Spec", command=self.save_screw_spec, font=("Helvetica", 11, "bold")).pack(side="left", padx=10)
         tk.Button(btn_frame, text="Delete Spec", command=self.delete_screw_spec, font=("Helvetica", 11), fg="red").pack(side="right", padx=10)
 
+        # --- Search across every maker and model ---
+        search_frame = tk.LabelFrame(main_frame, text="Find in All Specs", bg=self.root.cget('bg'), font=("Helvetica", 10, "bold"), padx=10, pady=5)
+        search_frame.pack(fill='x', pady=5)
+
+        query_frame = tk.Frame(search_frame, bg=self.root.cget('bg'))
+        query_frame.pack(fill='x')
+        tk.Label(query_frame, text="Thread or Dia:", bg=self.root.cget('bg')).pack(side="left")
+        self.screw_search_var = tk.StringVar()
+        search_entry = tk.Entry(query_frame, textvariable=self.screw_search_var, width=18)
+        search_entry.pack(side="left", padx=5)
+        search_entry.bind("<Return>", lambda e: self.run_screw_search())
+        self.screw_part_var = tk.StringVar(value=list(PART_TYPES)[0])
+        part_menu = ttk.Combobox(query_frame, textvariable=self.screw_part_var, values=list(PART_TYPES), state="readonly", width=12)
+        part_menu.pack(side="left", padx=5)
+        part_menu.bind("<<ComboboxSelected>>", lambda e: self.run_screw_search())
+        tk.Label(query_frame, text="Within ±", bg=self.root.cget('bg')).pack(side="left")
+        self.screw_tolerance_var = tk.StringVar(value=str(DEFAULT_TOLERANCE_MM))
+        tk.Entry(query_frame, textvariable=self.screw_tolerance_var, width=6).pack(side="left")
+        tk.Label(query_frame, text="mm", bg=self.root.cget('bg')).pack(side="left")
+        tk.Button(query_frame, text="Search", command=self.run_screw_search).pack(side="left", padx=10)
+        self.screw_search_status = tk.Label(query_frame, text="e.g. M1.6x0.35, 2-56, 56 TPI or 2.4", bg=self.root.cget('bg'))
+        self.screw_search_status.pack(side="left", padx=5)
+
+        tree_frame = tk.Frame(search_frame, bg=self.root.cget('bg'))
+        tree_frame.pack(fill='x', pady=5)
+        columns = ("maker", "model", "part", "thread", "dia")
+        self.screw_search_tree = ttk.Treeview(tree_frame, columns=columns, show='headings', height=6)
+        for column, heading, width in zip(columns, ("Manufacturer", "Model", "Part", "Threads / Pitch", "Dia / Desc"), (140, 140, 140, 120, 160)):
+            self.screw_search_tree.heading(column, text=heading)
+            self.screw_search_tree.column(column, width=width, anchor='w')
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.screw_search_tree.yview)
+        self.screw_search_tree.configure(yscrollcommand=scrollbar.set)
+        self.screw_search_tree.pack(side='left', fill='x', expand=True)
+        scrollbar.pack(side='right', fill='y')
+        self.screw_search_tree.bind("<<TreeviewSelect>>", self.on_screw_search_select)
+
         # Initialize Dropdowns
         self.update_screw_maker_list()
 
@@ -1770,7 +1835,7 @@ class PadSVGGeneratorApp:
 
         self.screw_data[maker][model] = spec_data
         
-        if save_presets(self.screw_data, SCREW_SPECS_FILE):
+        if self.save_library("screws", [(maker, model)]):
             messagebox.showinfo("Saved", f"Specs for {maker} {model} saved.")
             self.update_screw_maker_list()
             self.screw_maker_var.set(maker)
@@ -1788,14 +1853,60 @@ class PadSVGGeneratorApp:
                 if not self.screw_data[maker]:
                     del self.screw_data[maker]
                 
-                save_presets(self.screw_data, SCREW_SPECS_FILE)
+                self.save_library("screws", [(maker, model), (maker, None)])
                 self.update_screw_maker_list()
                 self.screw_maker_var.set("")
                 self.screw_model_var.set("")
-                self.screw_thread_var.set("")
-                self.screw_rod_var.set("")
+                for var in self.screw_vars.values():
+                    var.set("")
                 self.screw_notes_text.delete("1.0", tk.END)
 
+    # --- Screw Spec Search ---
+    def get_screw_index(self):
+        if self.screw_index is None:
+            self.screw_index = ScrewIndex(iter_presets(self.screw_data))
+        return self.screw_index
+
+    def run_screw_search(self):
+        """Lists every maker's and model's parts with the thread or diameter typed in."""
+        self.screw_search_tree.delete(*self.screw_search_tree.get_children())
+        self.screw_search_hits = {}
+        query = self.screw_search_var.get().strip()
+        if not query:
+            self.screw_search_status.config(text="")
+            return
+        try:
+            tolerance = abs(float(self.screw_tolerance_var.get()))
+        except ValueError:
+            tolerance = DEFAULT_TOLERANCE_MM
+            self.screw_tolerance_var.set(str(tolerance))
+
+        index = self.get_screw_index()
+        kind, hits = index.search(query, tolerance, PART_TYPES.get(self.screw_part_var.get(), ""))
+        for maker, model, prefix in hits:
+            spec = self.screw_data.get(maker, {}).get(model, {})
+            item = self.screw_search_tree.insert("", "end", values=(
+                maker, model, PART_LABELS[prefix], spec.get(f"{prefix}_th", ""), spec.get(f"{prefix}_dia", "")))
+            self.screw_search_hits[item] = (maker, model)
+
+        if not kind:
+            self.screw_search_status.config(text="Enter a thread (M1.6x0.35, 2-56, 56 TPI) or a diameter (2.4, 3/32\")")
+        elif not hits:
+            self.screw_search_status.config(text="No matches")
+        else:
+            what = "using that thread" if kind == "thread" else f"within {tolerance:g} mm"
+            self.screw_search_status.config(text=f"{len(hits)} part(s) {what} in {len(index)} specs")
+
+    def on_screw_search_select(self, event=None):
+        selection = self.screw_search_tree.selection()
+        if not selection:
+            return
+        maker, model = self.screw_search_hits[selection[0]]
+        self.screw_maker_var.set(maker)
+        self.on_screw_maker_change()
+        self.screw_model_var.set(model)
+        self.on_screw_model_change()
+
     # --- Screw Spec Import/Export Handlers ---
     def on_export_screw_specs(self):
         ExportPresetsWindow(self.root, self.screw_data, "Screw Specs", "screw_specs_export.json", False)
@@ -1855,6 +1966,7 @@ class PadSVGGeneratorApp:
                 
             def do_import():
                 count = 0
+                changed = []
                 for key, var in vars_dict.items():
                     if var.get():
                         maker, model = key.split("::", 1)
@@ -1867,9 +1979,10 @@ class PadSVGGeneratorApp:
                         final_model_name = get_unique_name(model, self.screw_data[maker])
                         
                         self.screw_data[maker][final_model_name] = spec_data
+                        changed.append((maker, final_model_name))
                         count += 1
                 
-                save_presets(self.screw_data, SCREW_SPECS_FILE)
+                self.save_library("screws", changed)
                 self.update_screw_maker_list() 
                 messagebox.showinfo("Success", f"Imported {count} specs.")
                 top.destroy()
@@ -1880,9 +1993,29 @@ class PadSVGGeneratorApp:
             messagebox.showerror("Import Error", f"Failed to import:\n{e}")
 
     def create_pad_generator_tab(self, parent):
+        # --- Live Preview (right side) ---
+        preview_frame = tk.LabelFrame(parent, text="Preview", bg=self.root.cget('bg'), padx=5, pady=5)
+        preview_frame.pack(side="right", fill="both", expand=True, padx=(0, 10), pady=5)
+        
+        preview_controls = tk.Frame(preview_frame, bg=self.root.cget('bg'))
+        preview_controls.pack(fill="x")
+        tk.Label(preview_controls, text="Material:", bg=self.root.cget('bg')).pack(side="left")
+        self.preview_material_var = tk.StringVar(value="felt")
+        preview_material_dropdown = ttk.Combobox(preview_controls, textvariable=self.preview_material_var, values=MATERIALS, state="readonly", width=12)
+        preview_material_dropdown.pack(side="left", padx=5)
+        preview_material_dropdown.bind("<<ComboboxSelected>>", lambda e: self.schedule_preview())
+        self.preview_status_label = tk.Label(preview_controls, text="", bg=self.root.cget('bg'))
+        self.preview_status_label.pack(side="left", padx=10)
+        
+        preview_canvas = tk.Canvas(preview_frame, bg="#E0E0E0", highlightthickness=0, width=420)
+        preview_canvas.pack(fill="both", expand=True, pady=(5, 0))
+        self.preview = NestingPreview(preview_canvas)
+        self.preview_after_id = None
+        
         tk.Label(parent, text="Enter pad sizes (e.g. 42.0x3):", bg=self.root.cget('bg')).pack(pady=5)
         self.pad_entry = tk.Text(parent, height=10)
         self.pad_entry.pack(fill="x", padx=10)
+        self.pad_entry.bind("<KeyRelease>", lambda e: self.schedule_preview())
 
         preset_frame = tk.Frame(parent, bg=self.root.cget('bg'))
         preset_frame.pack(pady=10)
@@ -1949,12 +2082,26 @@ class PadSVGGeneratorApp:
         self.height_entry.insert(0, self.settings["sheet_height"])
         self.height_entry.grid(row=1, column=1, sticky='w')
 
+        self.width_entry.bind("<KeyRelease>", lambda e: self.schedule_preview())
+        self.height_entry.bind("<KeyRelease>", lambda e: self.schedule_preview())
+        self.custom_hole_entry.bind("<KeyRelease>", lambda e: self.schedule_preview())
+
         tk.Label(parent, text="Output filename base (no extension):", bg=self.root.cget('bg')).pack(pady=5)
         self.filename_entry = tk.Entry(parent)
         self.filename_entry.insert(0, "my_pad_job")
         self.filename_entry.pack(padx=10) 
 
-        tk.Button(parent, text="Generate SVGs", command=self.on_generate, font=('Helvetica', 10, 'bold')).pack(pady=15)
+        self.generate_button = tk.Button(parent, text="Generate SVGs", command=self.on_generate, font=('Helvetica', 10, 'bold'))
+        self.generate_button.pack(pady=(15, 5))
+
+        progress_frame = tk.Frame(parent, bg=self.root.cget('bg'))
+        progress_frame.pack(fill='x', padx=10)
+        self.generate_progress = ttk.Progressbar(progress_frame, orient="horizontal", mode="determinate", maximum=1.0)
+        self.generate_progress.pack(side='left', fill='x', expand=True)
+        self.cancel_generate_button = tk.Button(progress_frame, text="Cancel", command=self.on_cancel_generate, state='disabled')
+        self.cancel_generate_button.pack(side='left', padx=(5, 0))
+        self.generate_status_label = tk.Label(parent, text="", bg=self.root.cget('bg'))
+        self.generate_status_label.pack()
         
     def create_key_library_tab(self, parent):
         self.key_field_vars = {} 
@@ -1979,9 +2126,34 @@ class PadSVGGeneratorApp:
         self.key_preset_menu.bind("<<ComboboxSelected>>", lambda e: self.on_load_key_preset(self.key_preset_var.get()))
         
         tk.Button(preset_frame, text="Delete Set", command=self.on_delete_key_preset).pack(side="left", padx=5)
+        tk.Button(preset_frame, text="Find Closest Sets", command=self.on_find_closest_sets).pack(side="left", padx=5)
+        tk.Button(preset_frame, text="Statistics", command=self.open_key_stats_window).pack(side="left", padx=5)
         
         self.update_key_library_dropdown() 
 
+        # Search every library by make, model, size, serial or notes
+        search_frame = tk.Frame(parent, bg=self.root.cget('bg'))
+        search_frame.pack(fill="x", padx=10)
+        tk.Label(search_frame, text="Search:", bg=self.root.cget('bg')).pack(side="left")
+        self.key_search_var = tk.StringVar()
+        self.key_search_var.trace("w", self.schedule_key_search)
+        tk.Entry(search_frame, textvariable=self.key_search_var, width=40).pack(side="left", padx=5)
+        self.key_search_status = tk.Label(search_frame, text="", bg=self.root.cget('bg'))
+        self.key_search_status.pack(side="left", padx=10)
+
+        self.key_search_frame = tk.Frame(parent, bg=self.root.cget('bg'))
+        columns = ("name", "library", "horn", "match")
+        self.key_search_tree = ttk.Treeview(self.key_search_frame, columns=columns, show='headings', height=6)
+        for column, heading, width in zip(columns, ("Set", "Library", "Horn", "Difference"), (200, 130, 220, 180)):
+            self.key_search_tree.heading(column, text=heading)
+            self.key_search_tree.column(column, width=width, anchor='w')
+        scrollbar = ttk.Scrollbar(self.key_search_frame, orient="vertical", command=self.key_search_tree.yview)
+        self.key_search_tree.configure(yscrollcommand=scrollbar.set)
+        self.key_search_tree.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='right', fill='y')
+        self.key_search_tree.bind("<<TreeviewSelect>>", self.on_key_search_select)
+        self.key_search_anchor = search_frame
+
         data_frame = tk.Frame(parent, bg=self.root.cget('bg'), padx=10)
         data_frame.pack(fill="both", expand=True)
 
@@ -2087,6 +2259,101 @@ class PadSVGGeneratorApp:
                     col = 0
                     row += 1
 
+    # --- Key Set Search ---
+    KEY_SEARCH_DELAY_MS = 150
+
+    def schedule_key_search(self, *args):
+        """Searches once typing pauses, not on every keystroke."""
+        if self.key_search_after_id is not None:
+            self.root.after_cancel(self.key_search_after_id)
+        self.key_search_after_id = self.root.after(self.KEY_SEARCH_DELAY_MS, self.run_key_search)
+
+    def get_key_search_index(self):
+        if self.key_search_index is None:
+            self.key_search_index = KeySetIndex(iter_presets(self.key_presets))
+        return self.key_search_index
+
+    def show_key_results(self, rows):
+        """Fills the results list from (library, name, difference text) rows."""
+        self.key_search_tree.delete(*self.key_search_tree.get_children())
+        self.key_search_hits = {}
+        for library, name, match in rows:
+            preset = self.key_presets[library][name]
+            horn = " ".join(str(preset.get(field, "")) for field in ("make", "model", "size")) if isinstance(preset, dict) else ""
+            item = self.key_search_tree.insert('', 'end', values=(name, library, horn, match))
+            self.key_search_hits[item] = (library, name)
+        self.key_search_frame.pack(fill="x", padx=10, pady=(2, 0), after=self.key_search_anchor)
+
+    def run_key_search(self):
+        self.key_search_after_id = None
+        query = self.key_search_var.get()
+        if not query.strip():
+            self.key_search_tree.delete(*self.key_search_tree.get_children())
+            self.key_search_hits = {}
+            self.key_search_frame.pack_forget()
+            self.key_search_status.config(text="")
+            return
+
+        index = self.get_key_search_index()
+        results = index.search(query)
+        self.show_key_results([(library, name, "") for score, library, name in results])
+        more = " (best 50 shown)" if len(results) == 50 else ""
+        self.key_search_status.config(text=f"{len(results)} match(es) in {len(index)} sets{more}" if results else "No matches")
+
+    # --- Closest Sets ---
+    def get_key_height_matrix(self):
+        if self.key_height_matrix is None:
+            self.key_height_matrix = HeightMatrix(iter_presets(self.key_presets))
+        return self.key_height_matrix
+
+    def on_find_closest_sets(self):
+        """Lists the stored sets whose heights are closest to the ones entered in the form."""
+        unit = self.key_unit_var.get()
+        measured = {}
+        for key, var in self.key_height_vars.items():
+            value = height_mm(var.get(), unit)
+            if value is not None:
+                measured[key] = value
+        if not measured:
+            messagebox.showwarning("Find Closest Sets", "Enter at least one key height first.")
+            return
+
+        matrix = self.get_key_height_matrix()
+        results = matrix.nearest(measured)
+        self.show_key_results([
+            (library, name, f"{format_height(convert_height(rms, 'mm', unit), unit)} {unit} RMS over {shared} key(s)")
+            for rms, shared, library, name in results
+        ])
+        self.key_search_status.config(
+            text=f"{len(results)} closest of {len(matrix)} sets to the {len(measured)} height(s) entered" if results else "No sets share enough of these keys")
+
+    # --- Statistics ---
+    def get_key_height_stats(self):
+        if self.key_height_stats is None:
+            self.key_height_stats = HeightStats(iter_presets(self.key_presets))
+        return self.key_height_stats
+
+    def current_key_horn(self):
+        """The grouping key for the make/model/size in the form."""
+        return horn_key({field: self.key_field_vars[field].get() for field in ("make", "model", "size")})
+
+    def open_key_stats_window(self):
+        if self.key_stats_window is not None and self.key_stats_window.top.winfo_exists():
+            self.key_stats_window.refresh(select=self.current_key_horn())
+            self.key_stats_window.top.lift()
+            return
+        self.key_stats_window = KeyStatsWindow(self.root, self)
+
+    def on_key_search_select(self, event=None):
+        selection = self.key_search_tree.selection()
+        if not selection:
+            return
+        library, name = self.key_search_hits[selection[0]]
+        self.key_library_var.set(library)
+        self.on_key_library_selected()
+        self.key_preset_var.set(name)
+        self.on_load_key_preset(name)
+
     def on_unit_convert(self):
         new_unit = self.key_unit_var.get()
         old_unit = self.previous_key_unit
@@ -2096,13 +2363,7 @@ class PadSVGGeneratorApp:
 
         for var in self.key_height_vars.values():
             try:
-                val = float(var.get())
-                if new_unit == "in" and old_unit == "mm":
-                    new_val = val / 25.4
-                    var.set(f"{new_val:.4f}") 
-                elif new_unit == "mm" and old_unit == "in":
-                    new_val = val * 25.4
-                    var.set(f"{new_val:.2f}")
+                var.set(convert_height_text(var.get(), old_unit, new_unit))
             except (ValueError, TypeError):
                 continue 
         
@@ -2141,7 +2402,7 @@ class PadSVGGeneratorApp:
                 return
         
         self.key_presets[active_library][name] = data
-        if save_presets(self.key_presets, KEY_PRESET_FILE):
+        if self.save_library("keys", [(active_library, name)]):
             self.on_key_library_selected() 
             messagebox.showinfo("Preset Saved", f"Preset '{name}' saved successfully to '{active_library}'.")
 
@@ -2200,7 +2461,7 @@ class PadSVGGeneratorApp:
 
         if messagebox.askyesno("Delete Key Height Set", f"Are you sure you want to delete the set '{selected_preset}' from the '{selected_lib}' library?"):
             del self.key_presets[selected_lib][selected_preset]
-            if save_presets(self.key_presets, KEY_PRESET_FILE):
+            if self.save_library("keys", [(selected_lib, selected_preset)]):
                 self.on_key_library_selected() 
                 # Clear the form
                 for var in self.key_field_vars.values():
@@ -2271,7 +2532,7 @@ class PadSVGGeneratorApp:
             if target_lib not in self.pad_presets:
                 self.pad_presets[target_lib] = {}
 
-            ImportPresetsWindow(self.root, self.pad_presets[target_lib], imported_presets, PAD_PRESET_FILE, self.pad_preset_menu, self, "Pad Preset", save_data=self.pad_presets)
+            ImportPresetsWindow(self.root, self.pad_presets[target_lib], imported_presets, "pads", target_lib, self.pad_preset_menu, self, "Pad Preset")
         except Exception as e:
             messagebox.showerror("Import Error", f"Could not import pad presets:\n{e}")
 
@@ -2300,7 +2561,7 @@ class PadSVGGeneratorApp:
             if target_lib not in self.key_presets:
                 self.key_presets[target_lib] = {}
 
-            ImportPresetsWindow(self.root, self.key_presets[target_lib], imported_presets, KEY_PRESET_FILE, self.key_preset_menu, self, "Key Height Set", save_data=self.key_presets)
+            ImportPresetsWindow(self.root, self.key_presets[target_lib], imported_presets, "keys", target_lib, self.key_preset_menu, self, "Key Height Set")
 
         except Exception as e:
             messagebox.showerror("Import Error", f"Could not import key sets:\n{e}")
@@ -2314,6 +2575,57 @@ class PadSVGGeneratorApp:
             self.custom_hole_entry.config(state='normal')
         else:
             self.custom_hole_entry.config(state='disabled')
+        self.schedule_preview()
+
+    # --- Live Preview ---
+    PREVIEW_DELAY_MS = 300
+
+    def schedule_preview(self):
+        """Throttles preview redraws while typing: only the last edit in a burst nests."""
+        if not hasattr(self, 'preview'):
+            return
+        if self.preview_after_id is not None:
+            self.root.after_cancel(self.preview_after_id)
+        self.preview_after_id = self.root.after(self.PREVIEW_DELAY_MS, self.update_preview)
+
+    def update_preview(self):
+        self.preview_after_id = None
+        if not hasattr(self, 'height_entry'):
+            return # Tab is still being built
+        
+        pads = self.parse_pad_list(self.pad_entry.get("1.0", tk.END))
+        try:
+            sheet_mm = sheet_size_to_mm(float(self.width_entry.get()), float(self.height_entry.get()), self.settings['units'])
+        except ValueError:
+            sheet_mm = None
+        
+        if not pads or sheet_mm is None or min(sheet_mm) <= 0:
+            self.preview.clear()
+            self.preview_status_label.config(text="")
+            return
+        
+        try:
+            hole_dia = get_hole_dia(self.hole_var.get(), self.custom_hole_entry.get())
+        except ValueError:
+            hole_dia = 0
+        
+        try:
+            snapshot = SettingsSnapshot.from_settings(self.settings)
+        except SettingsError as e:
+            self.preview.clear()
+            self.preview_status_label.config(text=str(e), fg="red")
+            return
+        
+        material = self.preview_material_var.get()
+        width_mm, height_mm = sheet_mm
+        placed = nest_discs(pads, material, width_mm, height_mm, snapshot)
+        self.preview.show(placed, material, hole_dia, width_mm, height_mm, snapshot)
+        
+        total = count_discs(pads)
+        if len(placed) == total:
+            self.preview_status_label.config(text=f"All {total} pieces fit", fg="black")
+        else:
+            self.preview_status_label.config(text=f"{total - len(placed)} of {total} pieces don't fit", fg="red")
 
     def open_options_window(self):
         OptionsWindow(self.root, self, self.settings, self.update_ui_from_settings, lambda: save_settings(self.settings))
@@ -2323,6 +2635,9 @@ class PadSVGGeneratorApp:
 
     def open_color_window(self):
         LayerColorWindow(self.root, self.settings, lambda: save_settings(self.settings))
+
+    def open_speed_window(self):
+        LaserSpeedWindow(self.root, self.settings, lambda: save_settings(self.settings))
         
     def open_resonance_window(self):
         ResonanceWindow(self.root, self.settings, lambda: save_settings(self.settings), self.apply_resonance_theme)
@@ -2330,20 +2645,18 @@ class PadSVGGeneratorApp:
     def update_ui_from_settings(self):
         self.unit_label.config(text=f"Width ({self.settings['units']}):")
         self.height_label.config(text=f"Height ({self.settings['units']}):")
+        self.schedule_preview()
 
     def get_hole_dia(self):
-        hole_option = self.hole_var.get()
-        if hole_option == "3.5mm": return 3.5
-        if hole_option == "3.0mm": return 3.0
-        if hole_option == "Custom":
-            try:
-                return float(self.custom_hole_entry.get())
-            except (ValueError, TypeError):
-                messagebox.showerror("Invalid Input", "Custom hole size must be a valid number.")
-                return None
-        return 0
+        try:
+            return get_hole_dia(self.hole_var.get(), self.custom_hole_entry.get())
+        except ValueError:
+            messagebox.showerror("Invalid Input", "Custom hole size must be a valid number.")
+            return None
 
     def on_generate(self):
+        if self.generation_running:
+            return
         try:
             hole_dia = self.get_hole_dia()
             if hole_dia is None: return
@@ -2353,8 +2666,8 @@ class PadSVGGeneratorApp:
                 messagebox.showerror("Error", "No valid pad sizes entered.")
                 return
 
-            if self.settings.get("engraving_on", True):
-                oversized_engravings = check_for_oversized_engravings(pads, self.material_vars, self.settings)
+            if self.settings.get("engraving_on", True) or self.settings.get("dart_engraving_on", True):
+                oversized_engravings = check_for_oversized_engravings(pads, self.material_vars, self.settings, hole_dia)
                 if oversized_engravings and self.settings.get("show_engraving_warning", True):
                     message = "Warning: The current font size is too large for some pads and the engraving will be skipped:\n\n"
                     for mat, sizes in oversized_engravings.items():
@@ -2370,72 +2683,199 @@ class PadSVGGeneratorApp:
             width_val = float(self.width_entry.get())
             height_val = float(self.height_entry.get())
             
-            if self.settings['units'] == 'in':
-                width_mm, height_mm = width_val * 25.4, height_val * 25.4
-            elif self.settings['units'] == 'cm':
-                width_mm, height_mm = width_val * 10, height_val * 10
-            elif self.settings['units'] == 'mm':
-                width_mm, height_mm = width_val, height_val
-            else:
+            sheet_mm = sheet_size_to_mm(width_val, height_val, self.settings['units'])
+            if sheet_mm is None:
                 messagebox.showerror("Error", f"Unknown unit '{self.settings['units']}' in settings.")
                 return
+            width_mm, height_mm = sheet_mm
 
 
             base = self.filename_entry.get().strip()
             if not base:
                 messagebox.showerror("Error", "Please enter a base filename.")
                 return
-            
-            for material, var in self.material_vars.items():
-                if var.get() and not can_all_pads_fit(pads, material, width_mm, height_mm, self.settings):
-                    messagebox.showerror("Nesting Error", f"Could not fit all '{material.replace('_',' ')}' pieces on the specified sheet size.")
-                    return
 
-            save_dir = filedialog.askdirectory(title="Select Folder to Save SVGs", initialdir=self.settings.get("last_output_dir", ""))
-            if not save_dir:
+            materials = [material for material, var in self.material_vars.items() if var.get()]
+            if not materials:
+                messagebox.showwarning("No Materials Selected", "Please select at least one material.")
                 return
             
-            self.settings["last_output_dir"] = save_dir 
-
-            files_generated = False
-            for material, var in self.material_vars.items():
-                if var.get():
-                    filename = os.path.join(save_dir, f"{base}_{material}.svg")
-                    generate_svg(pads, material, width_mm, height_mm, filename, hole_dia, self.settings)
-                    files_generated = True
-            
-            if files_generated:
-                save_settings(self.settings)
-                messagebox.showinfo("Done", "SVGs generated successfully.")
-            else:
-                messagebox.showwarning("No Materials Selected", "Please select at least one material.")
+            # Everything the worker needs, frozen so the UI can keep changing while it runs
+            job = {
+                "pads": pads, "materials": materials, "base": base, "hole_dia": hole_dia,
+                "width_mm": width_mm, "height_mm": height_mm,
+                "snapshot": SettingsSnapshot.from_settings(self.settings),
+            }
 
         except Exception as e:
             print(f"An error occurred during SVG generation: {e}")
             messagebox.showerror("An Error Occurred", f"Something went wrong during generation:\n\n{e}")
+            return
 
-    def parse_pad_list(self, pad_input):
-        pad_list = []
-        for line in pad_input.strip().splitlines():
+        self.begin_generation()
+        self.start_generation_step(lambda report: self.nest_job(job, report),
+                                   lambda result: self.on_job_nested(job, result))
+
+    # --- Background Generation ---
+    GENERATION_POLL_MS = 50
+
+    def begin_generation(self):
+        self.generation_running = True
+        self.generation_cancel.clear()
+        self.generate_button.config(state='disabled')
+        self.cancel_generate_button.config(state='normal')
+        self.generate_progress['value'] = 0
+        self.generate_status_label.config(text="Starting...")
+
+    def finish_generation(self, status_text=""):
+        self.generation_running = False
+        self.generate_button.config(state='normal')
+        self.cancel_generate_button.config(state='disabled')
+        self.generate_progress['value'] = 0
+        self.generate_status_label.config(text=status_text)
+
+    def on_cancel_generate(self):
+        self.generation_cancel.set()
+        self.cancel_generate_button.config(state='disabled')
+        self.generate_status_label.config(text="Cancelling...")
+
+    def start_generation_step(self, work, on_done):
+        """
+        Runs work(report) on a worker thread. report(text, fraction) is thread-safe and
+        raises GenerationCancelled once Cancel is pressed. on_done(result) runs on the Tk thread.
+        """
+        messages = queue.Queue()
+
+        def report(text, fraction):
+            if self.generation_cancel.is_set():
+                raise GenerationCancelled()
+            messages.put(("progress", text, fraction))
+
+        def run():
             try:
-                size, qty = map(float, line.strip().lower().split('x'))
-                pad_list.append({'size': size, 'qty': int(qty)})
-            except ValueError:
-                continue
-        return pad_list
+                messages.put(("done", work(report)))
+            except GenerationCancelled:
+                messages.put(("cancelled",))
+            except Exception as e:
+                messages.put(("error", e))
+
+        threading.Thread(target=run, daemon=True).start()
+        self.root.after(self.GENERATION_POLL_MS, self.poll_generation, messages, on_done)
+
+    def poll_generation(self, messages, on_done):
+        latest_progress = None
+        while True:
+            try:
+                message = messages.get_nowait()
+            except queue.Empty:
+                break
+            if message[0] == "progress":
+                latest_progress = message # Only the newest one is worth drawing
+            elif message[0] == "done":
+                on_done(message[1])
+                return
+            elif message[0] == "cancelled":
+                self.finish_generation("Generation cancelled.")
+                return
+            else:
+                print(f"An error occurred during SVG generation: {message[1]}")
+                self.finish_generation()
+                messagebox.showerror("An Error Occurred", f"Something went wrong during generation:\n\n{message[1]}")
+                return
+
+        if latest_progress is not None:
+            _, text, fraction = latest_progress
+            self.generate_status_label.config(text=text)
+            self.generate_progress['value'] = fraction
+        self.root.after(self.GENERATION_POLL_MS, self.poll_generation, messages, on_done)
+
+    def nest_job(self, job, report):
+        """Worker thread: nests each material once. Returns (layouts, first material that didn't fit)."""
+        layouts = {}
+        total = count_discs(job["pads"])
+        materials = job["materials"]
+        for i, material in enumerate(materials):
+            name = material.replace('_', ' ')
+            progress = lambda done, discs, i=i, name=name: report(f"Nesting {name}: {done}/{discs} discs", (i + done / discs) / len(materials))
+            placed = nest_discs(job["pads"], material, job["width_mm"], job["height_mm"], job["snapshot"], progress=progress)
+            if len(placed) != total:
+                return layouts, material
+            layouts[material] = placed
+        return layouts, None
+
+    def on_job_nested(self, job, result):
+        layouts, unfit_material = result
+        if unfit_material is not None:
+            self.finish_generation()
+            messagebox.showerror("Nesting Error", f"Could not fit all '{unfit_material.replace('_',' ')}' pieces on the specified sheet size.")
+            return
+
+        self.generate_status_label.config(text="Choose an output folder...")
+        save_dir = filedialog.askdirectory(title="Select Folder to Save SVGs", initialdir=self.settings.get("last_output_dir", ""))
+        if not save_dir:
+            self.finish_generation()
+            return
+        
+        self.settings["last_output_dir"] = save_dir 
+        self.start_generation_step(lambda report: self.write_job(job, layouts, save_dir, report),
+                                   lambda estimates: self.on_job_written(estimates))
+
+    def write_job(self, job, layouts, save_dir, report):
+        """
+        Worker thread: draws and saves every SVG, then the job report.
+        Files are written as .part and only renamed once all of them are done,
+        so a cancelled run never leaves a half-written set behind.
+        """
+        written = []
+        estimates = []
+        try:
+            for i, (material, placed) in enumerate(layouts.items()):
+                name = material.replace('_', ' ')
+                progress = lambda done, discs, i=i, name=name: report(f"Drawing {name}: {done}/{discs} discs", (i + done / discs) / len(layouts))
+                filename = os.path.join(save_dir, f"{job['base']}_{material}.svg")
+                dwg, _ = build_svg(job["pads"], material, job["width_mm"], job["height_mm"], job["hole_dia"], job["snapshot"],
+                                   placed=placed, filename=filename + ".part", progress=progress)
+                written.append((filename + ".part", filename))
+                dwg.save()
+                estimates.append(estimate_job(placed, material, job["hole_dia"], job["snapshot"]))
+            report("Saving files...", 1.0) # Last chance to cancel
+        except BaseException:
+            for part_file, _ in written:
+                try:
+                    os.remove(part_file)
+                except OSError:
+                    pass
+            raise
+
+        for part_file, filename in written:
+            os.replace(part_file, filename)
+        write_job_report(os.path.join(save_dir, f"{job['base']}_report.txt"), job["base"], job["width_mm"], job["height_mm"], estimates)
+        return estimates
+
+    def on_job_written(self, estimates):
+        self.finish_generation("SVGs generated.")
+        save_settings(self.settings)
+        
+        message = "SVGs generated successfully.\n\nEstimated laser time:\n"
+        message += "\n".join(f"- {format_job_estimate(e)}" for e in estimates)
+        message += f"\n\nTotal: ~{format_duration(sum(e['seconds'] for e in estimates))}"
+        messagebox.showinfo("Done", message)
+
+    def parse_pad_list(self, pad_input):
+        return parse_pad_list(pad_input)
     
     # --- Wrapper Methods for Presets ---
     def on_save_pad_preset(self):
-        self.on_save_preset(self.pad_presets, PAD_PRESET_FILE, self.pad_entry, self.pad_preset_menu, "Pad", self.pad_library_var)
+        self.on_save_preset(self.pad_presets, "pads", self.pad_entry, self.pad_preset_menu, "Pad", self.pad_library_var)
         
     def on_delete_pad_preset(self):
-        self.on_delete_preset(self.pad_presets, PAD_PRESET_FILE, self.pad_preset_var, self.pad_preset_menu, self.pad_entry, "Pad", self.pad_library_var, self.on_pad_library_selected)
+        self.on_delete_preset(self.pad_presets, "pads", self.pad_preset_var, self.pad_preset_menu, self.pad_entry, "Pad", self.pad_library_var, self.on_pad_library_selected)
     
     def on_load_pad_preset(self, selected_name):
         self.on_load_preset(selected_name, self.pad_presets, self.pad_entry, self.pad_library_var, "Load Pad Preset")
 
     # Using the shared preset logic from the class
-    def on_save_preset(self, presets, file_path, entry_widget, menu_widget, preset_type_name, library_var):
+    def on_save_preset(self, presets, kind, entry_widget, menu_widget, preset_type_name, library_var):
         active_library = library_var.get()
         if not active_library or active_library == "All Libraries":
             messagebox.showwarning("Save Error", "Please select a specific library to save to.")
@@ -2457,7 +2897,7 @@ class PadSVGGeneratorApp:
             
             presets[active_library][name] = text_data
             
-            if save_presets(presets, file_path):
+            if self.save_library(kind, [(active_library, name)]):
                 if preset_type_name == "Pad":
                     self.on_pad_library_selected()
                 else:
@@ -2486,8 +2926,10 @@ class PadSVGGeneratorApp:
         if data:
             entry_widget.delete("1.0", tk.END)
             entry_widget.insert(tk.END, data)
+            if entry_widget is self.pad_entry:
+                self.schedule_preview()
 
-    def on_delete_preset(self, presets, file_path, preset_var, menu_widget, entry_widget, preset_type_name, library_var, library_refresh_func):
+    def on_delete_preset(self, presets, kind, preset_var, menu_widget, entry_widget, preset_type_name, library_var, library_refresh_func):
         selected_lib = library_var.get()
         selected_preset = preset_var.get()
 
@@ -2506,7 +2948,7 @@ class PadSVGGeneratorApp:
         if messagebox.askyesno(f"Delete {preset_type_name} Preset", f"Are you sure you want to delete the preset '{selected_preset}' from the '{selected_lib}' library?"):
             if selected_lib in presets and selected_preset in presets[selected_lib]:
                 del presets[selected_lib][selected_preset]
-                if save_presets(presets, file_path):
+                if self.save_library(kind, [(selected_lib, selected_preset)]):
                     library_refresh_func() 
                     if isinstance(entry_widget, tk.Text):
                         entry_widget.delete("1.0", tk.END)
@@ -0,0 +1,143 @@
+# maker_names.py
+# Resolves free-form manufacturer names ("H. Selmer Paris", "buescher", "Vito") to the
+# canonical SERIAL_DATA keys, for the Serial Lookup tab and batch serial imports.
+#
+# Names are normalised (case, accents, punctuation, filler words) and looked up in an
+# alias table first. Anything else goes through a trigram index over all aliases
+# and gets a confidence score between 0 and 1. Makers with no chart whose names
+# contain a charted maker's ("Selmer USA", "Bundy") are listed so they resolve to None.
+
+import functools
+import re
+import unicodedata
+
+from serial_lookup import SERIAL_DATA
+
+# Extra spellings for each canonical maker (normalised the same way as the input)
+MAKER_ALIASES = {
+    "Adolphe Sax": ["a sax", "adolph sax", "adolphe sax et cie"],
+    "Buescher": ["buscher", "buesher", "buescher band instrument", "elkhart buescher"],
+    "Buffet": ["buffet crampon", "buffet cramp", "bc"],
+    "Conn": ["cg conn", "c g conn", "conn elkhart"],
+    "Conn (Pan American)": ["pan american", "pan am", "panamerican"],
+    "Holton": ["frank holton", "f holton"],
+    "Keilwerth": ["jk", "j keilwerth", "julius keilwerth", "julius keilwerth graslitz"],
+    "King": ["hn white", "h n white", "king hn white", "white king"],
+    "LeBlanc / Vito": ["leblanc", "le blanc", "g leblanc", "vito", "leblanc vito", "vito leblanc"],
+    "Martin": ["martin band instrument", "martin elkhart", "the martin"],
+    "Selmer Paris": ["selmer", "h selmer", "henri selmer", "henri selmer paris", "h selmer paris", "selmer france"],
+    "SML": ["strasser marigaux lemaire", "strasser marigaux et lemaire", "s m l"],
+    "Yamaha": ["yamaha corporation", "nippon gakki"],
+    "Yanagisawa": ["yani", "yanigisawa", "yanagisawa wind instruments"],
+}
+
+# Makers without a serial chart here that would otherwise match one that has one
+NO_CHART_MAKERS = [
+    "selmer usa", "selmer us", "us selmer", "selmer elkhart", "selmer bundy", "bundy", "bundy ii",
+    "buescher selmer", "selmer buescher", "conn selmer", "conn selmer usa",
+]
+
+# Words after a maker's name that say which horn, not which maker ("Selmer Mark VI tenor")
+MODEL_WORDS = {"sopranino", "soprano", "alto", "tenor", "baritone", "bari", "bass", "c", "melody",
+               "mark", "mk", "super", "balanced", "action", "series", "model", "sax", "serial", "no"}
+_MODEL_TOKEN = re.compile(r"^(?:[ivx]+|\w*\d\w*)$") # Roman numerals, or anything with a digit
+
+# Words that don't help tell makers apart
+FILLER_WORDS = {"co", "company", "inc", "ltd", "mfg", "the", "saxophone", "saxophones",
+                "instrument", "instruments", "and", "cie"}
+
+MIN_SCORE = 0.5
+
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalise(name):
+    """'H. Selmer, Paris' -> 'h selmer paris'."""
+    text = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii')
+    text = _PUNCTUATION.sub(" ", text.casefold().replace("&", " and "))
+    words = [w for w in _SPACES.split(text) if w and w not in FILLER_WORDS]
+    return " ".join(words)
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class MakerIndex:
+    """Alias table plus a trigram inverted index over every alias."""
+
+    def __init__(self, makers, aliases=MAKER_ALIASES, no_chart=NO_CHART_MAKERS):
+        self.exact = {} # normalised spelling -> maker, or None for a maker with no chart
+        for maker in makers:
+            spellings = [maker, re.sub(r"\(.*?\)", "", maker)] + aliases.get(maker, [])
+            for spelling in spellings:
+                key = normalise(spelling)
+                if key:
+                    self.exact.setdefault(key, maker)
+        for spelling in no_chart:
+            self.exact[normalise(spelling)] = None
+
+        self.keys = list(self.exact)
+        self.key_grams = [trigrams(key) for key in self.keys]
+        self.postings = {}
+        for i, grams in enumerate(self.key_grams):
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(i)
+
+    def resolve(self, name):
+        """(canonical maker, score); maker is None when nothing scores MIN_SCORE or more."""
+        key = normalise(name)
+        if not key:
+            return None, 0.0
+        if key in self.exact:
+            maker = self.exact[key]
+            return maker, 1.0 if maker else 0.0
+        if all(word in MODEL_WORDS or _MODEL_TOKEN.match(word) for word in key.split()):
+            return None, 0.0 # Only says which horn ("sax", "tenor", "mark vi"), not who made it
+
+        query = trigrams(key)
+        shared = {}
+        for gram in query:
+            for i in self.postings.get(gram, ()):
+                shared[i] = shared.get(i, 0) + 1
+
+        best, best_score = None, 0.0
+        words = key.split()
+        for i, count in shared.items():
+            # Dice similarity, or how much of the alias appears in the input, scaled
+            # down a little because extra words add doubt. Containment only counts when
+            # the extra words are model words ("selmer mark vi tenor", not "selmer usa").
+            dice = 2 * count / (len(query) + len(self.key_grams[i]))
+            score = dice
+            if self.extra_words_are_models(words, self.key_grams[i]):
+                score = max(dice, 0.9 * count / len(self.key_grams[i]))
+            if score > best_score:
+                best, best_score = self.exact[self.keys[i]], score
+
+        if best_score < MIN_SCORE:
+            return None, round(best_score, 3)
+        if best is None:
+            return None, 0.0 # Closest to a maker with no chart
+        return best, round(best_score, 3)
+
+    @staticmethod
+    def extra_words_are_models(words, key_grams):
+        """True when every word of the input that isn't (mostly) part of the alias is a model word."""
+        for word in words:
+            grams = trigrams(word)
+            if len(grams & key_grams) * 2 >= len(grams):
+                continue
+            if word not in MODEL_WORDS and not _MODEL_TOKEN.match(word):
+                return False
+        return True
+
+
+MAKER_INDEX = MakerIndex(SERIAL_DATA)
+
+
+@functools.lru_cache(maxsize=4096)
+def resolve_maker(name):
+    """Canonical SERIAL_DATA key for a free-form maker name, with a 0-1 confidence: (maker or None, score)."""
+    return MAKER_INDEX.resolve(name)
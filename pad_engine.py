@@ -0,0 +1,843 @@
+# pad_engine.py
+# Pad sizing, nesting and SVG generation for the Stohrer Sax Shop Companion.
+# Nothing in here imports tkinter, so it can run headless (see companion_cli.py).
+
+import os
+import re
+import json
+import math
+import copy
+import types
+import functools
+import time
+import svgwrite
+import stroke_font
+
+# ==========================================
+# SECTION 1: CONFIGURATION
+# ==========================================
+
+MATERIALS = ['felt', 'card', 'leather', 'exact_size']
+
+# --- Default Configuration ---
+DEFAULT_SETTINGS = {
+    "units": "in",
+    "felt_offset": 0.75,
+    "card_to_felt_offset": 2.0,
+    "leather_wrap_multiplier": 1.00,
+    "sheet_width": "13.5",
+    "sheet_height": "10",
+    "hole_option": "3.5mm",
+    "custom_hole_size": "4.0",
+    "min_hole_size": 16.5,
+    "felt_thickness": 3.175,
+    "felt_thickness_unit": "mm",
+    "engraving_on": True,
+    "show_engraving_warning": True,
+    "last_output_dir": "",
+    "resonance_clicks": 0, 
+    "compatibility_mode": False,
+    "storage_backend": "json", # "json" or "sqlite" (see library_store.py); read at startup
+    
+    # NEW SETTINGS FOR v2.1 (now v1.0 of Companion)
+    "darts_enabled": True,    
+    "dart_threshold": 18.0,   
+    "dart_overwrap": 0.5,     
+    "dart_wrap_bonus": 0.75, 
+    "dart_frequency_multiplier": 1.0,
+    "dart_shape_factor": 0.0,
+    
+    # DART SPECIFIC ENGRAVING DEFAULTS
+    "dart_engraving_on": True,
+    "dart_engraving_loc": {"mode": "from_outside", "value": 2.5},
+    
+    "key_layout": {
+        "show_serial": False,
+        "large_notes": False,
+        "show_B": True,
+        "show_F": True,
+        "show_Palm F": False,
+        "show_Palm E": False,
+        "show_Palm Eb": False,
+        "show_Palm D": False,
+        "show_G": False,
+        "show_D": False,
+        "show_Low C": True,
+        "show_Low B": False,
+        "show_Low Bb": False
+    },
+
+    "engraving_font_size": {
+        "felt": 2.0,
+        "card": 2.0,
+        "leather": 2.0,
+        "exact_size": 2.0
+    },
+    "engraving_location": {
+        "felt": {"mode": "centered", "value": 0.0},
+        "card": {"mode": "centered", "value": 0.0},
+        "leather": {"mode": "from_outside", "value": 1.0},
+        "exact_size": {"mode": "centered", "value": 0.0}
+    },
+    "layer_colors": {
+        'felt_outline': '#000000',
+        'felt_center_hole': '#0000A0',
+        'felt_engraving': '#A00000',
+        'card_outline': '#0000FF',
+        'card_center_hole': '#00A0FF',
+        'card_engraving': '#A000A0',
+        'leather_outline': '#FF0000',
+        'leather_center_hole': '#00E000',
+        'leather_engraving': '#FF8000',
+        'exact_size_outline': '#D0D000',
+        'exact_size_center_hole': '#A0A000',
+        'exact_size_engraving': '#BB7784'
+    },
+    # Laser speeds per layer (mm/s), used for the job time estimate
+    "layer_speeds": {
+        'felt_outline': 20.0,
+        'felt_center_hole': 20.0,
+        'felt_engraving': 100.0,
+        'card_outline': 15.0,
+        'card_center_hole': 15.0,
+        'card_engraving': 100.0,
+        'leather_outline': 25.0,
+        'leather_center_hole': 25.0,
+        'leather_engraving': 100.0,
+        'exact_size_outline': 20.0,
+        'exact_size_center_hole': 20.0,
+        'exact_size_engraving': 100.0
+    },
+    "travel_speed": 300.0,
+    "pierce_time": 0.05
+}
+
+SETTINGS_FILE = "app_settings.json"
+
+def load_settings(file_path=SETTINGS_FILE):
+    if os.path.exists(file_path):
+        try:
+            with open(file_path, 'r') as f:
+                loaded_settings = json.load(f)
+                settings = DEFAULT_SETTINGS.copy()
+                
+                if "key_layout" not in loaded_settings:
+                    loaded_settings["key_layout"] = settings["key_layout"].copy()
+
+                for key, default_value in DEFAULT_SETTINGS.items():
+                    if key in loaded_settings:
+                        if isinstance(default_value, dict):
+                            settings[key] = default_value.copy()
+                            settings[key].update(loaded_settings[key])
+                        else:
+                            settings[key] = loaded_settings[key]
+                
+                return settings
+        except (json.JSONDecodeError, TypeError):
+            return DEFAULT_SETTINGS.copy()
+    return DEFAULT_SETTINGS.copy()
+
+# --- Settings Snapshot ---
+
+# Settings that only accept a fixed set of values
+SETTING_CHOICES = {
+    "units": ("in", "cm", "mm"),
+    "felt_thickness_unit": ("in", "mm"),
+    "storage_backend": ("json", "sqlite"),
+}
+
+class SettingsError(ValueError):
+    pass
+
+def validate_settings(settings):
+    """
+    Checks a settings dict against DEFAULT_SETTINGS and returns a complete deep copy.
+    Missing keys fall back to the defaults; values of the wrong type raise SettingsError.
+    """
+    values = {}
+    for key, default_value in DEFAULT_SETTINGS.items():
+        value = settings.get(key, default_value)
+        
+        if isinstance(default_value, dict):
+            if not isinstance(value, dict):
+                raise SettingsError(f"Setting '{key}' must be a group of settings, got {value!r}.")
+            merged = copy.deepcopy(default_value)
+            merged.update(copy.deepcopy(value))
+            value = merged
+        elif isinstance(default_value, bool):
+            if not isinstance(value, bool):
+                raise SettingsError(f"Setting '{key}' must be true or false, got {value!r}.")
+        elif isinstance(default_value, (int, float)):
+            if isinstance(value, bool):
+                raise SettingsError(f"Setting '{key}' must be a number, got {value!r}.")
+            try:
+                value = type(default_value)(value)
+            except (ValueError, TypeError):
+                raise SettingsError(f"Setting '{key}' must be a number, got {value!r}.")
+        elif isinstance(default_value, str):
+            value = str(value)
+        
+        if key in SETTING_CHOICES and value not in SETTING_CHOICES[key]:
+            raise SettingsError(f"Setting '{key}' must be one of {', '.join(SETTING_CHOICES[key])}, got {value!r}.")
+        values[key] = value
+    return values
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return types.MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    return value
+
+def _thaw(value):
+    if isinstance(value, types.MappingProxyType):
+        return {k: _thaw(v) for k, v in value.items()}
+    return value
+
+class SettingsSnapshot:
+    """
+    Frozen, validated copy of the settings for one generation run.
+    Read settings as attributes (snapshot.dart_threshold); the names match the
+    DEFAULT_SETTINGS keys. Nested groups are read-only copies, so edits made in
+    the GUI while a run is going can't leak into it. Safe to pickle.
+    """
+    __slots__ = tuple(DEFAULT_SETTINGS) + ('_sizing_tables',)
+
+    def __init__(self, values):
+        for key in DEFAULT_SETTINGS:
+            object.__setattr__(self, key, _freeze(values[key]))
+        object.__setattr__(self, '_sizing_tables', {})
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(validate_settings(settings))
+
+    @classmethod
+    def coerce(cls, settings):
+        """Returns settings unchanged if it is already a snapshot."""
+        if isinstance(settings, cls):
+            return settings
+        return cls.from_settings(settings)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SettingsSnapshot is read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError("SettingsSnapshot is read-only")
+
+    def __reduce__(self):
+        return (SettingsSnapshot, (self.to_dict(),))
+
+    def to_dict(self):
+        return {key: _thaw(getattr(self, key)) for key in DEFAULT_SETTINGS}
+
+    def sizing_table(self, material):
+        # The snapshot never changes, so its tables never need invalidating
+        table = self._sizing_tables.get(material)
+        if table is None:
+            table = SizingTable(material, self)
+            self._sizing_tables[material] = table
+        return table
+
+
+# ==========================================
+# SECTION 2: LOGIC & MATH
+# ==========================================
+
+def star_points(cx, cy, outer_r, inner_r, num_points=12, shape_factor=0.0):
+    """
+    Yields the (x, y) points of a smooth Sine Wave (Flower) shape.
+    shape_factor: 0.0 = Sine, 1.0 = Flattened (Square-ish)
+    """
+    avg_r = (outer_r + inner_r) / 2.0
+    amplitude = (outer_r - inner_r) / 2.0
+    
+    steps = int(num_points * 8) 
+    if steps < 64: steps = 64
+    
+    angle_step = (2 * math.pi) / steps
+
+    # Calculate power for shaping. 
+    power = 1.0 - (0.9 * shape_factor)
+
+    for i in range(steps + 1):
+        theta = i * angle_step
+        
+        # Raw Sine Wave (-1 to 1)
+        raw_wave = math.cos(num_points * theta)
+        
+        # Apply Shaping: sign * |raw|^power
+        shaped_wave = (1 if raw_wave >= 0 else -1) * (abs(raw_wave) ** power)
+        
+        r = avg_r + amplitude * shaped_wave
+        
+        yield cx + r * math.cos(theta), cy + r * math.sin(theta)
+
+def calculate_star_path(cx, cy, outer_r, inner_r, num_points=12, shape_factor=0.0):
+    """
+    Generates an SVG path string for a smooth Sine Wave (Flower) shape.
+    shape_factor: 0.0 = Sine, 1.0 = Flattened (Square-ish)
+    """
+    path_data = []
+    
+    for i, (x, y) in enumerate(star_points(cx, cy, outer_r, inner_r, num_points, shape_factor)):
+        command = "M" if i == 0 else "L"
+        path_data.append(f"{command} {x:.3f} {y:.3f}")
+        
+    path_data.append("Z") 
+    return " ".join(path_data)
+
+@functools.lru_cache(maxsize=512)
+def star_path_length(outer_r, inner_r, num_points, shape_factor):
+    """Length of the star outline in mm. Star pads repeat per size, so this is cached."""
+    points = list(star_points(0.0, 0.0, outer_r, inner_r, num_points, shape_factor))
+    return sum(math.dist(a, b) for a, b in zip(points, points[1:]))
+
+class SizingTable:
+    """
+    Disc diameters for one material, compiled once from a SettingsSnapshot.
+    Each pad size is only worked out once.
+    """
+    def __init__(self, material, settings):
+        self.material = material
+        self.felt_offset = settings.felt_offset
+        self.card_offset = settings.felt_offset + settings.card_to_felt_offset
+        self.wrap_multiplier = settings.leather_wrap_multiplier
+        self.dart_threshold = settings.dart_threshold
+        self.darts_enabled = settings.darts_enabled
+        self.dart_wrap_bonus = settings.dart_wrap_bonus
+        self.felt_thickness_mm = get_felt_thickness_mm(settings)
+        self._diameters = {}
+
+    def diameter(self, pad_size):
+        try:
+            return self._diameters[pad_size]
+        except KeyError:
+            diameter = self._compute(pad_size)
+            self._diameters[pad_size] = diameter
+            return diameter
+
+    def diameters(self, pad_sizes):
+        """Batch version of diameter() for a list of pad sizes."""
+        lookup = self._diameters
+        return [lookup[size] if size in lookup else self.diameter(size) for size in pad_sizes]
+
+    def _compute(self, pad_size):
+        material = self.material
+        if material == 'felt': return pad_size - self.felt_offset
+        if material == 'card': return pad_size - self.card_offset
+        if material == 'exact_size': return pad_size
+        
+        if material == 'leather':
+            if self.darts_enabled and pad_size < self.dart_threshold:
+                # DART BOOST: Add extra wrap for stars
+                wrap = leather_back_wrap(pad_size, self.wrap_multiplier, extra_base=self.dart_wrap_bonus)
+            else:
+                # Standard Wrap
+                wrap = leather_back_wrap(pad_size, self.wrap_multiplier)
+                
+            diameter = pad_size + 2 * (self.felt_thickness_mm + wrap)
+            return round(diameter * 2) / 2
+            
+        return 0
+
+def get_sizing_table(material, settings):
+    """The SizingTable for a SettingsSnapshot. Each snapshot compiles its own, so edited settings never see a stale one."""
+    return settings.sizing_table(material)
+
+def get_disc_diameter(pad_size, material, settings):
+    """Disc diameter in mm for one pad, from the same sizing table the GUI and build_svg use."""
+    return get_sizing_table(material, SettingsSnapshot.coerce(settings)).diameter(pad_size)
+
+def check_for_oversized_engravings(pads, material_vars, settings, hole_dia_preset=0):
+    settings = SettingsSnapshot.coerce(settings)
+    oversized = {}
+    for material, var in material_vars.items():
+        if not var.get(): continue
+        
+        font_size = settings.engraving_font_size.get(material, 2.0)
+        oversized_sizes = set()
+
+        sizing = get_sizing_table(material, settings)
+
+        for pad in pads:
+            pad_size = pad['size']
+            engraving_settings = get_engraving_settings(pad_size, material, settings)
+            if engraving_settings is None:
+                continue
+
+            diameter = sizing.diameter(pad_size)
+            hole_dia = hole_dia_preset if should_have_center_hole(pad_size, hole_dia_preset, settings) else 0
+            if not engraving_fits(pad_size, diameter / 2, hole_dia, font_size, engraving_settings):
+                oversized_sizes.add(pad_size)
+        
+        if oversized_sizes:
+            oversized[material] = oversized_sizes
+    return oversized
+
+def leather_back_wrap(pad_size, multiplier, extra_base=0.0):
+    base_wrap = 0
+    if pad_size >= 45:
+        base_wrap = 3.2
+    elif pad_size >= 12:
+        base_wrap = 1.2 + (pad_size - 12) * (2.0 / 33.0)
+    elif pad_size >= 6:
+        base_wrap = 1.0 + (pad_size - 6) * (0.2 / 6.0)
+    else:
+        base_wrap = 1.0
+        
+    # Apply the Dart Bonus (if any) before multiplier
+    total_base = base_wrap + extra_base
+    return total_base * multiplier
+
+# The helpers below take a SettingsSnapshot and read it by attribute.
+
+def should_have_center_hole(pad_size, hole_dia, settings):
+    return hole_dia > 0 and pad_size >= settings.min_hole_size
+
+def get_felt_thickness_mm(settings):
+    thickness = settings.felt_thickness
+    if settings.felt_thickness_unit == "in":
+        return thickness * 25.4
+    return thickness
+
+def is_dart_pad(pad_size, material, settings):
+    return material == 'leather' and settings.darts_enabled and pad_size < settings.dart_threshold
+
+def get_star_radii(pad_size, r, settings):
+    """
+    Returns (inner_r, num_points) for a star pad whose tips sit on radius r.
+    """
+    felt_thick = get_felt_thickness_mm(settings)
+    overwrap = settings.dart_overwrap
+    
+    # 1. Inner Radius (Valley) - Safe Zone
+    felt_r = (pad_size - settings.felt_offset) / 2
+    inner_r = felt_r + felt_thick + overwrap
+    
+    # Safety Check
+    if inner_r >= r:
+         inner_r = r - 0.2 
+    
+    # 2. Dynamic Points
+    circumference = 2 * math.pi * inner_r
+    freq_mult = settings.dart_frequency_multiplier
+    num_points = int((circumference / 3.5) * freq_mult)
+    if num_points < 12: num_points = 12 
+    if num_points % 2 != 0: num_points += 1 
+    
+    return inner_r, num_points
+
+def get_engraving_settings(pad_size, material, settings):
+    """
+    Returns the {"mode", "value"} placement for this pad's label, or None if labels are off.
+    Star pads use their own placement settings.
+    """
+    if is_dart_pad(pad_size, material, settings):
+        if settings.dart_engraving_on:
+            return settings.dart_engraving_loc
+        return None
+    if settings.engraving_on:
+        return settings.engraving_location[material]
+    return None
+
+def get_engraving_text(pad_size):
+    return f"{pad_size:.1f}".rstrip('0').rstrip('.')
+
+def get_engraving_offset(engraving_settings, r, hole_dia):
+    """Distance from the pad centre up to the middle of the label."""
+    mode = engraving_settings['mode']
+    value = engraving_settings['value']
+    
+    if mode == 'from_outside':
+        return r - value
+    elif mode == 'from_inside':
+        hole_r = hole_dia / 2 if hole_dia > 0 else 0
+        return hole_r + value
+    else: # centered
+        hole_r = hole_dia / 2 if hole_dia > 0 else 1.75
+        return (r + hole_r) / 2
+
+def engraving_fits(pad_size, r, hole_dia, font_size, engraving_settings):
+    """
+    Checks the measured label box against the disc: it must stay inside the
+    outline and must not run into the center hole.
+    """
+    width, height = stroke_font.measure_text(get_engraving_text(pad_size), font_size)
+    offset = get_engraving_offset(engraving_settings, r, hole_dia)
+    
+    # Furthest corner of the label box from the pad centre
+    far_y = abs(offset) + height / 2
+    if math.hypot(width / 2, far_y) > r:
+        return False
+    
+    # Nearest edge of the label box to the pad centre
+    if hole_dia > 0 and abs(offset) - height / 2 < hole_dia / 2:
+        return False
+    
+    return True
+
+def get_pad_engraving(pad_size, material, r, hole_dia, settings):
+    """
+    Returns (text, font_size, offset) for this pad's label, or None if labels are
+    off or the label doesn't fit. offset is measured up from the pad centre.
+    """
+    engraving_settings = get_engraving_settings(pad_size, material, settings)
+    if engraving_settings is None:
+        return None
+    
+    font_size = settings.engraving_font_size.get(material, 2.0)
+    
+    # Safety Check: Don't engrave if the measured label doesn't fit on the pad
+    if not engraving_fits(pad_size, r, hole_dia, font_size, engraving_settings):
+        return None
+    
+    return get_engraving_text(pad_size), font_size, get_engraving_offset(engraving_settings, r, hole_dia)
+
+class GenerationCancelled(Exception):
+    """Raised from a progress callback to stop nesting or drawing part-way."""
+
+def nest_discs(pads, material, width_mm, height_mm, settings, progress=None):
+    """
+    Places every disc on the sheet, largest first.
+    Returns a list of (pad_size, cx, cy, r); discs that don't fit are left out.
+    progress(done, total) is called after each disc and may raise GenerationCancelled.
+    """
+    settings = SettingsSnapshot.coerce(settings)
+    spacing_mm = 1.0
+    discs = []
+
+    diameters = get_sizing_table(material, settings).diameters([pad['size'] for pad in pads])
+    for pad, diameter in zip(pads, diameters):
+        for _ in range(pad['qty']): discs.append((pad['size'], diameter))
+
+    discs.sort(key=lambda x: -x[1])
+    placed = []
+    for done, (pad_size, dia) in enumerate(discs, 1):
+        r = dia / 2
+        placed_successfully = False
+        y = spacing_mm
+        while y + dia + spacing_mm <= height_mm and not placed_successfully:
+            x = spacing_mm
+            while x + dia + spacing_mm <= width_mm:
+                cx, cy = x + r, y + r
+                # Check collision using standard circle r
+                blocker = next((p for p in placed if (cx - p[1])**2 + (cy - p[2])**2 < (r + p[3] + spacing_mm)**2), None)
+                if blocker is None:
+                    placed.append((pad_size, cx, cy, r))
+                    placed_successfully = True
+                    break
+                # Every 1mm step until we clear the blocking disc on this row collides too, so skip them
+                _, px, py, pr = blocker
+                reach = math.sqrt((r + pr + spacing_mm)**2 - (cy - py)**2)
+                x += max(1, math.floor(px + reach - cx - 1e-9))
+            y += 1
+        if progress:
+            progress(done, len(discs))
+    
+    return placed
+
+def parse_pad_list(pad_input):
+    """Parses 'size x qty' lines (e.g. '42.0x3'); lines that don't parse are skipped."""
+    pad_list = []
+    for line in pad_input.strip().splitlines():
+        try:
+            size, qty = map(float, line.strip().lower().split('x'))
+            pad_list.append({'size': size, 'qty': int(qty)})
+        except ValueError:
+            continue
+    return pad_list
+
+def parse_sheet_size(text, default_units="in"):
+    """
+    Parses a sheet size like '13.5x10in', '340x250mm' or '13.5x10' (default_units).
+    Returns (width_mm, height_mm); raises ValueError if it can't be read.
+    """
+    match = re.fullmatch(r"\s*([\d.]+)\s*[xX]\s*([\d.]+)\s*(in|cm|mm)?\s*", text)
+    if not match:
+        raise ValueError(f"Invalid sheet size '{text}'. Use e.g. 13.5x10in or 340x250mm.")
+    sheet_mm = sheet_size_to_mm(float(match.group(1)), float(match.group(2)), match.group(3) or default_units)
+    if sheet_mm is None:
+        raise ValueError(f"Unknown unit '{default_units}'.")
+    return sheet_mm
+
+def get_hole_dia(hole_option, custom_hole_size="4.0"):
+    """
+    Center hole diameter in mm for a hole option ('No center holes', '3.0mm',
+    '3.5mm' or 'Custom'). Raises ValueError if the custom size isn't a number.
+    """
+    if hole_option == "3.5mm": return 3.5
+    if hole_option == "3.0mm": return 3.0
+    if hole_option == "Custom":
+        return float(custom_hole_size)
+    return 0
+
+def sheet_size_to_mm(width_val, height_val, units):
+    """Returns (width_mm, height_mm), or None for an unknown unit."""
+    if units == 'in':
+        return width_val * 25.4, height_val * 25.4
+    elif units == 'cm':
+        return width_val * 10, height_val * 10
+    elif units == 'mm':
+        return width_val, height_val
+    return None
+
+def count_discs(pads):
+    return sum(pad['qty'] for pad in pads)
+
+def can_all_pads_fit(pads, material, width_mm, height_mm, settings):
+    settings = SettingsSnapshot.coerce(settings)
+    return len(nest_discs(pads, material, width_mm, height_mm, settings)) == count_discs(pads)
+
+def generate_svg(pads, material, width_mm, height_mm, filename, hole_dia_preset, settings, placed=None, progress=None):
+    """
+    Writes the cut file for one material and returns the layout that was drawn.
+    Pass 'placed' (from nest_discs) to reuse a layout that was already nested.
+    """
+    dwg, placed = build_svg(pads, material, width_mm, height_mm, hole_dia_preset, settings, placed, filename, progress)
+    dwg.save()
+    return placed
+
+# Without a viewBox an SVG's user unit is the CSS px (96 per inch). Paths are built
+# from numbers in mm, so in that mode they go in a group scaled from mm to px.
+MM_TO_PX = 96 / 25.4
+
+def build_svg(pads, material, width_mm, height_mm, hole_dia_preset, settings, placed=None, filename="noname.svg", progress=None):
+    """
+    Builds the cut drawing for one material without saving it. Returns (drawing, placed).
+    progress(done, total) is called after each disc is drawn and may raise GenerationCancelled.
+    """
+    settings = SettingsSnapshot.coerce(settings)
+    if placed is None:
+        placed = nest_discs(pads, material, width_mm, height_mm, settings)
+
+    compatibility_mode = settings.compatibility_mode
+    
+    if compatibility_mode:
+        dwg = svgwrite.Drawing(filename, size=(f"{width_mm}mm", f"{height_mm}mm"), viewBox=f"0 0 {width_mm} {height_mm}")
+        stroke_w = 0.1
+        mm_paths = dwg # The viewBox already makes one user unit a mm
+    else:
+        dwg = svgwrite.Drawing(filename, size=(f"{width_mm}mm", f"{height_mm}mm"), profile='tiny')
+        stroke_w = '0.1mm'
+        mm_paths = dwg.add(dwg.g(transform=f"scale({MM_TO_PX})"))
+    path_stroke_w = 0.1 # Stars and labels: mm, in either mode
+
+    layer_colors = settings.layer_colors
+
+    for done, (pad_size, cx, cy, r) in enumerate(placed, 1):
+        
+        is_dart = is_dart_pad(pad_size, material, settings)
+        
+        if is_dart:
+            # --- STAR LOGIC ---
+            # 'r' is the full Boosted radius from the sizing table, so the tips sit on it
+            inner_r, num_points = get_star_radii(pad_size, r, settings)
+            shape_factor = settings.dart_shape_factor
+            
+            path_d = calculate_star_path(cx, cy, r, inner_r, num_points=num_points, shape_factor=shape_factor)
+            
+            mm_paths.add(dwg.path(d=path_d, stroke=layer_colors[f'{material}_outline'], fill='none', stroke_width=path_stroke_w))
+        else:
+            # --- STANDARD CIRCLE LOGIC ---
+            if compatibility_mode:
+                dwg.add(dwg.circle(center=(cx, cy), r=r, stroke=layer_colors[f'{material}_outline'], fill='none', stroke_width=stroke_w))
+            else:
+                dwg.add(dwg.circle(center=(f"{cx}mm", f"{cy}mm"), r=f"{r}mm", stroke=layer_colors[f'{material}_outline'], fill='none', stroke_width=stroke_w))
+
+        hole_dia = 0
+        if should_have_center_hole(pad_size, hole_dia_preset, settings):
+            hole_dia = hole_dia_preset
+
+        if hole_dia > 0:
+            if compatibility_mode:
+                dwg.add(dwg.circle(center=(cx, cy), r=hole_dia / 2, stroke=layer_colors[f'{material}_center_hole'], fill='none', stroke_width=stroke_w))
+            else:
+                dwg.add(dwg.circle(center=(f"{cx}mm", f"{cy}mm"), r=f"{hole_dia / 2}mm", stroke=layer_colors[f'{material}_center_hole'], fill='none', stroke_width=stroke_w))
+
+        # --- Engraving (Standard vs Star settings are picked inside) ---
+        engraving = get_pad_engraving(pad_size, material, r, hole_dia, settings)
+        
+        if engraving is not None:
+            text_content, font_size, offset = engraving
+            
+            # Single-stroke vector label so LightBurn can line-engrave it instead of filling a raster
+            path_d = stroke_font.text_path(text_content, font_size, cx, cy - offset)
+            mm_paths.add(dwg.path(d=path_d, stroke=layer_colors[f'{material}_engraving'], fill='none', stroke_width=path_stroke_w))
+
+        if progress:
+            progress(done, len(placed))
+        
+    return dwg, placed
+
+# --- Job Time Estimate ---
+def estimate_job(placed, material, hole_dia_preset, settings):
+    """
+    Estimates cut/engrave lengths, pierces, travel and machine time for one
+    nested sheet, straight from the layout (no SVG parsing).
+    Layers are assumed to run engraving, then center holes, then outlines.
+    """
+    settings = SettingsSnapshot.coerce(settings)
+    speeds = settings.layer_speeds
+    shape_factor = settings.dart_shape_factor
+
+    circle_radii = []
+    star_length = 0.0
+    hole_radii = []
+    engrave_length = 0.0
+    # Each move is a (start, end) point; circles start and end at their rightmost point
+    moves = {'engraving': [], 'center_hole': [], 'outline': []}
+
+    for pad_size, cx, cy, r in placed:
+        if is_dart_pad(pad_size, material, settings):
+            inner_r, num_points = get_star_radii(pad_size, r, settings)
+            star_length += star_path_length(r, inner_r, num_points, shape_factor)
+        else:
+            circle_radii.append(r)
+        moves['outline'].append(((cx + r, cy), (cx + r, cy)))
+
+        hole_dia = hole_dia_preset if should_have_center_hole(pad_size, hole_dia_preset, settings) else 0
+        if hole_dia > 0:
+            hole_radii.append(hole_dia / 2)
+            moves['center_hole'].append(((cx + hole_dia / 2, cy), (cx + hole_dia / 2, cy)))
+
+        engraving = get_pad_engraving(pad_size, material, r, hole_dia, settings)
+        if engraving is not None:
+            text_content, font_size, offset = engraving
+            strokes, _, _, length = stroke_font.layout_text(text_content, font_size)
+            engrave_length += length
+            ey = cy - offset
+            for stroke in strokes:
+                (x1, y1), (x2, y2) = stroke[0], stroke[-1]
+                moves['engraving'].append(((cx + x1, ey + y1), (cx + x2, ey + y2)))
+
+    outline_length = 2 * math.pi * math.fsum(circle_radii) + star_length
+    hole_length = 2 * math.pi * math.fsum(hole_radii)
+
+    travel = 0.0
+    position = (0.0, 0.0)
+    for layer in ('engraving', 'center_hole', 'outline'):
+        for start, end in moves[layer]:
+            travel += math.dist(position, start)
+            position = end
+    pierces = sum(len(layer_moves) for layer_moves in moves.values())
+
+    def layer_time(length, layer):
+        speed = speeds.get(f'{material}_{layer}', 0)
+        return length / speed if speed > 0 else 0.0
+
+    travel_speed = settings.travel_speed
+    seconds = (layer_time(outline_length, 'outline')
+               + layer_time(hole_length, 'center_hole')
+               + layer_time(engrave_length, 'engraving')
+               + (travel / travel_speed if travel_speed > 0 else 0.0)
+               + pierces * settings.pierce_time)
+
+    return {
+        "material": material,
+        "discs": len(placed),
+        "cut_length_mm": outline_length + hole_length,
+        "engrave_length_mm": engrave_length,
+        "pierces": pierces,
+        "travel_mm": travel,
+        "seconds": seconds,
+    }
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m {seconds:02d}s"
+    return f"{minutes}m {seconds:02d}s"
+
+def format_job_estimate(estimate):
+    return (f"{estimate['material'].replace('_', ' ').capitalize()}: ~{format_duration(estimate['seconds'])} "
+            f"(cut {estimate['cut_length_mm']:.0f} mm, engrave {estimate['engrave_length_mm']:.0f} mm, "
+            f"{estimate['pierces']} pierces, travel {estimate['travel_mm']:.0f} mm)")
+
+def write_job_report(file_path, job_name, width_mm, height_mm, estimates):
+    total = sum(e['seconds'] for e in estimates)
+    lines = [
+        f"Job: {job_name}",
+        f"Sheet: {width_mm:.1f} x {height_mm:.1f} mm",
+        "",
+    ]
+    for e in estimates:
+        lines.append(f"[{e['material']}]")
+        lines.append(f"  Discs:          {e['discs']}")
+        lines.append(f"  Cut length:     {e['cut_length_mm']:.1f} mm")
+        lines.append(f"  Engrave length: {e['engrave_length_mm']:.1f} mm")
+        lines.append(f"  Pierces:        {e['pierces']}")
+        lines.append(f"  Travel:         {e['travel_mm']:.1f} mm")
+        lines.append(f"  Est. time:      {format_duration(e['seconds'])}")
+        lines.append("")
+    lines.append(f"Total est. time: {format_duration(total)}")
+    lines.append("Estimates use the laser speeds from Options > Laser Speeds and are approximate.")
+    
+    with open(file_path, 'w') as f:
+        f.write("\n".join(lines) + "\n")
+
+# --- Headless Jobs ---
+def run_job(pads, materials, width_mm, height_mm, hole_dia, settings, out_dir, base):
+    """
+    Nests, writes and estimates one job without any GUI.
+    Writes <base>_<material>.svg and <base>_report.txt into out_dir, but only
+    once every material has been checked to fit.
+    Returns a result dict; 'status' is 'ok' or 'error'.
+    """
+    t_start = time.perf_counter()
+    settings = SettingsSnapshot.coerce(settings)
+    total = count_discs(pads)
+    result = {
+        "status": "ok",
+        "job": base,
+        "sheet_mm": [width_mm, height_mm],
+        "pads": total,
+        "files": [],
+        "materials": {},
+        "timing_ms": {},
+    }
+
+    layouts = {}
+    for material in materials:
+        if material not in MATERIALS:
+            result["status"] = "error"
+            result["error"] = f"Unknown material '{material}'."
+            return result
+        layouts[material] = nest_discs(pads, material, width_mm, height_mm, settings)
+    t_nested = time.perf_counter()
+
+    for material, placed in layouts.items():
+        disc_area = sum(math.pi * r * r for _, _, _, r in placed)
+        result["materials"][material] = {
+            "placed": len(placed),
+            "fits": len(placed) == total,
+            "utilisation": disc_area / (width_mm * height_mm),
+        }
+    unfit = [m for m, info in result["materials"].items() if not info["fits"]]
+    if not pads:
+        result["status"] = "error"
+        result["error"] = "No valid pad sizes entered."
+    elif unfit:
+        result["status"] = "error"
+        result["error"] = f"Could not fit all pieces on the sheet for: {', '.join(unfit)}."
+
+    if result["status"] == "ok":
+        os.makedirs(out_dir, exist_ok=True)
+        estimates = []
+        for material, placed in layouts.items():
+            filename = os.path.join(out_dir, f"{base}_{material}.svg")
+            generate_svg(pads, material, width_mm, height_mm, filename, hole_dia, settings, placed=placed)
+            estimate = estimate_job(placed, material, hole_dia, settings)
+            estimates.append(estimate)
+            result["files"].append(filename)
+            result["materials"][material]["estimate"] = estimate
+        report_path = os.path.join(out_dir, f"{base}_report.txt")
+        write_job_report(report_path, base, width_mm, height_mm, estimates)
+        result["files"].append(report_path)
+    t_written = time.perf_counter()
+
+    result["timing_ms"] = {
+        "nest": (t_nested - t_start) * 1000,
+        "write": (t_written - t_nested) * 1000,
+        "total": (t_written - t_start) * 1000,
+    }
+    return result
@@ -0,0 +1,259 @@
+# screw_index.py
+# Screw and rod specs made searchable across every maker and model.
+# No tkinter here; the Screw Specs tab searches it.
+#
+# Each part of a spec ('pivot_small', 'hinge_med', ...) has a free-text thread
+# ('<part>_th') and diameter ('<part>_dia'). They are read into numbers:
+#   metric threads   'M1.6x0.35', 'M1.6 x .35', 'm2' (coarse pitch filled in)
+#   unified threads  '2-56', '#2-56 UNC', '1/16-64' (UNC/UNF named from the size and TPI)
+#   bare values      '0.35 pitch' or '0.35' (metric pitch), '56 TPI' or '56'
+#   diameters        '2.4', '2.4mm', 'Ø2.4 mm', '.094"', '3/32 in' (all kept in mm)
+#
+# ScrewIndex keeps an inverted index of thread keys -> parts, and every part's
+# diameter in one sorted list for bisect range queries. Like the key height
+# indexes, it is updated from the (maker, model) change lists given to the store,
+# through library_store.apply_change_list.
+
+import bisect
+import re
+from collections import namedtuple
+
+MM_PER_INCH = 25.4
+
+# (label, field prefix) in the order the Screw Specs tab shows them
+SCREW_PARTS = [
+    ("Neck Receiver Screw", "neck_screw"),
+    ("Hinge Rod Tiny",   "hinge_tiny"),
+    ("Hinge Rod Small",  "hinge_small"),
+    ("Hinge Rod Medium", "hinge_med"),
+    ("Hinge Rod Large",  "hinge_lrg"),
+    ("Pivot Screw Small","pivot_small"),
+    ("Pivot Screw Large","pivot_lrg"),
+]
+PART_LABELS = dict((prefix, label) for label, prefix in SCREW_PARTS)
+
+# Query filters: a part type matches every prefix that starts with it
+PART_TYPES = {"Any Part": "", "Neck Screw": "neck", "Hinge Rod": "hinge", "Pivot Screw": "pivot"}
+
+DEFAULT_TOLERANCE_MM = 0.05
+MAX_RESULTS = 200
+
+# ISO coarse pitches for the small metric sizes, for a thread given as just 'M2'
+METRIC_COARSE_PITCH = {
+    1.0: 0.25, 1.1: 0.25, 1.2: 0.25, 1.4: 0.3, 1.6: 0.35, 1.8: 0.35, 2.0: 0.4, 2.2: 0.45,
+    2.5: 0.45, 3.0: 0.5, 3.5: 0.6, 4.0: 0.7, 5.0: 0.8, 6.0: 1.0,
+}
+
+# Unified number sizes: (coarse TPI, fine TPI); #0 only comes fine
+UNIFIED_NUMBER_TPI = {
+    0: (None, 80), 1: (64, 72), 2: (56, 64), 3: (48, 56), 4: (40, 48), 5: (40, 44),
+    6: (32, 40), 8: (32, 36), 10: (24, 32), 12: (24, 28),
+}
+UNIFIED_FRACTION_TPI = {"1/4": (20, 28), "5/16": (18, 24), "3/8": (16, 24)}
+
+# Diameter (mm), pitch (mm) or TPI, and a label that is the same however the thread was written
+ThreadSpec = namedtuple('ThreadSpec', ['label', 'diameter', 'pitch', 'tpi'])
+PartSpec = namedtuple('PartSpec', ['thread', 'diameter'])
+
+_NUMBER = r"(\d*\.\d+|\d+)"
+_METRIC = re.compile(r"(?<![a-z0-9])m\s*" + _NUMBER + r"(?:\s*[x×*]\s*" + _NUMBER + r")?", re.I)
+_UNIFIED = re.compile(r"(?<![\d./])#?\s*(\d+/\d+|\d{1,2})\s*-\s*(\d{2,3})(?!\d)")
+_TPI = re.compile(_NUMBER + r"\s*tpi\b", re.I)
+_PITCH = re.compile(r"(?:(?<![a-z])p(?:itch)?\s*" + _NUMBER + r"|" + _NUMBER + r"\s*(?:mm\s*)?pitch)", re.I)
+_BARE = re.compile(r"^\s*" + _NUMBER + r"\s*$")
+_DIAMETER = re.compile(r"(\d+/\d+|\d*\.\d+|\d+)\s*(mm|in\b|inch|\"|'')?", re.I)
+
+
+def _mm(value):
+    return round(value, 3)
+
+def _g(value):
+    return f"{value:g}"
+
+def _fraction(text):
+    top, bottom = text.split("/")
+    return int(top) / int(bottom) if int(bottom) else None
+
+
+# --- Parsing ---
+def metric_thread(diameter, pitch=None):
+    diameter = _mm(diameter)
+    if pitch is None:
+        pitch = METRIC_COARSE_PITCH.get(diameter)
+    if pitch is None:
+        return ThreadSpec(f"M{_g(diameter)}", diameter, None, None)
+    pitch = _mm(pitch)
+    return ThreadSpec(f"M{_g(diameter)}x{_g(pitch)}", diameter, pitch, None)
+
+def unified_thread(size, tpi):
+    """size is a number size ('2') or a fraction of an inch ('1/16')."""
+    if "/" in size:
+        inches = _fraction(size)
+        name = size
+        series = UNIFIED_FRACTION_TPI.get(size)
+    else:
+        inches = 0.060 + 0.013 * int(size)
+        name = f"#{int(size)}"
+        series = UNIFIED_NUMBER_TPI.get(int(size))
+    if not inches:
+        return None
+    label = f"{name}-{tpi}"
+    if series and tpi in series:
+        label += " UNC" if tpi == series[0] else " UNF"
+    return ThreadSpec(label, _mm(inches * MM_PER_INCH), None, tpi)
+
+def parse_thread(text):
+    """ThreadSpec for a thread field, or None when it can't be read."""
+    text = str(text or "").strip()
+    if not text:
+        return None
+    match = _METRIC.search(text)
+    if match:
+        return metric_thread(float(match.group(1)), float(match.group(2)) if match.group(2) else None)
+    match = _UNIFIED.search(text)
+    if match:
+        return unified_thread(match.group(1), int(match.group(2)))
+    match = _TPI.search(text)
+    if match:
+        tpi = round(float(match.group(1)))
+        return ThreadSpec(f"{tpi} TPI", None, None, tpi)
+    match = _PITCH.search(text)
+    if match:
+        pitch = _mm(float(match.group(1) or match.group(2)))
+        return ThreadSpec(f"P{_g(pitch)}", None, pitch, None)
+    match = _BARE.match(text)
+    if match:
+        # A lone number in the Threads / Pitch column: a small one is a pitch, a whole one a TPI
+        value = float(match.group(1))
+        if value < 2:
+            return ThreadSpec(f"P{_g(_mm(value))}", None, _mm(value), None)
+        if value == int(value) and value >= 10:
+            return ThreadSpec(f"{int(value)} TPI", None, None, int(value))
+    return None
+
+def parse_diameter(text):
+    """A diameter field in mm (first number; inches when marked with in, inch or \"), or None."""
+    match = _DIAMETER.search(str(text or ""))
+    if not match:
+        return None
+    number, unit = match.groups()
+    value = _fraction(number) if "/" in number else float(number)
+    if not value:
+        return None
+    if (unit or "").lower() in ("in", "inch", '"', "''") or "/" in number and not unit:
+        value *= MM_PER_INCH
+    return _mm(value)
+
+def thread_keys(thread):
+    """The index keys for a thread: its label, and its pitch or TPI on their own."""
+    keys = [thread.label]
+    if thread.pitch is not None:
+        keys.append(f"P{_g(thread.pitch)}")
+    if thread.tpi is not None:
+        keys.append(f"{thread.tpi} TPI")
+    return list(dict.fromkeys(keys))
+
+def spec_parts(spec):
+    """{prefix: PartSpec} for the parts of one spec with a readable thread or diameter."""
+    parts = {}
+    if not isinstance(spec, dict):
+        return parts
+    for _, prefix in SCREW_PARTS:
+        thread = parse_thread(spec.get(f"{prefix}_th"))
+        diameter = parse_diameter(spec.get(f"{prefix}_dia"))
+        if diameter is None and thread is not None:
+            diameter = thread.diameter # An M1.6 screw is 1.6 mm across
+        if thread is not None or diameter is not None:
+            parts[prefix] = PartSpec(thread, diameter)
+    return parts
+
+
+# --- Index ---
+class ScrewIndex:
+    """Every maker's and model's parts, by thread and by diameter."""
+
+    def __init__(self, specs=()):
+        self.threads = {} # thread key -> {(maker, model, prefix)}
+        self.diameters = [] # sorted (mm, maker, model, prefix)
+        self.parts = {} # (maker, model) -> {prefix: PartSpec}
+        for maker, model, spec in specs:
+            self._add(maker, model, spec, self.diameters.append)
+        self.diameters.sort() # One sort instead of an insort per part
+
+    def __len__(self):
+        return len(self.parts)
+
+    # --- Updates ---
+    def update(self, maker, model, spec):
+        self.remove(maker, model)
+        self._add(maker, model, spec, lambda entry: bisect.insort(self.diameters, entry))
+
+    def _add(self, maker, model, spec, add_diameter):
+        parts = spec_parts(spec)
+        if not parts:
+            return
+        self.parts[(maker, model)] = parts
+        for prefix, part in parts.items():
+            if part.thread is not None:
+                for key in thread_keys(part.thread):
+                    self.threads.setdefault(key.casefold(), set()).add((maker, model, prefix))
+            if part.diameter is not None:
+                add_diameter((part.diameter, maker, model, prefix))
+
+    def remove(self, maker, model):
+        parts = self.parts.pop((maker, model), None)
+        for prefix, part in (parts or {}).items():
+            if part.thread is not None:
+                for key in thread_keys(part.thread):
+                    postings = self.threads[key.casefold()]
+                    postings.discard((maker, model, prefix))
+                    if not postings:
+                        del self.threads[key.casefold()]
+            if part.diameter is not None:
+                entry = (part.diameter, maker, model, prefix)
+                i = bisect.bisect_left(self.diameters, entry)
+                if i < len(self.diameters) and self.diameters[i] == entry:
+                    del self.diameters[i]
+
+    def remove_library(self, maker):
+        for key in [key for key in self.parts if key[0] == maker]:
+            self.remove(*key)
+
+    # --- Queries ---
+    def part(self, maker, model, prefix):
+        return self.parts.get((maker, model), {}).get(prefix)
+
+    def find_thread(self, thread, part_type="", limit=MAX_RESULTS):
+        """[(maker, model, prefix), ...] using a thread (a ThreadSpec or any text parse_thread reads)."""
+        if not isinstance(thread, ThreadSpec):
+            thread = parse_thread(thread)
+        if thread is None:
+            return []
+        found = self.threads.get(thread.label.casefold(), ())
+        hits = sorted(hit for hit in found if hit[2].startswith(part_type))
+        return hits[:limit]
+
+    def find_diameter(self, diameter_mm, tolerance_mm=DEFAULT_TOLERANCE_MM, part_type="", limit=MAX_RESULTS):
+        """[(mm, maker, model, prefix), ...] within tolerance_mm of diameter_mm, closest first."""
+        lo = bisect.bisect_left(self.diameters, (diameter_mm - tolerance_mm - 1e-9,))
+        hi = bisect.bisect_right(self.diameters, (diameter_mm + tolerance_mm + 1e-9, chr(0x10FFFF)))
+        hits = [entry for entry in self.diameters[lo:hi] if entry[3].startswith(part_type)]
+        hits.sort(key=lambda entry: (abs(entry[0] - diameter_mm), entry[1:]))
+        return hits[:limit]
+
+    def search(self, query, tolerance_mm=DEFAULT_TOLERANCE_MM, part_type="", limit=MAX_RESULTS):
+        """
+        (kind, [(maker, model, prefix), ...]) for a query typed in the Screw Specs tab.
+        A thread ('M1.6x0.35', '2-56', '56 TPI') finds parts with that thread, anything
+        else readable as a size ('2.4', '3/32"') finds parts within tolerance_mm of it.
+        kind is 'thread', 'diameter' or '' when the query can't be read.
+        """
+        query = str(query).strip()
+        bare = _BARE.match(query)
+        thread = None if bare else parse_thread(query)
+        if thread is not None:
+            return "thread", self.find_thread(thread, part_type, limit)
+        diameter = parse_diameter(query)
+        if diameter is None:
+            return "", []
+        return "diameter", [entry[1:] for entry in self.find_diameter(diameter, tolerance_mm, part_type, limit)]
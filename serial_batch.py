@@ -0,0 +1,138 @@
+# serial_batch.py
+# Dates a whole inventory CSV of (maker, serial) rows in one pass.
+# Rows are read and written one at a time, so memory use doesn't grow with the file.
+#
+# The output has every input column plus:
+#   matched_maker - the chart the row's maker name resolved to (see maker_names.py)
+#   year        - the single answer lookup_serial_year gives (or the first candidate where
+#                 that scan stops short, e.g. 6-digit Yanagisawa serials)
+#   candidates  - every (series) reading, '; ' separated, for makers that restarted numbering
+#   status      - ok, unknown maker, invalid serial, too old, or missing
+
+import csv
+import os
+import sys
+import time
+
+from serial_lookup import SERIAL_INDEX, parse_serial, format_candidate
+from maker_names import resolve_maker as fuzzy_resolve_maker
+
+OUTPUT_COLUMNS = ["matched_maker", "year", "candidates", "status"]
+
+MAKER_COLUMN_NAMES = ("maker", "manufacturer", "make", "brand")
+SERIAL_COLUMN_NAMES = ("serial", "serial number", "serial_number", "serial no", "sn")
+
+PROGRESS_INTERVAL_S = 0.5
+
+# Distinct maker spellings remembered per run; cleared past this so memory stays flat
+MAX_MAKER_SPELLINGS = 4096
+
+
+def find_column(header, wanted, names):
+    """Index of the wanted column (or the first header matching one of names), or None."""
+    folded = [h.strip().casefold() for h in header]
+    if wanted:
+        return folded.index(wanted.strip().casefold()) if wanted.strip().casefold() in folded else None
+    return next((folded.index(name) for name in names if name in folded), None)
+
+
+class _CountingLines:
+    """Iterates a text file's lines and counts the characters read, for progress."""
+
+    def __init__(self, f):
+        self.f = f
+        self.chars = 0
+
+    def __iter__(self):
+        for line in self.f:
+            self.chars += len(line)
+            yield line
+
+
+def date_row(maker_index, serial_str):
+    """(year, candidates, status) for one row."""
+    if maker_index is None:
+        return "", "", "unknown maker"
+    if not serial_str.strip():
+        return "", "", "missing"
+    serial_num = parse_serial(serial_str)
+    if serial_num is None:
+        return "", "", "invalid serial"
+    candidates = maker_index.candidates(serial_num)
+    if not candidates:
+        return "", "", "too old"
+    year = maker_index.lookup(serial_num) or candidates[0].year
+    return str(year), "; ".join(format_candidate(c) for c in candidates), "ok"
+
+
+def date_inventory(in_file, out_file, maker_column=None, serial_column=None, default_maker=None,
+                   resolve_maker=None, progress=None, total_chars=None):
+    """
+    Streams rows from in_file to out_file (open text files) adding the OUTPUT_COLUMNS.
+    default_maker is used when the file has no maker column.
+    resolve_maker(name) -> canonical maker or None; the default is the fuzzy
+    maker_names.resolve_maker.
+    progress(rows, chars_read, total_chars) is called about twice a second.
+    Returns {status: count}.
+    """
+    if resolve_maker is None:
+        resolve_maker = lambda name: fuzzy_resolve_maker(name)[0]
+
+    lines = _CountingLines(in_file)
+    reader = csv.reader(lines)
+    writer = csv.writer(out_file)
+
+    header = next(reader, None)
+    if header is None:
+        return {}
+    maker_i = find_column(header, maker_column, MAKER_COLUMN_NAMES)
+    serial_i = find_column(header, serial_column, SERIAL_COLUMN_NAMES)
+    if serial_i is None:
+        raise ValueError(f"No serial column found (looked for {serial_column or ', '.join(SERIAL_COLUMN_NAMES)}).")
+    if maker_i is None and not default_maker:
+        raise ValueError(f"No maker column found (looked for {maker_column or ', '.join(MAKER_COLUMN_NAMES)}); give a default maker.")
+    writer.writerow(header + OUTPUT_COLUMNS)
+
+    # Inventories repeat the same few makers, so each distinct spelling is resolved once
+    maker_indexes = {}
+    counts = {}
+    rows = 0
+    next_report = time.monotonic() + PROGRESS_INTERVAL_S
+    for row in reader:
+        maker_name = row[maker_i] if maker_i is not None and maker_i < len(row) else ""
+        if not maker_name.strip() and default_maker:
+            maker_name = default_maker
+        if maker_name not in maker_indexes:
+            if len(maker_indexes) >= MAX_MAKER_SPELLINGS:
+                maker_indexes.clear()
+            canonical = resolve_maker(maker_name)
+            maker_indexes[maker_name] = SERIAL_INDEX.get(canonical) if canonical else None
+        maker_index = maker_indexes[maker_name]
+        serial_str = row[serial_i] if serial_i < len(row) else ""
+
+        year, candidates, status = date_row(maker_index, serial_str)
+        writer.writerow(row + [maker_index.maker if maker_index else "", year, candidates, status])
+        counts[status] = counts.get(status, 0) + 1
+        rows += 1
+
+        if progress and time.monotonic() >= next_report:
+            progress(rows, lines.chars, total_chars)
+            next_report = time.monotonic() + PROGRESS_INTERVAL_S
+
+    if progress:
+        progress(rows, lines.chars, total_chars)
+    return counts
+
+
+def date_inventory_file(in_path, out_path, **kwargs):
+    """date_inventory for file paths ('-' for stdin/stdout)."""
+    total_chars = os.path.getsize(in_path) if in_path != "-" else None
+    in_file = sys.stdin if in_path == "-" else open(in_path, 'r', newline='', encoding='utf-8-sig')
+    out_file = sys.stdout if out_path == "-" else open(out_path, 'w', newline='', encoding='utf-8')
+    try:
+        return date_inventory(in_file, out_file, total_chars=total_chars, **kwargs)
+    finally:
+        if in_file is not sys.stdin:
+            in_file.close()
+        if out_file is not sys.stdout:
+            out_file.close()
@@ -0,0 +1,268 @@
+# serial_db.py
+# Loads the serial charts: the built-in serials.py merged with user tables from
+# serial_tables/ (JSON or CSV). The merged, validated result is compiled to a small
+# binary cache, so later starts only read the cache. It is rebuilt when any source
+# file's mtime or size changes.
+#
+# User table formats (a user table replaces the built-in chart of the same maker):
+#   JSON: {"Maker": [[start_serial, year], ...], ...}
+#   CSV:  header row maker,start,year then one row per entry
+#
+# Cache layout: MAGIC, u32 manifest length, manifest JSON (sources, makers, distinct
+# year values, warnings), then three arrays: per-maker offsets ('I'), start serials
+# ('q') and indexes into the year values ('I').
+
+import array
+import csv
+import importlib.util
+import json
+import os
+import re
+import struct
+import sys
+from collections.abc import Mapping
+
+# Next to the app (the executable in a frozen build), whatever folder it is run from
+APP_DIR = os.path.dirname(sys.executable if getattr(sys, 'frozen', False) else os.path.abspath(__file__))
+USER_SERIAL_DIR = os.path.join(APP_DIR, "serial_tables")
+SERIAL_CACHE_FILE = os.path.join(APP_DIR, "serial_cache.bin")
+
+CACHE_MAGIC = b"SAXSER01"
+CACHE_VERSION = 1
+
+# Start serials are stored as signed 64-bit ('q') in the cache
+MAX_START_SERIAL = 2**63 - 1
+
+_YEAR = re.compile(r"\d{4}")
+
+
+# --- Validation ---
+def validate_serial_data(serial_data):
+    """
+    Returns a list of (maker, position, message) for entries that break the
+    'sorted by serial number' rule in serials.py: starts that go backwards and repeated starts.
+    """
+    problems = []
+    for maker, entries in serial_data.items():
+        seen = {}
+        for i, (start_serial, year) in enumerate(entries):
+            if start_serial in seen:
+                problems.append((maker, i, f"duplicate start serial {start_serial} (also entry {seen[start_serial]})"))
+            elif i and start_serial < entries[i - 1][0]:
+                problems.append((maker, i, f"start serial {start_serial} is lower than the entry before it ({entries[i - 1][0]})"))
+            seen.setdefault(start_serial, i)
+    return problems
+
+def clean_entry(start_serial, year):
+    """(int start, year) for a user entry, or raises ValueError. Years stay int, or str for spans like '1925-1930'."""
+    if isinstance(start_serial, bool):
+        raise ValueError(f"bad start serial {start_serial!r}")
+    text = str(start_serial).strip()
+    if not text:
+        raise ValueError("missing start serial")
+    start = int(text)
+    if start < 0:
+        raise ValueError(f"negative start serial {start}")
+    if start > MAX_START_SERIAL:
+        raise ValueError(f"start serial {start} is too large")
+    if isinstance(year, int) and not isinstance(year, bool):
+        return start, year
+    text = str(year).strip()
+    if text.isdigit():
+        return start, int(text)
+    if not _YEAR.search(text):
+        raise ValueError(f"bad year {year!r}")
+    return start, text
+
+
+# --- Sources ---
+def builtin_source():
+    """
+    (path, stamp_path) for serials.py without importing it. In a frozen build the
+    module sits inside the executable, so the executable's stamp is used instead.
+    """
+    if getattr(sys, 'frozen', False):
+        return "serials", sys.executable
+    spec = importlib.util.find_spec("serials")
+    if spec is None or not spec.origin or not os.path.isfile(spec.origin):
+        return None, None
+    return "serials", spec.origin
+
+def user_sources(user_dir=USER_SERIAL_DIR):
+    if not os.path.isdir(user_dir):
+        return []
+    return [os.path.join(user_dir, name) for name in sorted(os.listdir(user_dir))
+            if name.lower().endswith((".json", ".csv"))]
+
+def source_stamps(user_dir=USER_SERIAL_DIR):
+    """[[name, mtime_ns, size], ...] for every source; any change means the cache is stale."""
+    stamps = []
+    name, path = builtin_source()
+    paths = ([(name, path)] if path else []) + [(p, p) for p in user_sources(user_dir)]
+    for name, path in paths:
+        try:
+            stat = os.stat(path)
+            stamps.append([name, stat.st_mtime_ns, stat.st_size])
+        except OSError:
+            stamps.append([name, None, None])
+    return stamps
+
+def read_user_table(path):
+    """{maker: [(start, year), ...]} from a JSON or CSV user table, plus a list of warnings."""
+    tables = {}
+    warnings = []
+    if path.lower().endswith(".json"):
+        with open(path, 'r', encoding='utf-8') as f:
+            raw = json.load(f)
+        if not isinstance(raw, dict):
+            raise ValueError("expected an object of maker -> [[start, year], ...]")
+        rows = [(maker, entry) for maker, entries in raw.items() for entry in (entries if isinstance(entries, list) else [None])]
+    else:
+        with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+            reader = csv.DictReader(f)
+            fields = {name.strip().lower(): name for name in reader.fieldnames or []}
+            if not {"maker", "start", "year"} <= set(fields):
+                raise ValueError("CSV needs maker, start and year columns")
+            rows = [(row[fields["maker"]].strip(), (row[fields["start"]], row[fields["year"]])) for row in reader]
+
+    for n, (maker, entry) in enumerate(rows, 1):
+        try:
+            if not maker:
+                raise ValueError("no maker")
+            start, year = entry
+            tables.setdefault(maker, []).append(clean_entry(start, year))
+        except (TypeError, ValueError) as e:
+            warnings.append(f"{os.path.basename(path)} entry {n}: skipped ({e})")
+    return tables, warnings
+
+def merge_tables(user_dir=USER_SERIAL_DIR):
+    """Built-in charts with user tables applied in file name order. Returns (data, warnings)."""
+    try:
+        import serials
+        merged = {maker: list(entries) for maker, entries in serials.SERIAL_DATA.items()}
+    except ImportError:
+        merged = {} # Fallback if file is missing
+    warnings = []
+    for path in user_sources(user_dir):
+        try:
+            tables, file_warnings = read_user_table(path)
+        except (OSError, ValueError) as e:
+            warnings.append(f"{os.path.basename(path)}: not loaded ({e})")
+            continue
+        warnings.extend(file_warnings)
+        merged.update(tables)
+    warnings.extend(f"{maker} entry {i}: {message}" for maker, i, message in validate_serial_data(merged))
+    return merged, warnings
+
+
+# --- Compiled Tables ---
+class SerialTables(Mapping):
+    """
+    maker -> [(start, year), ...] backed by the cache arrays.
+    A maker's entries are only turned into tuples the first time they are asked for.
+    """
+
+    def __init__(self, makers, offsets, starts, year_ids, years, warnings=()):
+        self.makers = makers
+        self.positions = {maker: i for i, maker in enumerate(makers)}
+        self.offsets = offsets
+        self.starts = starts
+        self.year_ids = year_ids
+        self.years = years
+        self.warnings = list(warnings)
+        self._decoded = {}
+
+    @classmethod
+    def from_data(cls, data, warnings=()):
+        makers = list(data)
+        offsets = array.array('I', [0])
+        starts = array.array('q')
+        year_ids = array.array('I')
+        years = []
+        year_positions = {}
+        for maker in makers:
+            for start, year in data[maker]:
+                key = (type(year).__name__, year)
+                if key not in year_positions:
+                    year_positions[key] = len(years)
+                    years.append(year)
+                starts.append(start)
+                year_ids.append(year_positions[key])
+            offsets.append(len(starts))
+        return cls(makers, offsets, starts, year_ids, years, warnings)
+
+    def __getitem__(self, maker):
+        entries = self._decoded.get(maker)
+        if entries is None:
+            i = self.positions[maker]
+            lo, hi = self.offsets[i], self.offsets[i + 1]
+            years = self.years
+            entries = [(start, years[y]) for start, y in zip(self.starts[lo:hi], self.year_ids[lo:hi])]
+            self._decoded[maker] = entries
+        return entries
+
+    def __iter__(self):
+        return iter(self.makers)
+
+    def __len__(self):
+        return len(self.makers)
+
+    def __contains__(self, maker):
+        return maker in self.positions
+
+    # --- Cache file ---
+    def save(self, path, sources):
+        manifest = json.dumps({
+            "version": CACHE_VERSION, "byteorder": sys.byteorder, "itemsize": array.array('I').itemsize, "sources": sources,
+            "makers": self.makers, "years": self.years, "warnings": self.warnings,
+            "counts": [len(self.offsets), len(self.starts)],
+        }).encode('utf-8')
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(CACHE_MAGIC)
+            f.write(struct.pack("<I", len(manifest)))
+            f.write(manifest)
+            self.offsets.tofile(f)
+            self.starts.tofile(f)
+            self.year_ids.tofile(f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, sources):
+        """The cached tables, or None if the cache is missing, damaged or built from other sources."""
+        try:
+            with open(path, 'rb') as f:
+                if f.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+                    return None
+                (length,) = struct.unpack("<I", f.read(4))
+                manifest = json.loads(f.read(length).decode('utf-8'))
+                if (manifest.get("version") != CACHE_VERSION or manifest.get("byteorder") != sys.byteorder
+                        or manifest.get("itemsize") != array.array('I').itemsize or manifest.get("sources") != sources):
+                    return None
+                n_offsets, n_entries = manifest["counts"]
+                offsets, starts, year_ids = array.array('I'), array.array('q'), array.array('I')
+                offsets.fromfile(f, n_offsets)
+                starts.fromfile(f, n_entries)
+                year_ids.fromfile(f, n_entries)
+        except (OSError, ValueError, KeyError, EOFError, struct.error):
+            return None
+        return cls(manifest["makers"], offsets, starts, year_ids, manifest["years"], manifest["warnings"])
+
+
+def load_serial_tables(user_dir=USER_SERIAL_DIR, cache_file=SERIAL_CACHE_FILE):
+    """
+    The merged serial charts as SerialTables. Uses the cache while every source file
+    is unchanged, otherwise merges and validates again and rewrites the cache.
+    """
+    sources = source_stamps(user_dir)
+    tables = SerialTables.load(cache_file, sources)
+    if tables is not None:
+        return tables
+
+    data, warnings = merge_tables(user_dir)
+    tables = SerialTables.from_data(data, warnings)
+    try:
+        tables.save(cache_file, sources)
+    except OSError:
+        pass # Read-only folder: just use the tables from memory this time
+    return tables
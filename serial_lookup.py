@@ -0,0 +1,278 @@
+# serial_lookup.py
+# Serial number -> year lookup for the Serial Lookup tab (and the HTTP API).
+# No tkinter here, so it can be used headless.
+
+import bisect
+import re
+from collections import namedtuple
+from collections.abc import Mapping
+
+import serial_db
+
+# --- Import Serial Data ---
+# serials.py merged with any user tables in serial_tables/, read through a compiled
+# cache (see serial_db.py). Each maker's entries are decoded on first use.
+SERIAL_DATA = serial_db.load_serial_tables()
+SERIAL_WARNINGS = SERIAL_DATA.warnings # Skipped or out-of-order chart rows, shown on the Serial tab and by the CLI
+
+# --- Compiled Index ---
+# One possible dating for a serial. 'era' is '' for makers with a single numbering series.
+# 'past_era_end' means the serial is beyond the last listed start of its series, so for
+# makers with several series it is the less likely reading.
+SerialCandidate = namedtuple('SerialCandidate', ['era', 'year', 'past_era_end'])
+
+def split_eras(entries):
+    """Splits a table where the numbering restarts (a start serial lower than the one before)."""
+    eras = []
+    for start_serial, year in entries:
+        if not eras or start_serial < eras[-1][-1][0]:
+            eras.append([])
+        eras[-1].append((start_serial, year))
+    return eras
+
+def year_text(year):
+    """First 4-digit year in a year value ('1925-1930' -> '1925')."""
+    match = re.search(r"\d{4}", str(year))
+    return match.group(0) if match else str(year)
+
+class SerialEra:
+    """One sorted numbering series of a maker, with its own bisect index."""
+    __slots__ = ('label', 'starts', 'years')
+
+    def __init__(self, label, entries):
+        self.label = label
+        self.starts = [start_serial for start_serial, _ in entries]
+        self.years = [year for _, year in entries]
+
+    def lookup(self, serial_num):
+        """All years listed at the start covering serial_num (more than one for a repeated start), and its position."""
+        i = bisect.bisect_right(self.starts, serial_num)
+        if not i:
+            return [], 0
+        first = bisect.bisect_left(self.starts, self.starts[i - 1], 0, i)
+        return self.years[first:i], i
+
+class SerialIndex:
+    """
+    One maker's (Start_Serial, Year) table compiled for bisect lookups.
+    'starts' holds the running maximum of the start serials, which is always sorted.
+    That gives exactly the old linear scan's answer even where a table isn't sorted:
+    the scan kept the last entry before the first start that was too big.
+    'eras' holds the table split at each restart, for listing every candidate.
+    """
+    __slots__ = ('maker', 'starts', 'years', 'eras')
+
+    def __init__(self, maker, entries):
+        self.maker = maker
+        self.starts = []
+        self.years = []
+        highest = None
+        for start_serial, year in entries:
+            highest = start_serial if highest is None else max(highest, start_serial)
+            self.starts.append(highest)
+            self.years.append(year)
+
+        eras = split_eras(entries)
+        self.eras = []
+        for era_entries in eras:
+            label = f"{year_text(era_entries[0][1])}-{year_text(era_entries[-1][1])} series" if len(eras) > 1 else ""
+            self.eras.append(SerialEra(label, era_entries))
+
+    def lookup(self, serial_num):
+        """Year for the entry covering serial_num, or None if it is before the first entry."""
+        i = bisect.bisect_right(self.starts, serial_num)
+        return self.years[i - 1] if i else None
+
+    def candidates(self, serial_num):
+        """Every (era, year) reading of serial_num, the likelier ones first."""
+        found = []
+        for era in self.eras:
+            years, i = era.lookup(serial_num)
+            past_end = i == len(era.starts) and len(self.eras) > 1
+            found.extend(SerialCandidate(era.label, year, past_end) for year in years if year)
+        return sorted(found, key=lambda c: c.past_era_end)
+
+def compile_serial_index(serial_data):
+    return {maker: SerialIndex(maker, entries) for maker, entries in serial_data.items()}
+
+class LazySerialIndex(Mapping):
+    """maker -> SerialIndex, compiled the first time each maker is looked up."""
+
+    def __init__(self, serial_data):
+        self.serial_data = serial_data
+        self._compiled = {}
+
+    def __getitem__(self, maker):
+        index = self._compiled.get(maker)
+        if index is None:
+            index = self._compiled[maker] = SerialIndex(maker, self.serial_data[maker])
+        return index
+
+    def __iter__(self):
+        return iter(self.serial_data)
+
+    def __len__(self):
+        return len(self.serial_data)
+
+    def __contains__(self, maker):
+        return maker in self.serial_data
+
+class MergedSerialIndex:
+    """
+    Every maker's eras merged into one table for searching a serial against all makers.
+    The start serials of all eras cut the number line into intervals where the set of
+    (maker, candidate) answers can't change, so each interval's answers are worked out
+    once here and a search is a single bisect.
+    """
+    __slots__ = ('boundaries', 'results')
+
+    def __init__(self, serial_index):
+        self.boundaries = sorted({start for index in serial_index.values() for era in index.eras for start in era.starts})
+        self.results = []
+        for boundary in self.boundaries:
+            found = [(maker, candidate) for maker, index in serial_index.items() for candidate in index.candidates(boundary)]
+            self.results.append(tuple(sorted(found, key=lambda mc: (mc[1].past_era_end, mc[0]))))
+
+    def search(self, serial_num):
+        """Tuple of (maker, SerialCandidate) for every maker whose charts cover serial_num."""
+        i = bisect.bisect_right(self.boundaries, serial_num)
+        return self.results[i - 1] if i else ()
+
+# --- Reverse Index (year -> serial ranges) ---
+# 'end' is exclusive (the next entry's start) and None for the last entry of a series.
+# 'estimated' marks years the chart doesn't list: gap years take the range of the
+# nearest earlier year, and a year span like '1925-1930' is shared by all its years.
+SerialRange = namedtuple('SerialRange', ['start', 'end', 'era', 'estimated'])
+
+def year_span(year):
+    """The years a chart year value covers: 1931 -> [1931], '1925-1930' -> 1925..1930."""
+    if isinstance(year, int):
+        return [year]
+    found = [int(y) for y in re.findall(r"\d{4}", str(year))]
+    if not found:
+        return []
+    return list(range(min(found), max(found) + 1))
+
+def maker_year_ranges(index):
+    """{year: [SerialRange, ...]} for one maker, with gap years filled in."""
+    ranges = {}
+    for era in index.eras:
+        for k, (start, year) in enumerate(zip(era.starts, era.years)):
+            # Entries that share a start serial share the range up to the next different start
+            end = next((s for s in era.starts[k + 1:] if s != start), None)
+            years = year_span(year)
+            for y in years:
+                ranges.setdefault(y, []).append(SerialRange(start, end, era.label, len(years) > 1))
+
+    if ranges:
+        previous = None
+        for y in range(min(ranges), max(ranges) + 1):
+            if y in ranges:
+                previous = ranges[y]
+            else:
+                ranges[y] = [r._replace(estimated=True) for r in previous]
+    return ranges
+
+def build_reverse_index(serial_index):
+    """{year: {maker: [SerialRange, ...]}} for every maker, so a year query is a dict lookup."""
+    reverse = {}
+    for maker, index in serial_index.items():
+        for year, ranges in maker_year_ranges(index).items():
+            reverse.setdefault(year, {})[maker] = tuple(ranges)
+    return reverse
+
+SERIAL_INDEX = LazySerialIndex(SERIAL_DATA)
+# Built with the tables (a couple of ms), so the first year query is a plain lookup too
+REVERSE_INDEX = build_reverse_index(SERIAL_INDEX)
+_ALL_MAKERS_INDEX = None
+
+def get_all_makers_index():
+    """The merged index, built on first use (it takes a few tens of ms)."""
+    global _ALL_MAKERS_INDEX
+    if _ALL_MAKERS_INDEX is None:
+        _ALL_MAKERS_INDEX = MergedSerialIndex(SERIAL_INDEX)
+    return _ALL_MAKERS_INDEX
+
+# --- Serial Logic ---
+_NON_DIGITS = re.compile(r"\D+")
+
+def parse_serial(serial_str):
+    """The digits of a serial as an int (letters and spaces are ignored), or None."""
+    # Extract numbers only for comparison
+    clean_serial = _NON_DIGITS.sub("", serial_str)
+    if not clean_serial:
+        return None
+    return int(clean_serial)
+
+def lookup_serial_year(maker, serial_str):
+    if not maker or not serial_str:
+        return ""
+
+    index = SERIAL_INDEX.get(maker)
+    if index is None:
+        return "Manufacturer data not found."
+
+    serial_num = parse_serial(serial_str)
+    if serial_num is None:
+        return "Invalid Serial Number"
+
+    found_year = index.lookup(serial_num)
+    if found_year:
+        return str(found_year)
+    else:
+        return "Too old / Unknown"
+
+def lookup_serial_candidates(maker, serial_str):
+    """
+    Every plausible (era, year) for a serial, for makers whose numbering restarts.
+    Returns (candidates, message); message explains an empty result.
+    """
+    if not maker or not serial_str:
+        return [], ""
+
+    index = SERIAL_INDEX.get(maker)
+    if index is None:
+        return [], "Manufacturer data not found."
+
+    serial_num = parse_serial(serial_str)
+    if serial_num is None:
+        return [], "Invalid Serial Number"
+
+    candidates = index.candidates(serial_num)
+    return candidates, "" if candidates else "Too old / Unknown"
+
+def search_all_makers(serial_str):
+    """
+    Every (maker, candidate) reading of a serial across all makers, for horns whose maker is unknown.
+    Returns (results, message); message explains an empty result.
+    """
+    if not serial_str:
+        return (), ""
+
+    serial_num = parse_serial(serial_str)
+    if serial_num is None:
+        return (), "Invalid Serial Number"
+
+    results = get_all_makers_index().search(serial_num)
+    return results, "" if results else "Too old / Unknown"
+
+def format_candidate(candidate):
+    """'1985 (1950-1985 series)'; a '+' marks a serial past the end of its series."""
+    text = f"{candidate.year}+" if candidate.past_era_end else str(candidate.year)
+    return f"{text} ({candidate.era})" if candidate.era else text
+
+def serial_ranges_for_year(year, maker=None):
+    """
+    {maker: (SerialRange, ...)} for the serials made in a year, or only the given maker's.
+    Years no chart covers give an empty dict.
+    """
+    by_maker = REVERSE_INDEX.get(year, {})
+    if maker is None:
+        return by_maker
+    return {maker: by_maker[maker]} if maker in by_maker else {}
+
+def format_serial_range(serial_range):
+    """'235250 - 245274', or '30000 and up' for the last entry of a series."""
+    if serial_range.end is None:
+        return f"{serial_range.start} and up"
+    return f"{serial_range.start} - {serial_range.end - 1}"
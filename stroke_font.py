@@ -0,0 +1,95 @@
+# stroke_font.py
+# Single-stroke (Hershey-style) vector font for engraving pad sizes.
+# Glyphs are drawn on a grid 10 units tall with the baseline at y=0 (y points up).
+# Format: "Char": (Advance_Width, [Stroke, Stroke, ...]) where a stroke is a list of (x, y) points.
+
+import functools
+import math
+
+GLYPH_HEIGHT = 10.0
+
+# Scale so a 1mm font gives digits about as tall as the old SVG <text> labels (cap height ~0.72 em).
+UNITS_TO_EM = 0.072
+
+GLYPHS = {
+    "0": (8, [[(3, 10), (1, 9), (0, 7), (0, 3), (1, 1), (3, 0), (5, 1), (6, 3), (6, 7), (5, 9), (3, 10)]]),
+    "1": (8, [[(1.5, 8), (3.5, 10), (3.5, 0)]]),
+    "2": (8, [[(0, 8), (1, 9.5), (3, 10), (5, 9.5), (6, 8), (6, 6.5), (0, 0), (6, 0)]]),
+    "3": (8, [[(0.5, 10), (6, 10), (2.5, 6), (4, 6), (5.5, 5), (6, 3), (5.5, 1), (4, 0), (2, 0), (0.5, 1), (0, 2)]]),
+    "4": (8, [[(4.5, 0), (4.5, 10), (0, 3), (6.5, 3)]]),
+    "5": (8, [[(5.5, 10), (0.5, 10), (0, 5.5), (2, 6.5), (4, 6.5), (5.5, 5.5), (6, 3.5), (5.5, 1.2), (4, 0), (2, 0), (0.5, 1), (0, 2)]]),
+    "6": (8, [[(5.5, 9), (4, 10), (2, 10), (0.7, 8.5), (0, 6), (0, 3), (0.7, 1), (2, 0), (4, 0), (5.5, 1), (6, 3), (5.5, 5), (4, 6), (2, 6), (0.7, 5), (0, 3)]]),
+    "7": (8, [[(0, 10), (6, 10), (2, 0)]]),
+    "8": (8, [[(3, 10), (1, 9.5), (0.5, 8), (1, 6.5), (3, 5.5), (5, 4.7), (6, 3), (6, 1.8), (5, 0.5), (3, 0),
+               (1, 0.5), (0, 1.8), (0, 3), (1, 4.7), (3, 5.5), (5, 6.5), (5.5, 8), (5, 9.5), (3, 10)]]),
+    "9": (8, [[(6, 7), (5.3, 5), (4, 4), (2, 4), (0.7, 5), (0, 7), (0.7, 9), (2, 10), (4, 10), (5.3, 9), (6, 7),
+               (6, 4), (5.3, 1), (4, 0), (2, 0), (0.5, 1)]]),
+    ".": (3, [[(0.5, 0), (1.5, 0), (1.5, 1), (0.5, 1), (0.5, 0)]]),
+    "-": (8, [[(0.5, 5), (5.5, 5)]]),
+    " ": (5, []),
+}
+
+# Unknown characters are drawn as an empty box so they are never silently dropped.
+MISSING_GLYPH = (8, [[(0, 0), (6, 0), (6, 10), (0, 10), (0, 0)]])
+
+
+@functools.lru_cache(maxsize=None)
+def get_glyph(char, font_size):
+    """
+    Returns (advance_mm, strokes_mm) for one character at the given font size.
+    Strokes are scaled to mm with y pointing down (SVG space), origin at the baseline.
+    """
+    advance, strokes = GLYPHS.get(char, MISSING_GLYPH)
+    scale = font_size * UNITS_TO_EM
+    scaled = tuple(tuple((x * scale, -y * scale) for x, y in stroke) for stroke in strokes)
+    return advance * scale, scaled
+
+
+@functools.lru_cache(maxsize=1024)
+def layout_text(text, font_size):
+    """
+    Returns (strokes, width, height, stroke_length) for a label, all in mm.
+    Strokes are centred on (0, 0) so callers only need to translate them.
+    Pad labels repeat constantly, so each (text, size) pair is only laid out once.
+    """
+    scale = font_size * UNITS_TO_EM
+    height = GLYPH_HEIGHT * scale
+
+    pen_x = 0.0
+    placed = []
+    right_edge = 0.0
+    for char in text:
+        advance, strokes = get_glyph(char, font_size)
+        for stroke in strokes:
+            placed.append(tuple((pen_x + x, y) for x, y in stroke))
+            for x, _ in stroke:
+                right_edge = max(right_edge, pen_x + x)
+        pen_x += advance
+
+    width = right_edge
+    dx, dy = -width / 2, height / 2
+    centred = tuple(tuple((x + dx, y + dy) for x, y in stroke) for stroke in placed)
+
+    stroke_length = 0.0
+    for stroke in centred:
+        for (x1, y1), (x2, y2) in zip(stroke, stroke[1:]):
+            stroke_length += math.hypot(x2 - x1, y2 - y1)
+
+    return centred, width, height, stroke_length
+
+
+def measure_text(text, font_size):
+    """Returns (width, height) of a label in mm."""
+    _, width, height, _ = layout_text(text, font_size)
+    return width, height
+
+
+def text_path(text, font_size, cx, cy):
+    """Returns an SVG path string for a label centred on (cx, cy)."""
+    strokes = layout_text(text, font_size)[0]
+    path_data = []
+    for stroke in strokes:
+        for i, (x, y) in enumerate(stroke):
+            command = "M" if i == 0 else "L"
+            path_data.append(f"{command} {cx + x:.3f} {cy + y:.3f}")
+    return " ".join(path_data)
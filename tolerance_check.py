@@ -0,0 +1,186 @@
+# tolerance_check.py
+# Checks a batch of measured key heights against the reference heights for each
+# horn's make/model/size, and writes a report of the keys out of tolerance.
+# No tkinter here; 'companion_cli tolerance' runs it.
+#
+# The reference for a make/model/size is the mean of the reference sets saved for it
+# (usually just one), taken from HeightStats. Measured sets come from a CSV (one row
+# per horn, one column per key) or from a key height library. Rows are checked and
+# written one at a time, so a CSV of any size is read in one pass.
+#
+# The report has every input column (or library, name, make, model, size, serial) plus:
+#   reference_sets  - how many reference sets the reference heights are the mean of
+#   checked         - keys with both a measured and a reference height
+#   worst_key       - the key furthest from its reference
+#   worst_deviation - its deviation (measured - reference), in the report units
+#   out_of_tolerance - every key outside the tolerance with its deviation, '; ' separated
+#   <key> dev       - each key's deviation, blank when it wasn't checked
+#   status          - ok, out of tolerance, no reference, or no common keys
+
+import csv
+import os
+import sys
+
+from key_heights import KEY_HEIGHT_FIELDS, HeightStats, convert_height, format_height, height_mm, horn_key, preset_heights_mm
+from library_store import iter_presets, read_json_library
+
+DEFAULT_TOLERANCE_MM = 0.3
+
+HORN_FIELDS = ("make", "model", "size")
+SET_COLUMNS = ["library", "name", "make", "model", "size", "serial"]
+OUTPUT_COLUMNS = (["reference_sets", "checked", "worst_key", "worst_deviation", "out_of_tolerance"]
+                  + [f"{key} dev" for key in KEY_HEIGHT_FIELDS] + ["status"])
+
+
+def parse_length(text, default_unit="mm"):
+    """'0.3', '0.3mm' or '0.012in' in mm; a bare number is in default_unit."""
+    text = str(text).strip().lower()
+    unit = default_unit
+    for suffix in ("mm", "in"):
+        if text.endswith(suffix):
+            text, unit = text[:-len(suffix)].strip(), suffix
+            break
+    value = float(text)
+    if value < 0:
+        raise ValueError(f"negative tolerance {value}")
+    return convert_height(value, unit, "mm")
+
+
+# --- References ---
+def reference_stats(key_data, library=None, exclude=None):
+    """HeightStats over the reference sets: one library's, or every library's but exclude."""
+    return HeightStats((lib, name, preset) for lib, name, preset in iter_presets(key_data)
+                       if (library is None or lib == library) and lib != exclude)
+
+
+class ToleranceChecker:
+    """Checks measured heights ({key: mm}) against the reference for their make/model/size."""
+
+    def __init__(self, references, tolerance_mm=DEFAULT_TOLERANCE_MM, units="mm"):
+        self.references = references
+        self.tolerance_mm = tolerance_mm
+        self.units = units
+        self._means = {} # horn_key -> (set count, {key: mean mm}), worked out once per horn
+
+    def reference_for(self, horn):
+        found = self._means.get(horn)
+        if found is None:
+            stats = self.references.horns.get(horn)
+            if stats is None:
+                found = (0, {})
+            else:
+                found = (len(stats.members), {key: s.mean for key, s in stats.stats().items()})
+            self._means[horn] = found
+        return found
+
+    def check(self, horn, measured):
+        """The OUTPUT_COLUMNS values for one horn's measured heights."""
+        ref_sets, reference = self.reference_for(horn)
+        if not ref_sets:
+            return self._row(0, {}, "no reference")
+        deviations = {key: value - reference[key] for key, value in measured.items() if key in reference}
+        if not deviations:
+            return self._row(ref_sets, {}, "no common keys")
+        flagged = any(abs(d) > self.tolerance_mm for d in deviations.values())
+        return self._row(ref_sets, deviations, "out of tolerance" if flagged else "ok")
+
+    def _row(self, ref_sets, deviations, status):
+        text = {key: self._format(d) for key, d in deviations.items()}
+        worst = max(deviations, key=lambda key: abs(deviations[key])) if deviations else ""
+        out = "; ".join(f"{key} {text[key]}" for key, d in deviations.items() if abs(d) > self.tolerance_mm)
+        return ([ref_sets, len(deviations), worst, text.get(worst, ""), out]
+                + [text.get(key, "") for key in KEY_HEIGHT_FIELDS] + [status])
+
+    def _format(self, deviation_mm):
+        return f"{'+' if deviation_mm >= 0 else ''}{format_height(convert_height(deviation_mm, 'mm', self.units), self.units)}"
+
+
+# --- Reports ---
+def _csv_columns(header):
+    """{field: column index} for the make/model/size, units and key height columns of a CSV header."""
+    folded = [h.strip().casefold().replace("_", " ") for h in header]
+    columns = {}
+    for field in (*HORN_FIELDS, "units", *KEY_HEIGHT_FIELDS):
+        name = field.casefold()
+        if name in folded:
+            columns[field] = folded.index(name)
+    return columns
+
+
+def check_csv(in_file, out_file, checker, units="mm", flagged_only=False):
+    """
+    Streams measured rows from in_file to out_file (open text files) adding the OUTPUT_COLUMNS.
+    Heights are in units unless the row has a 'units' column of its own. Returns {status: count}.
+    """
+    reader = csv.reader(in_file)
+    writer = csv.writer(out_file)
+    header = next(reader, None)
+    if header is None:
+        return {}
+    columns = _csv_columns(header)
+    missing = [field for field in HORN_FIELDS if field not in columns]
+    if missing:
+        raise ValueError(f"No {', '.join(missing)} column found.")
+    if not any(key in columns for key in KEY_HEIGHT_FIELDS):
+        raise ValueError(f"No key height columns found (looked for {', '.join(KEY_HEIGHT_FIELDS)}).")
+    writer.writerow(header + OUTPUT_COLUMNS)
+
+    counts = {}
+    for row in reader:
+        cell = lambda field: row[columns[field]] if field in columns and columns[field] < len(row) else ""
+        row_units = cell("units").strip().lower() or units
+        measured = {}
+        for key in KEY_HEIGHT_FIELDS:
+            value = height_mm(cell(key), row_units)
+            if value is not None:
+                measured[key] = value
+        result = checker.check(horn_key({field: cell(field) for field in HORN_FIELDS}), measured)
+        status = result[-1]
+        counts[status] = counts.get(status, 0) + 1
+        if not flagged_only or status != "ok":
+            writer.writerow(row + result)
+    return counts
+
+
+def check_sets(presets, out_file, checker, flagged_only=False):
+    """Checks stored key height sets, (library, name, preset) each, writing one report row per set."""
+    writer = csv.writer(out_file)
+    writer.writerow(SET_COLUMNS + OUTPUT_COLUMNS)
+    counts = {}
+    for library, name, preset in presets:
+        result = checker.check(horn_key(preset), preset_heights_mm(preset))
+        status = result[-1]
+        counts[status] = counts.get(status, 0) + 1
+        if not flagged_only or status != "ok":
+            writer.writerow([library, name] + [str(preset.get(field, "")) for field in SET_COLUMNS[2:]] + result)
+    return counts
+
+
+def _open_report(out_path):
+    return sys.stdout if out_path == "-" else open(out_path, 'w', newline='', encoding='utf-8')
+
+
+def check_sets_file(presets, out_path, checker, flagged_only=False):
+    """check_sets writing to a report path ('-' for stdout)."""
+    out_file = _open_report(out_path)
+    try:
+        return check_sets(presets, out_file, checker, flagged_only)
+    finally:
+        if out_file is not sys.stdout:
+            out_file.close()
+
+
+def check_file(in_path, out_path, checker, units="mm", flagged_only=False):
+    """check_csv for a CSV path, or check_sets for a JSON key height library file."""
+    if in_path.lower().endswith(".json"):
+        if not os.path.exists(in_path):
+            raise ValueError(f"File not found: {in_path}")
+        data, _ = read_json_library(in_path)
+        return check_sets_file(iter_presets(data), out_path, checker, flagged_only)
+    with open(in_path, 'r', newline='', encoding='utf-8-sig') as in_file:
+        out_file = _open_report(out_path)
+        try:
+            return check_csv(in_file, out_file, checker, units, flagged_only)
+        finally:
+            if out_file is not sys.stdout:
+                out_file.close()
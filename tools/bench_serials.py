@@ -0,0 +1,70 @@
+# bench_serials.py
+# Checks serials.py for unsorted or repeated entries, then times the serial lookup
+# for every maker against the original linear scan (and checks they agree).
+#
+#   python tools/bench_serials.py [--lookups 20000]
+
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import serial_db
+import serial_lookup
+from serial_lookup import SERIAL_DATA, SERIAL_INDEX
+
+
+def linear_lookup(maker, serial_num):
+    """The original scan from lookup_serial_year, kept here as the reference."""
+    found_year = None
+    for start_serial, year in SERIAL_DATA[maker]:
+        if serial_num >= start_serial:
+            found_year = year
+        else:
+            break
+    return found_year
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serial lookup validation and micro-benchmark")
+    parser.add_argument("--lookups", type=int, default=20000, help="Lookups per maker (default: 20000)")
+    args = parser.parse_args(argv)
+
+    problems = serial_db.validate_serial_data(SERIAL_DATA)
+    print(f"Validation: {len(problems)} problem(s)")
+    for maker, position, message in problems:
+        print(f"  {maker} entry {position}: {message}")
+    print()
+
+    rng = random.Random(1)
+    print(f"{'Maker':<22}{'entries':>8}{'linear us':>12}{'bisect us':>12}{'speedup':>9}")
+    total_linear = total_bisect = 0.0
+    for maker, entries in sorted(SERIAL_DATA.items()):
+        top = max(start for start, _ in entries) * 1.2 + 10
+        serials = [rng.randint(0, int(top)) for _ in range(args.lookups)]
+        index = SERIAL_INDEX[maker]
+
+        mismatches = [n for n in serials if linear_lookup(maker, n) != index.lookup(n)]
+        if mismatches:
+            print(f"{maker}: {len(mismatches)} lookups disagree, e.g. {mismatches[0]}")
+            return 1
+
+        linear = timeit.timeit(lambda: [linear_lookup(maker, n) for n in serials], number=1)
+        fast = timeit.timeit(lambda: [index.lookup(n) for n in serials], number=1)
+        total_linear += linear
+        total_bisect += fast
+        print(f"{maker:<22}{len(entries):>8}{linear / args.lookups * 1e6:>12.3f}{fast / args.lookups * 1e6:>12.3f}{linear / fast:>8.1f}x")
+
+    count = args.lookups * len(SERIAL_DATA)
+    print(f"{'All makers':<22}{'':>8}{total_linear / count * 1e6:>12.3f}{total_bisect / count * 1e6:>12.3f}{total_linear / total_bisect:>8.1f}x")
+
+    full = timeit.timeit(lambda: serial_lookup.lookup_serial_year("Selmer Paris", "M 123456"), number=args.lookups)
+    print(f"\nlookup_serial_year (with input cleaning): {full / args.lookups * 1e6:.3f} us per call")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+# check_labels.py
+# Builds a sheet in both drawing modes and checks, from the SVG itself, that every
+# engraved size label sits inside its disc. Circles are written in mm and labels and
+# stars as path numbers, so this catches the two ending up in different units.
+#
+#   python tools/check_labels.py [--pads "42 x 3, 30 x 5, 18 x 4, 9.5 x 6"] [--material felt]
+
+import argparse
+import math
+import os
+import re
+import sys
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pad_engine
+
+SVG_NS = "{http://www.w3.org/2000/svg}"
+_NUMBERS = re.compile(r"-?\d*\.?\d+(?:e-?\d+)?")
+
+
+def length_mm(value, user_mm):
+    """An SVG length in mm: '12.5mm' as is, a bare number in user units."""
+    value = str(value)
+    return float(value[:-2]) if value.endswith("mm") else float(value) * user_mm
+
+
+def path_box(d, scale):
+    """(min_x, min_y, max_x, max_y) of a path made of M/L/Z commands, times scale."""
+    numbers = [float(n) * scale for n in _NUMBERS.findall(d)]
+    xs, ys = numbers[0::2], numbers[1::2]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def read_shapes(svg_text, compat, colors, material):
+    """([(cx, cy, r), ...] discs and [box, ...] labels, all in mm, read back from the SVG."""
+    user_mm = 1.0 if compat else 1 / pad_engine.MM_TO_PX
+    discs, labels = [], []
+
+    def walk(element, scale):
+        transform = element.get("transform", "")
+        match = re.match(r"scale\(([^)]+)\)", transform)
+        if match:
+            scale *= float(match.group(1))
+        tag = element.tag.replace(SVG_NS, "")
+        stroke = element.get("stroke")
+        if tag == "circle" and stroke == colors[f"{material}_outline"]:
+            discs.append(tuple(length_mm(element.get(k), user_mm * scale) for k in ("cx", "cy", "r")))
+        elif tag == "path" and stroke == colors[f"{material}_outline"]:
+            x0, y0, x1, y1 = path_box(element.get("d"), user_mm * scale)
+            discs.append(((x0 + x1) / 2, (y0 + y1) / 2, max(x1 - x0, y1 - y0) / 2))
+        elif tag == "path" and stroke == colors[f"{material}_engraving"]:
+            labels.append(path_box(element.get("d"), user_mm * scale))
+        for child in element:
+            walk(child, scale)
+
+    walk(ET.fromstring(svg_text), 1.0)
+    return discs, labels
+
+
+def check(pads, material, compat):
+    settings = pad_engine.load_settings()
+    settings["compatibility_mode"] = compat
+    snapshot = pad_engine.SettingsSnapshot.from_settings(settings)
+    dwg, placed = pad_engine.build_svg(pads, material, 330, 250, 3.5, snapshot)
+    discs, labels = read_shapes(dwg.tostring(), compat, snapshot.layer_colors, material)
+
+    problems = []
+    if len(discs) != len(placed):
+        problems.append(f"{len(discs)} disc outlines in the SVG for {len(placed)} placed discs")
+    for (cx, cy, r), (pcx, pcy, pr) in zip(sorted(discs), sorted((p[1], p[2], p[3]) for p in placed)):
+        if max(abs(cx - pcx), abs(cy - pcy)) > 0.05:
+            problems.append(f"disc at ({cx:.2f}, {cy:.2f}) mm should be at ({pcx:.2f}, {pcy:.2f})")
+    for box in labels:
+        mid_x, mid_y = (box[0] + box[2]) / 2, (box[1] + box[3]) / 2
+        cx, cy, r = min(discs, key=lambda d: math.hypot(d[0] - mid_x, d[1] - mid_y))
+        corners = [(x, y) for x in (box[0], box[2]) for y in (box[1], box[3])]
+        if any(math.hypot(x - cx, y - cy) > r + 1e-6 for x, y in corners):
+            problems.append(f"label box {tuple(round(v, 2) for v in box)} mm sticks out of the disc at ({cx:.2f}, {cy:.2f}) r {r:.2f}")
+    return len(labels), problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that engraved labels land inside their discs")
+    parser.add_argument("--pads", default="42 x 3, 30 x 5, 18 x 4, 9.5 x 6", help="Pad list ('size x qty', comma separated)")
+    parser.add_argument("--material", default="felt", choices=pad_engine.MATERIALS)
+    args = parser.parse_args(argv)
+
+    pads = pad_engine.parse_pad_list(args.pads.replace(",", "\n"))
+    failed = False
+    for compat in (False, True):
+        count, problems = check(pads, args.material, compat)
+        mode = "compatibility" if compat else "standard"
+        print(f"{mode}: {count} label(s), {len(problems)} problem(s)")
+        for problem in problems:
+            print(f"  {problem}")
+        failed = failed or bool(problems) or not count
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+# load_test.py
+# Measures requests per second against a running API server
+# (python -m companion_cli serve).
+#
+#   python tools/load_test.py --requests 200 --concurrency 8
+#   python tools/load_test.py --endpoint serial --requests 5000 --concurrency 16
+#   python tools/load_test.py --unique        # new pad list every request, so no cache hits
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+PAD_SIZES = [18, 20, 22, 24, 26, 28, 30, 32, 34, 36, 38, 40, 42, 44, 46, 48, 50, 52]
+
+
+def make_nest_body(rng, unique):
+    if unique:
+        pads = [[rng.choice(PAD_SIZES) + rng.choice([0, 0.5]), rng.randint(1, 3)] for _ in range(12)]
+    else:
+        pads = [[size, 1] for size in PAD_SIZES[:12]]
+    return json.dumps({"pads": pads, "sheet": "13.5x10in", "materials": ["felt", "card", "leather"]}).encode('utf-8')
+
+
+def one_request(base_url, endpoint, rng, unique):
+    if endpoint == "serial":
+        query = urllib.parse.urlencode({"maker": "Selmer Paris", "serial": str(rng.randint(10000, 900000))})
+        request = urllib.request.Request(f"{base_url}/serial?{query}")
+    else:
+        request = urllib.request.Request(f"{base_url}/nest", data=make_nest_body(rng, unique),
+                                         headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=120) as response:
+            response.read()
+            return response.status, response.headers.get("X-Cache")
+    except urllib.error.HTTPError as e:
+        e.read()
+        return e.code, e.headers.get("X-Cache")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test for the Sax Shop Companion HTTP API")
+    parser.add_argument("--url", default="http://127.0.0.1:8765", help="Server address (default: http://127.0.0.1:8765)")
+    parser.add_argument("--endpoint", choices=["nest", "serial"], default="nest")
+    parser.add_argument("--requests", type=int, default=200, help="Total requests (default: 200)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Client threads (default: 8)")
+    parser.add_argument("--unique", action="store_true", help="Random pad list per request (defeats the cache)")
+    args = parser.parse_args(argv)
+
+    latencies = []
+    statuses = {}
+    cache_hits = 0
+    lock = threading.Lock()
+    remaining = [args.requests]
+
+    def worker(seed):
+        nonlocal cache_hits
+        rng = random.Random(seed)
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            t_start = time.perf_counter()
+            try:
+                status, cache = one_request(args.url, args.endpoint, rng, args.unique)
+            except OSError as e:
+                status, cache = type(e).__name__, None
+            elapsed = time.perf_counter() - t_start
+            with lock:
+                latencies.append(elapsed)
+                statuses[status] = statuses.get(status, 0) + 1
+                cache_hits += cache == "hit"
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.concurrency)]
+    t_start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    total = time.perf_counter() - t_start
+
+    latencies.sort()
+    ms = [x * 1000 for x in latencies]
+    print(f"{len(latencies)} requests in {total:.2f}s -> {len(latencies) / total:.1f} req/s")
+    print(f"latency ms: mean {statistics.mean(ms):.1f}  p50 {ms[len(ms) // 2]:.1f}  "
+          f"p95 {ms[int(len(ms) * 0.95) - 1]:.1f}  max {ms[-1]:.1f}")
+    print(f"status: {statuses}")
+    if args.endpoint == "nest":
+        print(f"cache hits: {cache_hits}")
+    return 0 if set(statuses) <= {200, 422} else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,167 @@
+# watch_folder.py
+# Watches a folder for pad list files and generates SVGs as they arrive.
+# Uses plain polling (no inotify), so it also works on network shares.
+#
+# A file is only picked up once its mtime and size have stopped changing for
+# settle_time seconds, so half-copied files are never read. Ready files go through
+# a bounded in-flight queue on a process pool. Finished jobs are moved to the done
+# folder, and jobs that fail are moved to the failed folder.
+
+import csv
+import hashlib
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import pad_engine
+import batch_jobs
+
+
+class FolderWatcher:
+    def __init__(self, watch_dir, out_root, settings, defaults, done_dir=None, failed_dir=None,
+                 poll_interval=1.0, settle_time=2.0, max_queued=8, workers=None, log=print):
+        self.watch_dir = watch_dir
+        self.out_root = out_root
+        self.done_dir = done_dir or os.path.join(watch_dir, "done")
+        self.failed_dir = failed_dir or os.path.join(watch_dir, "failed")
+        self.settings = pad_engine.SettingsSnapshot.coerce(settings)
+        self.defaults = defaults
+        self.poll_interval = poll_interval
+        self.settle_time = settle_time
+        self.max_queued = max_queued
+        self.workers = workers
+        self.log = log
+        self.summary_path = os.path.join(out_root, "watch_summary.csv")
+
+        self._seen = {}        # path -> ((mtime_ns, size), time the signature was first seen)
+        self._in_flight = {}   # future -> (path, signature, content hash, job name)
+        self._busy = set()     # paths queued or running
+        self._done_hashes = {} # content hash -> job name, to skip duplicate drops
+
+    # --- Polling ---
+    def scan(self, now=None):
+        """Returns paths whose size and mtime have been stable for settle_time, oldest first."""
+        now = time.monotonic() if now is None else now
+        ready = []
+        present = set()
+        try:
+            entries = list(os.scandir(self.watch_dir))
+        except OSError as e:
+            self.log(f"Can't read {self.watch_dir}: {e}")
+            return ready
+
+        for entry in entries:
+            if not entry.is_file() or not entry.name.lower().endswith(batch_jobs.JOB_EXTENSIONS):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue  # Removed between scandir and stat
+            path = entry.path
+            present.add(path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+            previous = self._seen.get(path)
+            if previous is None or previous[0] != signature:
+                self._seen[path] = (signature, now)  # New or still changing: restart the settle timer
+                continue
+            if path not in self._busy and now - previous[1] >= self.settle_time:
+                ready.append((signature[0], path))
+
+        for path in list(self._seen):
+            if path not in present:
+                del self._seen[path]
+        return [path for _, path in sorted(ready)]
+
+    def _file_hash(self, path):
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    # --- Moving finished files ---
+    def _move(self, path, folder):
+        os.makedirs(folder, exist_ok=True)
+        target = os.path.join(folder, os.path.basename(path))
+        if os.path.exists(target):
+            stem, ext = os.path.splitext(os.path.basename(path))
+            target = os.path.join(folder, f"{stem}_{time.strftime('%Y%m%d-%H%M%S')}{ext}")
+        shutil.move(path, target)
+        self._seen.pop(path, None)
+        return target
+
+    def _write_summary(self, row):
+        os.makedirs(self.out_root, exist_ok=True)
+        new_file = not os.path.exists(self.summary_path)
+        with open(self.summary_path, 'a', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=batch_jobs.SUMMARY_FIELDS)
+            if new_file:
+                writer.writeheader()
+            writer.writerow(row)
+
+    # --- Main loop ---
+    def submit_ready(self, pool):
+        """Queues stable files until max_queued jobs are in flight; the rest wait for the next poll."""
+        for path in self.scan():
+            if len(self._in_flight) >= self.max_queued:
+                break
+            try:
+                signature = self._seen[path][0]
+                content_hash = self._file_hash(path)
+            except (KeyError, OSError):
+                continue
+            if content_hash in self._done_hashes:
+                self.log(f"{os.path.basename(path)}: duplicate of '{self._done_hashes[content_hash]}', not regenerated")
+                self._move(path, self.done_dir)
+                continue
+            if any(queued_hash == content_hash for _, _, queued_hash, _ in self._in_flight.values()):
+                continue  # Same order is already running; decide once it finishes
+            name = batch_jobs.read_job_name({"file": path})
+            if any(queued.casefold() == name.casefold() for _, _, _, queued in self._in_flight.values()):
+                continue  # Another file is writing to the same output folder; wait for it
+            job = {"file": path, "name": name}
+            future = pool.submit(batch_jobs.run_batch_job, job, self.settings, self.out_root, self.defaults)
+            self._in_flight[future] = (path, signature, content_hash, name)
+            self._busy.add(path)
+
+    def collect(self, timeout):
+        """Waits up to timeout for running jobs and files away the finished ones."""
+        if not self._in_flight:
+            time.sleep(timeout)
+            return
+        finished, _ = wait(list(self._in_flight), timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in finished:
+            path, signature, content_hash, _ = self._in_flight.pop(future)
+            self._busy.discard(path)
+            try:
+                row = future.result()
+            except Exception as e:
+                # The worker died (e.g. Ctrl+C); leave the file where it is so the next run retries it
+                self.log(f"{os.path.basename(path)}: worker stopped ({type(e).__name__}), left in place")
+                continue
+            self._write_summary(row)
+
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue  # Removed while it was running
+            if (stat.st_mtime_ns, stat.st_size) != signature:
+                self.log(f"{row['job']}: changed while generating, will run again")
+                continue
+            if row["status"] == "ok":
+                self._done_hashes[content_hash] = row["job"]
+                self._move(path, self.done_dir)
+                self.log(f"{row['job']}: done ({row['sheets']} sheets, {row['elapsed_s']}s)")
+            else:
+                self._move(path, self.failed_dir)
+                self.log(f"{row['job']}: failed - {row['error']}")
+
+    def run(self, stop_event=None):
+        """Polls until stop_event is set (or forever). Running jobs are finished before returning."""
+        self.log(f"Watching {self.watch_dir} (poll {self.poll_interval}s, settle {self.settle_time}s)")
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            try:
+                while stop_event is None or not stop_event.is_set():
+                    self.submit_ready(pool)
+                    self.collect(self.poll_interval)
+            finally:
+                while self._in_flight:
+                    self.collect(self.poll_interval)